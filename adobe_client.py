@@ -0,0 +1,129 @@
+import logging
+import os
+import threading
+import time
+
+from adobe.pdfservices.operation.auth.service_principal_credentials import (
+    ServicePrincipalCredentials,
+)
+# Re-exported for the render pool, which catches every SDK error
+from adobe.pdfservices.operation.exception.exceptions import (  # noqa: F401
+    SdkException,
+    ServiceApiException,
+    ServiceUsageException,
+)
+from adobe.pdfservices.operation.pdf_services import PDFServices
+from adobe.pdfservices.operation.pdf_services_job_status import PDFServicesJobStatus
+from adobe.pdfservices.operation.pdf_services_media_type import PDFServicesMediaType
+from adobe.pdfservices.operation.pdfjobs.jobs.document_merge_job import DocumentMergeJob
+from adobe.pdfservices.operation.pdfjobs.params.documentmerge.document_merge_params import (
+    DocumentMergeParams,
+)
+from adobe.pdfservices.operation.pdfjobs.params.documentmerge.output_format import (
+    OutputFormat,
+)
+from adobe.pdfservices.operation.pdfjobs.result.document_merge_result import (
+    DocumentMergePDFResult,
+)
+
+from render_client import template_hash
+
+# Adobe deletes uploaded assets after about a day, re-upload well before that
+TEMPLATE_ASSET_TTL = float(os.environ.get("TEMPLATE_ASSET_TTL", str(12 * 3600)))
+
+OUTPUT_FORMATS = {"pdf": OutputFormat.PDF, "docx": OutputFormat.DOCX}
+
+
+class RenderClient:
+    """Long-lived Adobe PDF Services client shared by every render.
+
+    The SDK keeps the access token and refreshes it when it expires, so the
+    client authenticates once instead of on every download. Uploaded template
+    assets are cached by the SHA-256 of the template file and uploaded again
+    only when the file changes or the asset is about to expire.
+    """
+
+    def __init__(
+        self, client_id: str, client_secret: str, asset_ttl: float = TEMPLATE_ASSET_TTL
+    ):
+        self.pdf_services = PDFServices(
+            credentials=ServicePrincipalCredentials(
+                client_id=client_id, client_secret=client_secret
+            )
+        )
+        self.asset_ttl = asset_ttl
+
+        self._lock = threading.Lock()
+        # sha256 -> (asset, uploaded_at)
+        self._assets = {}
+        self.uploads = 0
+        self.asset_hits = 0
+
+    def template_asset(self, template_path: str) -> tuple[str, object, bool]:
+        """Return the template's hash, its uploaded asset and whether it was just uploaded"""
+        with self._lock:
+            digest = template_hash(template_path)
+            cached = self._assets.get(digest)
+            if cached and time.time() - cached[1] < self.asset_ttl:
+                self.asset_hits += 1
+                return digest, cached[0], False
+
+            with open(template_path, "rb") as file:
+                input_stream = file.read()
+            asset = self.pdf_services.upload(
+                input_stream=input_stream, mime_type=PDFServicesMediaType.DOCX
+            )
+            self._assets[digest] = (asset, time.time())
+            self.uploads += 1
+            logging.info(f"Uploaded template {template_path} ({digest[:12]})")
+            return digest, asset, True
+
+    def invalidate(self, digest: str):
+        with self._lock:
+            self._assets.pop(digest, None)
+
+    def stats(self) -> dict:
+        return {
+            "uploads": self.uploads,
+            "assetHits": self.asset_hits,
+            "templates": len(self._assets),
+        }
+
+    def submit(self, asset, resume_data: dict, output_format: str) -> str:
+        """Start a merge job for "pdf" or "docx" output and return its polling location"""
+        document_merge_params = DocumentMergeParams(
+            json_data_for_merge=resume_data,
+            output_format=OUTPUT_FORMATS[output_format],
+        )
+        document_merge_job = DocumentMergeJob(
+            input_asset=asset, document_merge_params=document_merge_params
+        )
+        return self.pdf_services.submit(document_merge_job)
+
+    def is_done(self, location: str) -> bool:
+        status = self.pdf_services.get_job_status(location).get_status()
+        return status != PDFServicesJobStatus.IN_PROGRESS.get_value()
+
+    def download(self, location: str) -> bytes:
+        """Fetch the document of a merge job, raising if the job failed"""
+        pdf_services_response = self.pdf_services.get_job_result(
+            location, DocumentMergePDFResult
+        )
+        result_asset = pdf_services_response.get_result().get_asset()
+        return self.pdf_services.get_content(result_asset).get_input_stream()
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_render_client() -> RenderClient:
+    """Return the process-wide render client, creating it on first use"""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = RenderClient(
+                client_id=os.getenv("PDF_SERVICES_CLIENT_ID"),
+                client_secret=os.getenv("PDF_SERVICES_CLIENT_SECRET"),
+            )
+        return _client
@@ -0,0 +1,97 @@
+"""Benchmark job description compaction against the old summarize_text.
+
+Builds synthetic postings of increasing size where the requirements sit
+behind long company boilerplate, then reports runtime and how many of the
+requirement lines each approach keeps within a 2000-token budget.
+
+    python benchmarks/bench_compaction.py --sizes 10 100 500
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from compaction import compact_job_description, estimate_tokens  # noqa: E402
+
+BOILERPLATE = [
+    "About us: we are a fast-growing company founded in 2012 and headquartered in Austin with a mission to reinvent how people work.",
+    "We offer competitive benefits including medical, dental and vision insurance, a 401k match, unlimited PTO and paid holidays.",
+    "We are an equal opportunity employer and value diversity. All applicants will receive consideration without regard to race, religion, gender or veteran status.",
+    "If you need an accommodation during the application process please contact our recruiting team. Read our privacy policy before you apply.",
+]
+REQUIREMENTS = [
+    "5+ years of experience building backend services in Python and FastAPI.",
+    "Strong knowledge of PostgreSQL schema design and query optimization.",
+    "Experience with React.js and TypeScript for internal tooling.",
+    "Must have shipped production systems on AWS with Terraform.",
+    "Experience designing event-driven systems with Kafka is a plus.",
+    "Proficient with Docker, Kubernetes and CI/CD pipelines.",
+]
+RESUME = "Senior engineer. Python, FastAPI, PostgreSQL, React.js, TypeScript, AWS, Terraform, Docker, Kubernetes, Kafka."
+
+
+def legacy_summarize_text(text: str, max_length=8000) -> str:
+    # The previous implementation: character-based estimate and string +=
+    paragraphs = [p.strip() for p in text.split("\n") if p.strip()]
+    result = ""
+    current_length = 0
+    for paragraph in paragraphs:
+        estimated_tokens = len(paragraph) * 0.25
+        if current_length + estimated_tokens > max_length:
+            break
+        result += paragraph + "\n"
+        current_length += estimated_tokens
+    return result.strip()
+
+
+def make_job_description(size_kb: int, seed: int = 0) -> str:
+    rng = random.Random(seed)
+    lines = []
+    # Vary the boilerplate so it can't be deduplicated away
+    while sum(len(line) + 1 for line in lines) < size_kb * 1024:
+        lines.append(f"{rng.choice(BOILERPLATE)} (ref {rng.randrange(10**6)})")
+    lines.append("Requirements:")
+    lines.extend(REQUIREMENTS)
+    return "\n".join(lines)
+
+
+def measure(func, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 500])
+    parser.add_argument("--budget", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(
+        f"{'size KiB':>8} {'legacy ms':>10} {'compact ms':>11} {'legacy kept':>12} {'compact kept':>13} {'compact tokens':>15}"
+    )
+    for size in args.sizes:
+        text = make_job_description(size)
+        legacy = legacy_summarize_text(text, args.budget)
+        compact = compact_job_description(text, args.budget, reference=RESUME)
+        print(
+            f"{size:>8} "
+            f"{measure(lambda: legacy_summarize_text(text, args.budget), args.repeat):>10.2f} "
+            f"{measure(lambda: compact_job_description(text, args.budget, reference=RESUME), args.repeat):>11.2f} "
+            f"{sum(line in legacy for line in REQUIREMENTS):>10}/{len(REQUIREMENTS)} "
+            f"{sum(line in compact for line in REQUIREMENTS):>11}/{len(REQUIREMENTS)} "
+            f"{estimate_tokens(compact):>15}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""Benchmark resume text extraction: temp-file round trip vs in-memory.
+
+Generates synthetic PDF and DOCX resumes of 1-50 pages and reports median
+latency and peak Python allocations for each approach.
+
+    python benchmarks/bench_extraction.py --pages 1 5 10 25 50
+"""
+
+import argparse
+import io
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+import zipfile
+
+import docx2txt
+import pymupdf
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from extraction import extract_docx_text, extract_pdf_text  # noqa: E402
+
+LINE = (
+    "Implemented a secure authentication system with Node.js and OAuth 2.0, "
+    "reducing account-related support inquiries by 25%."
+)
+LINES_PER_PAGE = 45
+
+
+def make_pdf(pages: int) -> bytes:
+    doc = pymupdf.open()
+    for _ in range(pages):
+        page = doc.new_page()
+        page.insert_textbox(
+            page.rect + (36, 36, -36, -36),
+            "\n".join([LINE] * LINES_PER_PAGE),
+            fontsize=8,
+        )
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+
+def make_docx(pages: int) -> bytes:
+    paragraph = f"<w:p><w:r><w:t>{LINE}</w:t></w:r></w:p>"
+    document = (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main">'
+        f"<w:body>{paragraph * LINES_PER_PAGE * pages}</w:body></w:document>"
+    )
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr("word/document.xml", document)
+    return buffer.getvalue()
+
+
+def legacy_pdf_text(content: bytes) -> str:
+    # The previous implementation: temp file round trip and string +=
+    with tempfile.NamedTemporaryFile(delete=False) as temp_file:
+        temp_file.write(content)
+        temp_path = temp_file.name
+    doc = pymupdf.open(temp_path)
+    text = ""
+    for page in doc:
+        text += page.get_text()
+    doc.close()
+    os.unlink(temp_path)
+    return text
+
+
+def legacy_docx_text(content: bytes) -> str:
+    with tempfile.NamedTemporaryFile(delete=False, suffix=".docx") as temp_file:
+        temp_file.write(content)
+        temp_path = temp_file.name
+    text = docx2txt.process(temp_path)
+    os.unlink(temp_path)
+    return text
+
+
+def measure(func, content: bytes, repeat: int) -> dict:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(content)
+        timings.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    func(content)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "median_ms": round(statistics.median(timings) * 1000, 3),
+        "peak_kib": round(peak / 1024, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", type=int, nargs="+", default=[1, 5, 10, 25, 50])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    cases = [
+        ("pdf", make_pdf, legacy_pdf_text, extract_pdf_text),
+        ("docx", make_docx, legacy_docx_text, extract_docx_text),
+    ]
+    print(
+        f"{'format':<6} {'pages':>5} {'tempfile ms':>12} {'memory ms':>10} {'tempfile KiB':>13} {'memory KiB':>11}"
+    )
+    for name, make, legacy, current in cases:
+        for pages in args.pages:
+            content = make(pages)
+            before = measure(legacy, content, args.repeat)
+            after = measure(current, content, args.repeat)
+            print(
+                f"{name:<6} {pages:>5} {before['median_ms']:>12} {after['median_ms']:>10} "
+                f"{before['peak_kib']:>13} {after['peak_kib']:>11}"
+            )
+
+
+if __name__ == "__main__":
+    main()
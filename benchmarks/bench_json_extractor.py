@@ -0,0 +1,108 @@
+"""Compare the single-pass JSON extractor with the old regex response parsing.
+
+Runs both parsers over the corpus in benchmarks/fixtures/llm_outputs and over
+generated pathological inputs (many unclosed braces, lines that start with a
+brace) of growing size, where the old backtracking patterns go quadratic.
+
+    python benchmarks/bench_json_extractor.py --sizes 1000 4000 16000
+"""
+
+import argparse
+import json
+import os
+import re
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from json_extractor import extract_json  # noqa: E402
+
+CORPUS = os.path.join(os.path.dirname(__file__), "fixtures", "llm_outputs")
+
+
+def legacy_parse(resume_content: str) -> tuple[str, dict]:
+    """The regex parsing rebuild_resume used before json_extractor"""
+    json_data = {}
+    try:
+        json_match = re.search(
+            r"```(?:json)?\s*(\{[\s\S]*?\})\s*```", resume_content, re.DOTALL
+        )
+        if json_match:
+            json_text = json_match.group(1)
+            json_data = json.loads(json_text)
+            resume_content = re.sub(
+                r"```(?:json)?\s*\{[\s\S]*?\}\s*```",
+                "",
+                resume_content,
+                flags=re.DOTALL,
+            ).strip()
+        else:
+            json_match = re.search(
+                r'(\{[\s\S]*?"education"\s*:\s*\[[\s\S]*?\]\s*\})',
+                resume_content,
+                re.DOTALL,
+            )
+            if json_match:
+                json_text = json_match.group(1)
+                try:
+                    json_data = json.loads(json_text)
+                    resume_content = resume_content.replace(json_text, "").strip()
+                except json.JSONDecodeError:
+                    cleaned_json = re.sub(r"[\n\r\t]+", " ", json_text)
+                    json_data = json.loads(cleaned_json)
+                    resume_content = resume_content.replace(json_text, "").strip()
+    except Exception:
+        json_data = {}
+
+    resume_content = re.sub(
+        r"^\s*\{[\s\S]*\}\s*$", "", resume_content, flags=re.MULTILINE
+    ).strip()
+    resume_content = re.sub(
+        r"^\s*```.*?```\s*$", "", resume_content, flags=re.MULTILINE | re.DOTALL
+    ).strip()
+    return resume_content, json_data
+
+
+def measure_ms(func, text: str, budget: float = 0.5) -> float:
+    timings = []
+    deadline = time.perf_counter() + budget
+    while not timings or (time.perf_counter() < deadline and len(timings) < 200):
+        start = time.perf_counter()
+        func(text)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000
+
+
+def pathological_inputs(size: int) -> dict:
+    return {
+        "unclosed braces": "{ note " * (size // 7),
+        "brace per line": "{ item }\n" * (size // 9) + "{",
+        "education no close": '{"education": [' + "{} " * (size // 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 4000, 16000])
+    args = parser.parse_args()
+
+    cases = []
+    for name in sorted(os.listdir(CORPUS)):
+        with open(os.path.join(CORPUS, name), encoding="utf-8") as file:
+            cases.append((name, file.read()))
+    for size in args.sizes:
+        for name, text in pathological_inputs(size).items():
+            cases.append((f"{name} ({size} chars)", text))
+
+    print(f"{'input':36} {'legacy ms':>10} {'extractor ms':>13} {'fields':>14}")
+    for name, text in cases:
+        legacy_ms = measure_ms(legacy_parse, text)
+        extractor_ms = measure_ms(extract_json, text)
+        fields = f"{len(legacy_parse(text)[1])} -> {len(extract_json(text)[1])}"
+        print(f"{name:36} {legacy_ms:10.3f} {extractor_ms:13.3f} {fields:>14}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""Compare local template rendering with Adobe Document Generation.
+
+Merges benchmarks/fixtures/resume_data.json into each resume template with
+docx_merge and reports the median latency, plus DOCX to PDF conversion when
+LibreOffice is installed. With --adobe the same merges run through Adobe PDF
+Services (PDF_SERVICES_CLIENT_ID/SECRET must be set); --record also saves
+Adobe's DOCX output to benchmarks/fixtures/adobe_outputs. Whenever a recorded
+Adobe output exists, the text of the local output is compared against it.
+
+    python benchmarks/bench_render.py --repeat 20
+    python benchmarks/bench_render.py --adobe --record
+"""
+
+import argparse
+import asyncio
+import difflib
+import io
+import json
+import os
+import statistics
+import sys
+import time
+
+import docx2txt
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from docx_merge import docx_to_pdf, merge_template  # noqa: E402
+
+ROOT = os.path.join(os.path.dirname(__file__), "..")
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+RECORDINGS = os.path.join(FIXTURES, "adobe_outputs")
+
+
+def measure_ms(func, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000
+
+
+def document_lines(document: bytes) -> list[str]:
+    text = docx2txt.process(io.BytesIO(document))
+    return [" ".join(line.split()) for line in text.split("\n") if line.strip()]
+
+
+def parity(local: bytes, recorded: bytes) -> tuple[float, int]:
+    """Text similarity of two documents and the number of differing lines"""
+    local_lines = document_lines(local)
+    recorded_lines = document_lines(recorded)
+    matcher = difflib.SequenceMatcher(None, local_lines, recorded_lines)
+    differing = sum(
+        max(i2 - i1, j2 - j1)
+        for tag, i1, i2, j1, j2 in matcher.get_opcodes()
+        if tag != "equal"
+    )
+    return matcher.ratio(), differing
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument(
+        "--adobe", action="store_true", help="Also time Adobe Document Generation"
+    )
+    parser.add_argument(
+        "--record", action="store_true", help="Save Adobe's output for parity checks"
+    )
+    args = parser.parse_args()
+
+    with open(os.path.join(FIXTURES, "resume_data.json")) as file:
+        templates = json.load(file)
+
+    pool = None
+    if args.adobe:
+        from render_client import RenderPool
+
+        pool = RenderPool()
+
+    def adobe_merge(template_path: str, resume_data: dict) -> bytes:
+        # Straight to Adobe, past the render cache
+        return asyncio.run(pool._merge(template_path, resume_data, "docx"))
+
+    print(
+        f"{'template':22} {'local docx ms':>14} {'local pdf ms':>13} "
+        f"{'adobe docx ms':>14} {'parity':>8} {'lines off':>10}"
+    )
+    for template, resume_data in templates.items():
+        template_path = os.path.join(ROOT, template)
+        local = merge_template(template_path, resume_data)
+        local_ms = measure_ms(
+            lambda: merge_template(template_path, resume_data), args.repeat
+        )
+
+        try:
+            pdf_ms = f"{measure_ms(lambda: docx_to_pdf(local), 3):13.1f}"
+        except RuntimeError:
+            pdf_ms = f"{'n/a':>13}"
+
+        adobe_ms = f"{'n/a':>14}"
+        recording = os.path.join(RECORDINGS, template)
+        if pool is not None:
+            # The first merge pays for authentication and the template upload
+            adobe_merge(template_path, resume_data)
+            start = time.perf_counter()
+            recorded = adobe_merge(template_path, resume_data)
+            adobe_ms = f"{(time.perf_counter() - start) * 1000:14.1f}"
+            if args.record:
+                os.makedirs(RECORDINGS, exist_ok=True)
+                with open(recording, "wb") as file:
+                    file.write(recorded)
+
+        similarity = f"{'n/a':>8}"
+        differing = f"{'n/a':>10}"
+        if os.path.exists(recording):
+            with open(recording, "rb") as file:
+                ratio, lines = parity(local, file.read())
+            similarity = f"{ratio:8.3f}"
+            differing = f"{lines:10}"
+
+        print(
+            f"{template:22} {local_ms:14.1f} {pdf_ms} {adobe_ms} "
+            f"{similarity} {differing}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""Measure the per-render CPU saved by the typed resume model.
+
+Formats the resumes in benchmarks/fixtures/llm_outputs, plus a synthetic one
+with --entries experience entries, for both education layouts in three
+ways: from the raw JSON with debug logging on (the payload dumps are built
+and written, as they were on every render at INFO before), from the raw
+JSON with debug logging off, and from a Resume built once up front. Also
+reports the size of the compact resume JSON against an indented dump.
+
+    python benchmarks/bench_resume_model.py --entries 5 20
+"""
+
+import argparse
+import io
+import json
+import logging
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from json_extractor import extract_json  # noqa: E402
+from resume_model import Resume  # noqa: E402
+from template_data import build_resume_data  # noqa: E402
+
+CORPUS = os.path.join(os.path.dirname(__file__), "fixtures", "llm_outputs")
+
+
+def measure_us(func, budget: float = 0.3) -> float:
+    timings = []
+    deadline = time.perf_counter() + budget
+    while not timings or (time.perf_counter() < deadline and len(timings) < 2000):
+        start = time.process_time()
+        func()
+        timings.append(time.process_time() - start)
+    return statistics.median(timings) * 1_000_000
+
+
+def synthetic_resume(entries: int) -> dict:
+    return {
+        "name": "Jordan Avery",
+        "role": "Senior Fullstack Engineer",
+        "email": "jordan.avery@example.com",
+        "phone": "(512) 555-0142",
+        "linkedin": "linkedin.com/in/jordanavery",
+        "summary": "Senior fullstack engineer with nine years of experience.",
+        "skills": [
+            {"category": f"Category {i}", "skills": "Python, TypeScript, Go, SQL"}
+            for i in range(6)
+        ],
+        "experience": [
+            {
+                "company": f"Company {i}",
+                "role": "Engineer",
+                "location": "Austin, TX",
+                "period": "2020 - Present",
+                "responsibilities": [
+                    "Implemented a secure authentication system with OAuth 2.0, "
+                    "reducing account-related support inquiries by 25%."
+                ]
+                * 5,
+            }
+            for i in range(entries)
+        ],
+        "education": [
+            {
+                "institution": "University of Texas",
+                "degree": "BSc",
+                "field": "Computer Science",
+                "yearStart": 2012,
+                "yearEnd": 2016,
+            }
+        ],
+    }
+
+
+def render_all(content):
+    # One render per education layout, like rendering two templates
+    build_resume_data(content, False)
+    build_resume_data(content, True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--entries", type=int, nargs="+", default=[5, 20])
+    args = parser.parse_args()
+
+    # Keep the log output in memory, its formatting still costs CPU
+    logging.basicConfig(stream=io.StringIO(), level=logging.INFO, force=True)
+    root = logging.getLogger()
+
+    cases = []
+    for name in sorted(os.listdir(CORPUS)):
+        with open(os.path.join(CORPUS, name), encoding="utf-8") as file:
+            _, json_data = extract_json(file.read())
+        if json_data:
+            cases.append((name, json_data))
+    for entries in args.entries:
+        cases.append((f"synthetic ({entries} jobs)", synthetic_resume(entries)))
+
+    print(
+        f"{'resume':28} {'raw+dumps us':>13} {'raw us':>8} {'model us':>9} "
+        f"{'saved':>6} {'indented B':>11} {'compact B':>10}"
+    )
+    for name, json_data in cases:
+        root.setLevel(logging.DEBUG)
+        dumps_us = measure_us(lambda: render_all(json_data))
+        root.setLevel(logging.INFO)
+        raw_us = measure_us(lambda: render_all(json_data))
+        resume = Resume.from_json(json_data)
+        model_us = measure_us(lambda: render_all(resume))
+
+        saved = f"{1 - model_us / dumps_us:6.0%}"
+        indented = len(json.dumps(json_data, indent=2))
+        compact = len(json.dumps(resume.to_json(), separators=(",", ":")))
+        print(
+            f"{name:28} {dumps_us:13.1f} {raw_us:8.1f} {model_us:9.1f} "
+            f"{saved} {indented:11} {compact:10}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Compare output size and latency of text+JSON vs structured tool output.
+
+Uses the resume in benchmarks/fixtures/resume_response.json to rebuild both
+response shapes: the old prose resume followed by a JSON copy, and the tool
+input that the generation now returns. Output tokens are estimated with the
+same estimator used for prompt compaction, and end-to-end latency is modelled
+from time-to-first-token and decode speed.
+
+    python benchmarks/bench_structured_output.py --ttft 1.0 --tokens-per-second 60
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from compaction import estimate_tokens  # noqa: E402
+from main import parse_resume_response  # noqa: E402
+from resume_format import render_resume_text  # noqa: E402
+
+FIXTURE = os.path.join(os.path.dirname(__file__), "fixtures", "resume_response.json")
+
+
+def measure_ms(func, repeat: int = 200) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--ttft", type=float, default=1.0, help="Seconds to first token"
+    )
+    parser.add_argument("--tokens-per-second", type=float, default=60)
+    parser.add_argument("--max-tokens", type=int, default=4096)
+    args = parser.parse_args()
+
+    with open(FIXTURE) as file:
+        resume_json = json.load(file)
+
+    # The old response shape: the prose resume, then the same data as JSON
+    legacy = (
+        render_resume_text(resume_json)
+        + "\n\n```json\n"
+        + json.dumps(resume_json, indent=2)
+        + "\n```"
+    )
+    structured = json.dumps(resume_json)
+
+    rows = [
+        ("text + JSON", legacy, lambda: parse_resume_response(legacy)),
+        ("tool JSON", structured, lambda: render_resume_text(json.loads(structured))),
+    ]
+    print(
+        f"{'response':<12} {'output tokens':>14} {'truncated':>10} {'model s':>8} {'local ms':>9}"
+    )
+    for name, output, postprocess in rows:
+        tokens = estimate_tokens(output)
+        seconds = args.ttft + tokens / args.tokens_per_second
+        print(
+            f"{name:<12} {tokens:>14} {str(tokens > args.max_tokens):>10} "
+            f"{seconds:>8.1f} {measure_ms(postprocess):>9.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
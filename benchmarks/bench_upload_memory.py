@@ -0,0 +1,161 @@
+"""Benchmark peak memory of reading and decoding an uploaded resume.
+
+Compares the previous ingestion (the whole upload read into memory, hashed,
+pickled to an extraction worker, then decoded as UTF-8, Windows-1252 and
+Latin-1 in turn) with the chunked one in uploads.py and decode_text.
+
+Each case runs in a fresh process. "server" and "worker" are the peak
+Python allocations of the two halves of a request; "rss" is the growth of
+the process's peak resident set while running both, roughly what one
+request adds across the server and its extraction worker. The text uses
+bytes that are invalid UTF-8 and undefined in Windows-1252, the worst case
+for the old decoder.
+
+    python benchmarks/bench_upload_memory.py --sizes 1 5 10 --budget-mb 25
+
+With --budget-mb the run fails when the chunked path's rss exceeds it.
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import pickle
+import resource
+import subprocess
+import sys
+import tempfile
+import tracemalloc
+
+from fastapi import UploadFile
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from extraction import decode_text, read_source  # noqa: E402
+from uploads import read_upload  # noqa: E402
+
+LINE = (
+    "Implemented a secure authentication system with Node.js and OAuth 2.0, "
+    "reducing account-related support inquiries by 25%.\n"
+).encode()
+
+
+def make_text(size: int) -> bytes:
+    # Windows-1252 quotes early and an undefined byte at the end
+    body = b"\x93Resume\x94\n" + LINE * (size // len(LINE))
+    return body[: size - 1] + b"\x81"
+
+
+def legacy_decode(content: bytes) -> str:
+    try:
+        return content.decode("utf-8")
+    except UnicodeDecodeError:
+        try:
+            return content.decode("cp1252")
+        except UnicodeDecodeError:
+            return content.decode("latin-1")
+
+
+async def legacy_server(path: str):
+    with open(path, "rb") as file:
+        upload = UploadFile(file, filename="resume.txt")
+        content = await upload.read()
+    hashlib.sha256(content).hexdigest()
+    # What ProcessPoolExecutor.submit sends to the worker
+    return content, pickle.dumps((content, "resume.txt"))
+
+
+def legacy_worker(call: bytes) -> str:
+    content, _ = pickle.loads(call)
+    return legacy_decode(content)
+
+
+async def chunked_server(path: str):
+    with open(path, "rb") as file:
+        upload = await read_upload(
+            UploadFile(file, filename="resume.txt"), max_bytes=1 << 40
+        )
+    return upload, pickle.dumps((upload.source, "resume.txt"))
+
+
+def chunked_worker(call: bytes) -> str:
+    source, _ = pickle.loads(call)
+    return decode_text(read_source(source))
+
+
+def peak_rss_bytes() -> int:
+    # ru_maxrss is in KiB on Linux and bytes on macOS
+    scale = 1 if sys.platform == "darwin" else 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+
+
+def run_case(mode: str, path: str) -> dict:
+    server, worker = {
+        "legacy": (legacy_server, legacy_worker),
+        "chunked": (chunked_server, chunked_worker),
+    }[mode]
+
+    baseline = peak_rss_bytes()
+    held, call = asyncio.run(server(path))
+    worker(call)
+    rss = peak_rss_bytes() - baseline
+    if mode == "chunked":
+        held.close()
+    del held, call
+
+    tracemalloc.start()
+    held, call = asyncio.run(server(path))
+    _, server_peak = tracemalloc.get_traced_memory()
+    tracemalloc.reset_peak()
+    worker(call)
+    _, worker_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    if mode == "chunked":
+        held.close()
+
+    return {"server": server_peak, "worker": worker_peak, "rss": max(0, rss)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=float, nargs="+", default=[1, 5, 10, 25])
+    parser.add_argument("--budget-mb", type=float)
+    parser.add_argument("--case", nargs=2, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.case:
+        print(json.dumps(run_case(*args.case)))
+        return
+
+    mib = 1024 * 1024
+    over_budget = False
+    print(
+        f"{'size MiB':>8} {'mode':<8} {'server MiB':>11} {'worker MiB':>11} "
+        f"{'rss MiB':>8}"
+    )
+    for size in args.sizes:
+        with tempfile.NamedTemporaryFile(suffix=".txt", delete=False) as file:
+            file.write(make_text(int(size * mib)))
+        try:
+            for mode in ["legacy", "chunked"]:
+                output = subprocess.check_output(
+                    [sys.executable, __file__, "--case", mode, file.name]
+                )
+                result = json.loads(output)
+                print(
+                    f"{size:>8g} {mode:<8} {result['server'] / mib:>11.1f} "
+                    f"{result['worker'] / mib:>11.1f} {result['rss'] / mib:>8.1f}"
+                )
+                if mode == "chunked" and args.budget_mb is not None:
+                    over_budget |= result["rss"] > args.budget_mb * mib
+        finally:
+            os.unlink(file.name)
+
+    if over_budget:
+        print(f"Chunked ingestion exceeded the {args.budget_mb:g} MiB budget")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,351 @@
+"""Local stand-in for the Anthropic Messages API.
+
+Returns a canned resume, as a forced tool call when the request defines tools
+and as text otherwise, so the backend can be load tested without network
+access or API credits. Timing follows the real API: a time to first token,
+then a fixed latency per output token. It can also reject a share of
+requests with 429 rate_limit_error or 529 overloaded_error (and always once
+more than --capacity messages are in flight), and cut responses short with
+stop_reason "max_tokens", either at random or when the request's max_tokens
+is below the size of the resume. GET /stats returns what was served.
+
+    python benchmarks/fake_anthropic.py --port 8100 --ttft 0.5 --token-latency 0.01
+    ANTHROPIC_BASE_URL=http://127.0.0.1:8100 ANTHROPIC_API_KEY=test python main.py
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import uuid
+from contextlib import contextmanager
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+SAMPLE_RESUME_JSON = {
+    "name": "Jane Doe",
+    "role": "Senior Software Engineer",
+    "email": "jane@example.com",
+    "phone": "555-0100",
+    "address": "Austin, TX",
+    "linkedin": "linkedin.com/in/janedoe",
+    "summary": "Engineer with ten years of experience building web platforms.",
+    "skills": [
+        {"category": "Backend", "skills": "Python, FastAPI, PostgreSQL"},
+        {"category": "Frontend", "skills": "React.js, TypeScript"},
+    ],
+    "experience": [
+        {
+            "company": "Acme Corp",
+            "location": "Austin, TX",
+            "role": "Senior Software Engineer",
+            "period": "2020 - Present",
+            "responsibilities": [
+                "Built a resume parsing service handling thousands of uploads a day."
+            ],
+        }
+    ],
+    "education": [
+        {
+            "institution": "University of Texas",
+            "degree": "BSc",
+            "field": "Computer Science",
+            "yearEnd": "2014",
+        }
+    ],
+}
+
+SAMPLE_RESUME_TEXT = """Jane Doe
+Senior Software Engineer
+
+Austin, TX
+jane@example.com | 555-0100 | linkedin.com/in/janedoe
+
+Summary:
+Engineer with ten years of experience building web platforms.
+
+Skills:
+- Backend: Python, FastAPI, PostgreSQL
+- Frontend: React.js, TypeScript
+
+Experience:
+Acme Corp | Senior Software Engineer | Austin, TX | 2020 - Present
+- Built a resume parsing service handling thousands of uploads a day.
+
+Education:
+University of Texas, BSc in Computer Science, 2014
+"""
+
+SAMPLE_RESPONSE = (
+    SAMPLE_RESUME_TEXT + "\n```json\n" + json.dumps(SAMPLE_RESUME_JSON) + "\n```"
+)
+
+# Size of each streamed text delta, roughly one token
+CHUNK_CHARS = 4
+
+app = FastAPI()
+app.state.ttft = 0.0
+app.state.token_latency = 0.0
+app.state.rate_limit_rate = 0.0
+app.state.overload_rate = 0.0
+app.state.truncate_rate = 0.0
+app.state.capacity = 0
+app.state.retry_after = 1.0
+app.state.experience = 1
+app.state.random = random.Random()
+app.state.in_flight = 0
+app.state.stats = {
+    "messages": 0,
+    "rateLimited": 0,
+    "overloaded": 0,
+    "truncated": 0,
+    "peakInFlight": 0,
+}
+
+
+def resume_json(experience: int) -> dict:
+    """The sample resume with its job repeated, to size the output"""
+    return {
+        **SAMPLE_RESUME_JSON,
+        "experience": SAMPLE_RESUME_JSON["experience"] * experience,
+    }
+
+
+def message_body(model: str, content: list) -> dict:
+    return {
+        "id": f"msg_{uuid.uuid4().hex}",
+        "type": "message",
+        "role": "assistant",
+        "model": model,
+        "content": content,
+        "stop_reason": None,
+        "stop_sequence": None,
+        "usage": {"input_tokens": 1500, "output_tokens": 0},
+    }
+
+
+def stream_event(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps({'type': event, **data})}\n\n"
+
+
+def tool_name(body: dict) -> str | None:
+    tools = body.get("tools") or []
+    return tools[0]["name"] if tools else None
+
+
+def error_response(status: int, error_type: str, message: str) -> JSONResponse:
+    return JSONResponse(
+        {"type": "error", "error": {"type": error_type, "message": message}},
+        status_code=status,
+        headers={"retry-after": str(app.state.retry_after)},
+    )
+
+
+def rejection() -> JSONResponse | None:
+    """A 429 or 529 for this request, or None to serve it"""
+    state = app.state
+    if state.capacity and state.in_flight >= state.capacity:
+        state.stats["overloaded"] += 1
+        return error_response(529, "overloaded_error", "Overloaded")
+    roll = state.random.random()
+    if roll < state.rate_limit_rate:
+        state.stats["rateLimited"] += 1
+        return error_response(
+            429,
+            "rate_limit_error",
+            "Number of request tokens has exceeded your rate limit",
+        )
+    if roll < state.rate_limit_rate + state.overload_rate:
+        state.stats["overloaded"] += 1
+        return error_response(529, "overloaded_error", "Overloaded")
+    return None
+
+
+def output_tokens(payload: str, max_tokens: int | None) -> tuple[int, bool]:
+    """Tokens to send and whether the response stops at max_tokens"""
+    tokens = -(-len(payload) // CHUNK_CHARS)
+    if app.state.random.random() < app.state.truncate_rate:
+        tokens = app.state.random.randint(1, tokens - 1)
+        return tokens, True
+    if max_tokens and max_tokens < tokens:
+        return max_tokens, True
+    return tokens, False
+
+
+def leading_members(data: dict, chars: int) -> dict:
+    """The members of data whose JSON fits within the first chars characters"""
+    members = {}
+    for key, value in data.items():
+        if len(json.dumps({**members, key: value})) > chars:
+            break
+        members[key] = value
+    return members
+
+
+def stop_reason(tool: str | None, truncated: bool) -> str:
+    if truncated:
+        return "max_tokens"
+    return "tool_use" if tool else "end_turn"
+
+
+@contextmanager
+def in_flight():
+    state = app.state
+    state.in_flight += 1
+    state.stats["peakInFlight"] = max(state.stats["peakInFlight"], state.in_flight)
+    try:
+        yield
+    finally:
+        state.in_flight -= 1
+
+
+def plan_output(tool: str | None, max_tokens: int | None):
+    """The full output, its JSON for tool calls, the tokens to send and
+    whether the response stops at max_tokens"""
+    data = resume_json(app.state.experience) if tool else None
+    payload = json.dumps(data) if tool else SAMPLE_RESPONSE
+    tokens, truncated = output_tokens(payload, max_tokens)
+    if truncated:
+        app.state.stats["truncated"] += 1
+    return payload, data, tokens, truncated
+
+
+async def stream_message(model: str, tool: str | None, max_tokens: int | None):
+    with in_flight():
+        payload, _, tokens, truncated = plan_output(tool, max_tokens)
+        chunks = [
+            payload[i : i + CHUNK_CHARS] for i in range(0, len(payload), CHUNK_CHARS)
+        ]
+
+        if tool:
+            block = {"type": "tool_use", "id": "toolu_fake", "name": tool, "input": {}}
+        else:
+            block = {"type": "text", "text": ""}
+
+        await asyncio.sleep(app.state.ttft)
+        yield stream_event("message_start", {"message": message_body(model, [])})
+        yield stream_event("content_block_start", {"index": 0, "content_block": block})
+        for chunk in chunks[:tokens]:
+            await asyncio.sleep(app.state.token_latency)
+            if tool:
+                delta = {"type": "input_json_delta", "partial_json": chunk}
+            else:
+                delta = {"type": "text_delta", "text": chunk}
+            yield stream_event("content_block_delta", {"index": 0, "delta": delta})
+        yield stream_event("content_block_stop", {"index": 0})
+        yield stream_event(
+            "message_delta",
+            {
+                "delta": {
+                    "stop_reason": stop_reason(tool, truncated),
+                    "stop_sequence": None,
+                },
+                "usage": {"output_tokens": tokens},
+            },
+        )
+        yield stream_event("message_stop", {})
+
+
+async def complete_message(model: str, tool: str | None, max_tokens: int | None):
+    with in_flight():
+        payload, data, tokens, truncated = plan_output(tool, max_tokens)
+        await asyncio.sleep(app.state.ttft + tokens * app.state.token_latency)
+
+    if tool:
+        block = {
+            "type": "tool_use",
+            "id": "toolu_fake",
+            "name": tool,
+            "input": leading_members(data, tokens * CHUNK_CHARS) if truncated else data,
+        }
+    else:
+        block = {"type": "text", "text": payload[: tokens * CHUNK_CHARS]}
+    message = message_body(model, [block])
+    message["stop_reason"] = stop_reason(tool, truncated)
+    message["usage"]["output_tokens"] = tokens
+    return message
+
+
+@app.post("/v1/messages")
+async def create_message(request: Request):
+    body = await request.json()
+    model = body.get("model", "")
+    tool = tool_name(body)
+    max_tokens = body.get("max_tokens")
+
+    app.state.stats["messages"] += 1
+    rejected = rejection()
+    if rejected is not None:
+        return rejected
+
+    if body.get("stream"):
+        return StreamingResponse(
+            stream_message(model, tool, max_tokens), media_type="text/event-stream"
+        )
+    return await complete_message(model, tool, max_tokens)
+
+
+@app.get("/stats")
+async def stats():
+    return {**app.state.stats, "inFlight": app.state.in_flight}
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument(
+        "--ttft", type=float, default=0.5, help="Seconds before the first token"
+    )
+    parser.add_argument(
+        "--token-latency", type=float, default=0.01, help="Seconds per output token"
+    )
+    parser.add_argument(
+        "--rate-limit-rate",
+        type=float,
+        default=0.0,
+        help="Share of messages rejected with 429 rate_limit_error",
+    )
+    parser.add_argument(
+        "--overload-rate",
+        type=float,
+        default=0.0,
+        help="Share of messages rejected with 529 overloaded_error",
+    )
+    parser.add_argument(
+        "--capacity",
+        type=int,
+        default=0,
+        help="Messages in flight beyond which every request gets a 529 (0: no limit)",
+    )
+    parser.add_argument(
+        "--retry-after", type=float, default=1.0, help="retry-after header on errors"
+    )
+    parser.add_argument(
+        "--truncate-rate",
+        type=float,
+        default=0.0,
+        help='Share of messages cut short with stop_reason "max_tokens"',
+    )
+    parser.add_argument(
+        "--experience",
+        type=int,
+        default=1,
+        help="Jobs in the returned resume, to size the output",
+    )
+    parser.add_argument("--seed", type=int, help="Seed for the random failures")
+    args = parser.parse_args()
+
+    app.state.ttft = args.ttft
+    app.state.token_latency = args.token_latency
+    app.state.rate_limit_rate = args.rate_limit_rate
+    app.state.overload_rate = args.overload_rate
+    app.state.capacity = args.capacity
+    app.state.retry_after = args.retry_after
+    app.state.truncate_rate = args.truncate_rate
+    app.state.experience = args.experience
+    app.state.random = random.Random(args.seed)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
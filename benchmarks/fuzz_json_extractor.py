@@ -0,0 +1,123 @@
+"""Fuzz the JSON extractor against the corpus of model outputs.
+
+Every file in benchmarks/fixtures/llm_outputs is parsed whole, in random
+chunks and after random truncation and corruption. Randomly generated objects
+whose strings are full of braces, quotes and escapes are wrapped in prose and
+must come back exactly as json.loads reads them.
+
+    python benchmarks/fuzz_json_extractor.py --iterations 2000 --seed 1
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from json_extractor import ObjectMemberStream, extract_json  # noqa: E402
+
+CORPUS = os.path.join(os.path.dirname(__file__), "fixtures", "llm_outputs")
+
+NASTY_CHARACTERS = '{}[]",:\\\n\t abé☃'
+
+
+def random_string(rng: random.Random) -> str:
+    return "".join(rng.choice(NASTY_CHARACTERS) for _ in range(rng.randint(0, 12)))
+
+
+def random_value(rng: random.Random, depth: int = 0):
+    kind = rng.randint(0, 6 if depth < 3 else 3)
+    if kind == 0:
+        return random_string(rng)
+    if kind == 1:
+        return rng.randint(-1000, 1000)
+    if kind == 2:
+        return rng.choice([True, False, None, 1.5])
+    if kind == 3:
+        return random_string(rng)
+    if kind in (4, 5):
+        return [random_value(rng, depth + 1) for _ in range(rng.randint(0, 4))]
+    return random_object(rng, depth + 1)
+
+
+def random_object(rng: random.Random, depth: int = 0) -> dict:
+    return {
+        random_string(rng): random_value(rng, depth)
+        for _ in range(rng.randint(1 if depth == 0 else 0, 5))
+    }
+
+
+def random_prose(rng: random.Random) -> str:
+    # Quotes are left out: an unbalanced brace followed by a quote in the prose
+    # genuinely reads as the start of a JSON string
+    return random_string(rng).replace('"', "'")
+
+
+def random_chunks(rng: random.Random, text: str):
+    position = 0
+    while position < len(text):
+        size = rng.randint(1, 16)
+        yield text[position : position + size]
+        position += size
+
+
+def stream_members(rng: random.Random, text: str) -> dict:
+    stream = ObjectMemberStream()
+    for chunk in random_chunks(rng, text):
+        stream.feed(chunk)
+    return stream.members
+
+
+def corrupt(rng: random.Random, text: str) -> str:
+    if rng.random() < 0.5:
+        return text[: rng.randint(0, len(text))]
+    characters = list(text)
+    for _ in range(rng.randint(1, 5)):
+        characters.insert(rng.randint(0, len(characters)), rng.choice('{}[]"\\'))
+    return "".join(characters)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+
+    corpus = {}
+    for name in sorted(os.listdir(CORPUS)):
+        with open(os.path.join(CORPUS, name), encoding="utf-8") as file:
+            corpus[name] = file.read()
+
+    failures = 0
+    for name, text in corpus.items():
+        prose, data = extract_json(text)
+        print(f"{name:28} {len(data):3} fields, {len(prose):6} chars of prose")
+        # Corrupted input only has to be survived, not parsed
+        for _ in range(args.iterations // len(corpus)):
+            extract_json(corrupt(rng, text))
+            stream_members(rng, corrupt(rng, text))
+
+    for iteration in range(args.iterations):
+        expected = random_object(rng)
+        encoded = json.dumps(expected, indent=rng.choice([None, 2]))
+        text = f"{random_prose(rng)}\n```json\n{encoded}\n```\n{random_prose(rng)}"
+
+        prose, data = extract_json(text)
+        if data != json.loads(encoded):
+            failures += 1
+            print(f"extract_json mismatch at iteration {iteration}: {text!r}")
+
+        members = stream_members(rng, encoded)
+        if members != json.loads(encoded):
+            failures += 1
+            print(f"ObjectMemberStream mismatch at iteration {iteration}: {encoded!r}")
+
+    print(f"{args.iterations} generated objects, {failures} failures")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,383 @@
+"""Load test for /api/rebuild-resume against the fake Anthropic server.
+
+Each concurrency level is a closed loop: that many clients send requests back
+to back for --duration seconds. Every level reports p50/p95/p99 latency of
+the successful requests, throughput, and the error rate broken down by
+outcome: HTTP errors, error bodies, client timeouts, and resumes missing
+sections because the model output stopped at max_tokens. It also reports
+the 429/529 responses and truncations the fake server produced meanwhile,
+which the Anthropic SDK retries behind the backend.
+
+With --workers the harness starts the fake Anthropic server and then the
+backend under uvicorn once per worker count, so results can be compared
+across worker counts. Without it, it loads the backend already running at
+--url. Results are written as JSON with --output; --compare prints the change
+against an earlier result file, for comparing versions.
+
+    python benchmarks/load_rebuild.py --workers 1 4 --levels 1 8 32 --output before.json
+    python benchmarks/load_rebuild.py --workers 1 4 --levels 1 8 32 --compare before.json
+    python benchmarks/load_rebuild.py --workers 2 --ttft 1 --overload-rate 0.1 --truncate-rate 0.05
+    python benchmarks/load_rebuild.py --url http://127.0.0.1:8000 --levels 8 64
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+import httpx
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from fake_anthropic import SAMPLE_RESUME_TEXT  # noqa: E402
+
+ROOT = os.path.join(os.path.dirname(__file__), "..")
+
+JOB_DESCRIPTION = (
+    "We are hiring a Senior Software Engineer with Python, FastAPI and React "
+    "experience to build our hiring platform."
+)
+COMPANIES = [{"name": "Acme Corp", "background": "HR technology", "size": "SME"}]
+
+# Fake server options passed through when the harness starts it
+FAKE_OPTIONS = [
+    ("ttft", float, 0.5, "Seconds before the first token"),
+    ("token-latency", float, 0.01, "Seconds per output token"),
+    ("rate-limit-rate", float, 0.0, "Share of messages rejected with 429"),
+    ("overload-rate", float, 0.0, "Share of messages rejected with 529"),
+    ("capacity", int, 0, "Messages in flight beyond which every request gets a 529"),
+    ("retry-after", float, 1.0, "retry-after header on 429 and 529"),
+    ("truncate-rate", float, 0.0, 'Share of messages stopped at "max_tokens"'),
+    ("experience", int, 1, "Jobs in the generated resume, to size the output"),
+]
+
+
+def current_commit() -> str | None:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=ROOT,
+            stderr=subprocess.DEVNULL,
+            text=True,
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def outcome(response: httpx.Response) -> str:
+    """Classify one response as ok or by the kind of error"""
+    if response.status_code != 200:
+        return f"http_{response.status_code}"
+    body = response.json()
+    if not isinstance(body, dict) or "resumeContent" not in body:
+        # Failed generations come back as a 200 with an error message
+        return "error_body"
+    resume_json = body.get("resumeJson") or {}
+    if not resume_json.get("experience") or not resume_json.get("education"):
+        return "incomplete"
+    return "ok"
+
+
+async def rebuild_once(client: httpx.AsyncClient, url: str, cached: bool) -> str:
+    try:
+        response = await client.post(
+            f"{url}/api/rebuild-resume",
+            data={
+                "job_description": JOB_DESCRIPTION,
+                "companies": json.dumps(COMPANIES),
+            },
+            files={"old_resume": ("resume.txt", SAMPLE_RESUME_TEXT.encode())},
+            headers={} if cached else {"Cache-Control": "no-cache"},
+        )
+    except httpx.TimeoutException:
+        return "timeout"
+    except httpx.HTTPError as e:
+        return type(e).__name__
+    return outcome(response)
+
+
+def percentile(values: list[float], share: float) -> float | None:
+    if not values:
+        return None
+    return values[min(len(values) - 1, int(share * len(values)))]
+
+
+async def fake_stats(client: httpx.AsyncClient, fake_url: str | None) -> Counter:
+    if not fake_url:
+        return Counter()
+    response = await client.get(f"{fake_url}/stats")
+    return Counter(response.json())
+
+
+async def run_level(
+    url: str,
+    concurrency: int,
+    duration: float,
+    timeout: float,
+    cached: bool,
+    fake_url: str | None,
+) -> dict:
+    latencies = []
+    outcomes = Counter()
+    limits = httpx.Limits(max_connections=concurrency)
+
+    async with httpx.AsyncClient(timeout=timeout, limits=limits) as client:
+        before = await fake_stats(client, fake_url)
+        start = time.perf_counter()
+        deadline = start + duration
+
+        async def user():
+            while time.perf_counter() < deadline:
+                sent = time.perf_counter()
+                result = await rebuild_once(client, url, cached)
+                outcomes[result] += 1
+                if result == "ok":
+                    latencies.append(time.perf_counter() - sent)
+
+        await asyncio.gather(*(user() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+        after = await fake_stats(client, fake_url)
+
+    latencies.sort()
+    total = sum(outcomes.values())
+    served = after - before
+    return {
+        "concurrency": concurrency,
+        "requests": total,
+        "succeeded": outcomes["ok"],
+        "seconds": round(elapsed, 3),
+        "throughputRps": round(outcomes["ok"] / elapsed, 2),
+        "errorRate": round(1 - outcomes["ok"] / total, 4) if total else None,
+        "p50Ms": ms(percentile(latencies, 0.50)),
+        "p95Ms": ms(percentile(latencies, 0.95)),
+        "p99Ms": ms(percentile(latencies, 0.99)),
+        "maxMs": ms(latencies[-1] if latencies else None),
+        "outcomes": dict(outcomes),
+        "upstream": {
+            key: served[key]
+            for key in ("messages", "rateLimited", "overloaded", "truncated")
+        },
+    }
+
+
+def ms(seconds: float | None) -> float | None:
+    return None if seconds is None else round(seconds * 1000, 1)
+
+
+def wait_until_up(url: str, process: subprocess.Popen, timeout: float = 60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"{url} exited with code {process.returncode}")
+        try:
+            httpx.get(url, timeout=1)
+            return
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    raise RuntimeError(f"{url} didn't come up within {timeout:.0f}s")
+
+
+@contextmanager
+def running(args: list[str], url: str, env: dict | None = None):
+    # Keep the per-request logging of the servers out of the report
+    process = subprocess.Popen(args, cwd=ROOT, env=env, stdout=subprocess.DEVNULL)
+    try:
+        wait_until_up(url, process)
+        yield
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=15)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+def fake_server(args) -> list[str]:
+    command = [
+        sys.executable,
+        os.path.join(ROOT, "benchmarks", "fake_anthropic.py"),
+        "--port",
+        str(args.fake_port),
+    ]
+    for name, _, _, _ in FAKE_OPTIONS:
+        command += [f"--{name}", str(getattr(args, name.replace("-", "_")))]
+    if args.seed is not None:
+        command += ["--seed", str(args.seed)]
+    return command
+
+
+def backend(workers: int, port: int) -> list[str]:
+    return [
+        sys.executable,
+        "-m",
+        "uvicorn",
+        "main:app",
+        "--host",
+        "127.0.0.1",
+        "--port",
+        str(port),
+        "--workers",
+        str(workers),
+        "--log-level",
+        "warning",
+    ]
+
+
+def backend_env(fake_url: str, scratch: str, workers: int) -> dict:
+    # A fresh job database per run, and no shared result cache to warm up
+    env = {**os.environ, "ANTHROPIC_BASE_URL": fake_url, "ANTHROPIC_API_KEY": "test"}
+    env["JOB_DB"] = os.path.join(scratch, f"jobs-{workers}.db")
+    env.pop("RESULT_CACHE_DB", None)
+    env.pop("TEXT_CACHE_DB", None)
+    return env
+
+
+async def run_levels(args, url: str, fake_url: str | None, workers) -> list[dict]:
+    results = []
+    for level in args.levels:
+        result = await run_level(
+            url, level, args.duration, args.timeout, args.cached, fake_url
+        )
+        result = {"workers": workers, **result}
+        results.append(result)
+        print_result(result)
+    return results
+
+
+def print_header():
+    print(
+        f"{'workers':>7} {'conc':>5} {'reqs':>6} {'rps':>8} {'p50 ms':>9} "
+        f"{'p95 ms':>9} {'p99 ms':>9} {'errors':>7}  upstream 429/529/trunc"
+    )
+
+
+def print_result(result: dict):
+    upstream = result["upstream"]
+    error_rate = result["errorRate"] or 0
+    print(
+        f"{result['workers'] or '-':>7} {result['concurrency']:5} "
+        f"{result['requests']:6} {result['throughputRps']:8.2f} "
+        f"{result['p50Ms'] or 0:9.1f} {result['p95Ms'] or 0:9.1f} "
+        f"{result['p99Ms'] or 0:9.1f} {error_rate:7.1%}  "
+        f"{upstream.get('rateLimited', 0)}/{upstream.get('overloaded', 0)}/"
+        f"{upstream.get('truncated', 0)}"
+    )
+    failures = {k: v for k, v in result["outcomes"].items() if k != "ok"}
+    if failures:
+        print(f"{'':14}{failures}")
+
+
+def compare(results: list[dict], baseline: dict):
+    before = {
+        (result["workers"], result["concurrency"]): result
+        for result in baseline["results"]
+    }
+    print(f"\nCompared with {baseline['meta'].get('commit') or 'baseline'}")
+    for result in results:
+        old = before.get((result["workers"], result["concurrency"]))
+        if old is None:
+            continue
+        changes = []
+        for key in ("throughputRps", "p50Ms", "p95Ms", "p99Ms"):
+            if old[key] and result[key] is not None:
+                changes.append(f"{key} {(result[key] / old[key] - 1) * 100:+.1f}%")
+        changes.append(
+            f"errorRate {old['errorRate'] or 0:.1%} -> {result['errorRate'] or 0:.1%}"
+        )
+        print(
+            f"workers {result['workers'] or '-':>3} concurrency "
+            f"{result['concurrency']:4}: {', '.join(changes)}"
+        )
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--url",
+        default="http://127.0.0.1:8000",
+        help="Backend to load when the harness doesn't start one",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        nargs="+",
+        help="Start the fake server and the backend with each of these worker counts",
+    )
+    parser.add_argument("--levels", type=int, nargs="+", default=[1, 8, 32, 64])
+    parser.add_argument(
+        "--duration", type=float, default=20, help="Seconds of load per level"
+    )
+    parser.add_argument(
+        "--timeout", type=float, default=300, help="Client timeout per request"
+    )
+    parser.add_argument(
+        "--cached",
+        action="store_true",
+        help="Let the result cache answer repeated requests",
+    )
+    parser.add_argument("--output", help="Write the results to this JSON file")
+    parser.add_argument("--compare", help="A results file to compare against")
+    parser.add_argument("--port", type=int, default=8001, help="Port for the backend")
+    parser.add_argument(
+        "--fake-port", type=int, default=8101, help="Port for the fake server"
+    )
+    fake = parser.add_argument_group("fake Anthropic server, with --workers")
+    for name, kind, default, help_text in FAKE_OPTIONS:
+        fake.add_argument(f"--{name}", type=kind, default=default, help=help_text)
+    fake.add_argument("--seed", type=int, help="Seed for the random failures")
+    args = parser.parse_args()
+
+    print_header()
+    results = []
+    if args.workers:
+        fake_url = f"http://127.0.0.1:{args.fake_port}"
+        url = f"http://127.0.0.1:{args.port}"
+        with (
+            tempfile.TemporaryDirectory() as scratch,
+            running(fake_server(args), f"{fake_url}/stats"),
+        ):
+            for workers in args.workers:
+                env = backend_env(fake_url, scratch, workers)
+                with running(backend(workers, args.port), f"{url}/api/stats", env):
+                    results += await run_levels(args, url, fake_url, workers)
+    else:
+        results = await run_levels(args, args.url, None, None)
+
+    report = {
+        "meta": {
+            "commit": current_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "timestamp": time.time(),
+            "duration": args.duration,
+            "cached": args.cached,
+            "fake": (
+                {
+                    name: getattr(args, name.replace("-", "_"))
+                    for name, _, _, _ in FAKE_OPTIONS
+                }
+                if args.workers
+                else None
+            ),
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+
+    if args.compare:
+        with open(args.compare) as file:
+            compare(results, json.load(file))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
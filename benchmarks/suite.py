@@ -0,0 +1,353 @@
+"""Micro-benchmark suite for the text-processing hot paths.
+
+Times job description compaction, JSON extraction (whole and streamed),
+plain-text resume parsing, template formatting, resume text extraction
+from PDF and DOCX, response parsing, rendering and the metrics
+instrumentation. Every input is synthetic and comes in several sizes: short
+and long resumes, 1-50 page documents, long job descriptions and malformed
+model outputs. Anthropic and Adobe are replaced by in-process stand-ins, so
+the suite runs offline.
+
+Results are written as JSON. Pass an earlier result file with --compare to
+see the change of each benchmark between commits; the exit code is 1 when
+any benchmark got slower by more than --threshold percent. A benchmark that
+raises is skipped and listed under "skipped" instead of ending the run.
+
+    python benchmarks/suite.py --output before.json
+    python benchmarks/suite.py --output after.json --compare before.json
+    python benchmarks/suite.py --quick --filter json
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from bench_compaction import RESUME, make_job_description  # noqa: E402
+from bench_extraction import make_docx, make_pdf  # noqa: E402
+from bench_json_extractor import CORPUS, pathological_inputs  # noqa: E402
+from bench_resume_model import synthetic_resume  # noqa: E402
+from fake_anthropic import CHUNK_CHARS  # noqa: E402
+from compaction import compact_job_description  # noqa: E402
+from docx_merge import merge_template  # noqa: E402
+from extraction import extract_docx_text, extract_pdf_text  # noqa: E402
+from json_extractor import ObjectMemberStream, extract_json  # noqa: E402
+from metrics import Registry  # noqa: E402
+from resume_format import RESUME_TOOL_NAME, render_resume_text  # noqa: E402
+from resume_model import Resume  # noqa: E402
+from template_data import build_resume_data, parse_text_content  # noqa: E402
+
+ROOT = os.path.join(os.path.dirname(__file__), "..")
+
+# Resume sizes by number of jobs
+RESUME_SIZES = {"short": 2, "long": 20}
+
+
+class FakeSdkError(Exception):
+    pass
+
+
+class FakeAdobeClient:
+    """Stand-in for RenderClient that merges locally instead of calling Adobe"""
+
+    def __init__(self):
+        self.locations = itertools.count()
+        self.jobs = {}
+
+    def template_asset(self, template_path):
+        return "digest", template_path, False
+
+    def invalidate(self, digest):
+        pass
+
+    def submit(self, asset, resume_data, output_format):
+        location = next(self.locations)
+        self.jobs[location] = (asset, resume_data)
+        return location
+
+    def is_done(self, location):
+        return True
+
+    def download(self, location):
+        return merge_template(*self.jobs.pop(location))
+
+
+def fake_message(resume_json: dict):
+    """A Messages API response holding the resume as a forced tool call"""
+    block = SimpleNamespace(type="tool_use", name=RESUME_TOOL_NAME, input=resume_json)
+    return SimpleNamespace(content=[block])
+
+
+def stream_chunks(resume_json: dict) -> list[str]:
+    # Tool input arrives in small partial_json deltas, as from the fake server
+    text = json.dumps(resume_json)
+    return [text[i : i + CHUNK_CHARS] for i in range(0, len(text), CHUNK_CHARS)]
+
+
+def feed_all(chunks: list[str]) -> dict:
+    members = ObjectMemberStream()
+    for chunk in chunks:
+        members.feed(chunk)
+    return members.members
+
+
+def malformed_outputs(sizes: list[int]) -> dict:
+    outputs = {}
+    for name in sorted(os.listdir(CORPUS)):
+        with open(os.path.join(CORPUS, name), encoding="utf-8") as file:
+            outputs[os.path.splitext(name)[0]] = file.read()
+    for size in sizes:
+        for name, text in pathological_inputs(size).items():
+            outputs[f"{name.replace(' ', '_')}_{size}"] = text
+    return outputs
+
+
+def cases(quick: bool):
+    """Yield (group, name, size, func) for every benchmark"""
+    job_sizes = [10, 100] if quick else [10, 100, 500]
+    page_counts = [1, 10] if quick else [1, 10, 50]
+    pathological_sizes = [1000] if quick else [1000, 16000]
+
+    for size in job_sizes:
+        text = make_job_description(size)
+        yield "compaction", "compact_job_description", f"{size}KiB", (
+            lambda text=text: compact_job_description(text, 2000, reference=RESUME)
+        )
+
+    for name, text in malformed_outputs(pathological_sizes).items():
+        yield "json", "extract_json", name, lambda text=text: extract_json(text)
+
+    for size, jobs in RESUME_SIZES.items():
+        resume_json = Resume.from_json(synthetic_resume(jobs)).to_json()
+        resume = Resume.from_json(resume_json)
+        resume_text = render_resume_text(resume_json)
+        chunks = stream_chunks(resume_json)
+        message = fake_message(resume_json)
+
+        yield "json", "stream_tool_input", size, lambda chunks=chunks: feed_all(chunks)
+        yield "parse", "parse_message", size, lambda message=message: parse_message(
+            message
+        )
+        yield "parse", "parse_text_content", size, (
+            lambda resume_text=resume_text: parse_text_content(resume_text)
+        )
+        yield "format", "resume_from_json", size, (
+            lambda resume_json=resume_json: Resume.from_json(resume_json)
+        )
+        for sections in (False, True):
+            layout = "sections" if sections else "html"
+            yield "format", f"build_resume_data_{layout}", size, (
+                lambda resume=resume, sections=sections: build_resume_data(
+                    resume, sections
+                )
+            )
+
+    for pages in page_counts:
+        pdf = make_pdf(pages)
+        docx = make_docx(pages)
+        yield "extraction", "extract_pdf_text", f"{pages}p", (
+            lambda pdf=pdf: extract_pdf_text(pdf)
+        )
+        yield "extraction", "extract_docx_text", f"{pages}p", (
+            lambda docx=docx: extract_docx_text(docx)
+        )
+
+    # Instrumentation cost per request, against the stages it measures
+    registry = Registry()
+    histogram = registry.histogram("seconds", "", ["stage"])
+    gauge = registry.gauge("in_flight", "", ["stage"])
+    yield "metrics", "observe", "1", lambda: histogram.labels("stage").observe(0.1)
+    yield "metrics", "stage_timer", "1", lambda: timed(histogram, gauge)
+    for series in (10, 1000):
+        for index in range(series):
+            histogram.labels(f"stage{index}").observe(index / series)
+        yield "metrics", "render", f"{series}series", registry.render
+
+    for template in ("resumeTemplate.docx", "resumeTemplate1.docx"):
+        template_path = os.path.join(ROOT, template)
+        for size, jobs in RESUME_SIZES.items():
+            resume_data = build_resume_data(
+                synthetic_resume(jobs), template == "resumeTemplate1.docx"
+            )
+            yield "render", f"merge_template_{template}", size, (
+                lambda template_path=template_path, resume_data=resume_data: (
+                    merge_template(template_path, resume_data)
+                )
+            )
+            yield "render", f"render_pool_{template}", size, (
+                lambda template_path=template_path, resume_data=resume_data: (
+                    render_uncached(template_path, resume_data)
+                )
+            )
+
+
+def timed(histogram, gauge):
+    with histogram.labels("stage").time(gauge.labels("stage")):
+        pass
+
+
+def parse_message(message):
+    # Imported lazily: main pulls in FastAPI and the Anthropic SDK
+    from main import parse_message
+
+    return parse_message(message)
+
+
+_render_pool = None
+_render_counter = itertools.count()
+
+
+def render_uncached(template_path: str, resume_data: dict) -> bytes:
+    """One render through RenderPool and the fake Adobe client, missing the cache"""
+    global _render_pool
+    import render_client
+
+    if _render_pool is None:
+        # Stands in for adobe_client, which needs the Adobe SDK installed
+        client = FakeAdobeClient()
+        sys.modules["adobe_client"] = SimpleNamespace(
+            get_render_client=lambda: client,
+            ServiceApiException=FakeSdkError,
+            ServiceUsageException=FakeSdkError,
+            SdkException=FakeSdkError,
+        )
+        _render_pool = render_client.RenderPool(poll_initial=0)
+    # A unique key makes every call a cache miss
+    resume_data = {**resume_data, "run": next(_render_counter)}
+    return asyncio.run(_render_pool.render(template_path, resume_data, "docx"))
+
+
+def measure(func, budget: float, max_runs: int = 1000) -> dict:
+    """Time func until the budget runs out, after one warm-up call"""
+    func()
+    timings = []
+    deadline = time.perf_counter() + budget
+    while not timings or (time.perf_counter() < deadline and len(timings) < max_runs):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    return {
+        "runs": len(timings),
+        "medianUs": round(statistics.median(timings) * 1e6, 2),
+        "p95Us": round(timings[int(0.95 * (len(timings) - 1))] * 1e6, 2),
+        "minUs": round(timings[0] * 1e6, 2),
+    }
+
+
+def current_commit() -> str | None:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=ROOT,
+            stderr=subprocess.DEVNULL,
+            text=True,
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results: list[dict], baseline: dict, threshold: float) -> int:
+    """Print the change against a baseline, returning the number of regressions"""
+    before = {
+        (result["name"], result["size"]): result for result in baseline["results"]
+    }
+    print(
+        f"\nCompared with {baseline['meta'].get('commit') or 'baseline'} "
+        f"(threshold {threshold:.0f}%)"
+    )
+    regressions = 0
+    for result in results:
+        old = before.get((result["name"], result["size"]))
+        if old is None:
+            continue
+        change = (result["medianUs"] / old["medianUs"] - 1) * 100
+        flag = ""
+        if change > threshold:
+            flag = "  REGRESSION"
+            regressions += 1
+        elif change < -threshold:
+            flag = "  faster"
+        print(
+            f"{result['name']:42} {result['size']:28} "
+            f"{old['medianUs']:12.1f} -> {result['medianUs']:12.1f} {change:+7.1f}%{flag}"
+        )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--output", help="Write the results to this JSON file")
+    parser.add_argument("--compare", help="A results file to compare against")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=10,
+        help="Percent slowdown of the median that counts as a regression",
+    )
+    parser.add_argument(
+        "--budget", type=float, default=0.5, help="Seconds spent on each benchmark"
+    )
+    parser.add_argument("--filter", help="Only run benchmarks whose name contains this")
+    parser.add_argument(
+        "--quick", action="store_true", help="Smaller corpora and a 0.1s budget"
+    )
+    args = parser.parse_args()
+    budget = 0.1 if args.quick else args.budget
+
+    results = []
+    skipped = []
+    print(f"{'benchmark':42} {'size':28} {'median us':>12} {'p95 us':>12} {'runs':>6}")
+    for group, name, size, func in cases(args.quick):
+        if args.filter and args.filter not in f"{group}.{name}":
+            continue
+        try:
+            timings = measure(func, budget)
+        except Exception as e:
+            # One broken benchmark shouldn't cost the results of the others
+            skipped.append({"name": name, "size": size, "error": repr(e)})
+            print(f"{name:42} {size:28} skipped: {e!r}", file=sys.stderr)
+            continue
+        result = {"group": group, "name": name, "size": size, **timings}
+        results.append(result)
+        print(
+            f"{name:42} {size:28} {result['medianUs']:12.1f} "
+            f"{result['p95Us']:12.1f} {result['runs']:6}"
+        )
+
+    report = {
+        "meta": {
+            "commit": current_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "timestamp": time.time(),
+            "budget": budget,
+            "quick": args.quick,
+        },
+        "results": results,
+        "skipped": skipped,
+    }
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)
+        if compare(results, baseline, args.threshold):
+            sys.exit(1)
+    if skipped:
+        print(f"\n{len(skipped)} benchmarks skipped", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""Summarize the spans written with TRACE_EXPORTER=file.
+
+Prints duration percentiles for every span name, then looks at the slowest
+traces (at or above the --tail percentile of end-to-end duration) and shows
+which hops their time went to. Time is counted as self time, a span's
+duration minus that of its children, so nested spans aren't counted twice.
+
+    TRACE_EXPORTER=file TRACE_FILE=traces.jsonl python main.py
+    python benchmarks/trace_report.py traces.jsonl --tail 95
+"""
+
+import argparse
+import json
+from collections import defaultdict
+
+
+def percentile(values: list[float], share: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(share * len(values)))]
+
+
+def load_traces(path: str) -> dict[str, list[dict]]:
+    traces = defaultdict(list)
+    with open(path, encoding="utf-8") as file:
+        for line in file:
+            if line.strip():
+                span = json.loads(line)
+                traces[span["traceId"]].append(span)
+    return traces
+
+
+def root_span(spans: list[dict]) -> dict:
+    # The outermost span, whose parent (if any) wasn't recorded
+    ids = {span["spanId"] for span in spans}
+    roots = [span for span in spans if span["parentId"] not in ids]
+    return max(roots, key=lambda span: span["durationMs"])
+
+
+def self_times(spans: list[dict]) -> dict[str, float]:
+    """Milliseconds spent in each span name outside its child spans"""
+    children = defaultdict(float)
+    for span in spans:
+        if span["parentId"]:
+            children[span["parentId"]] += span["durationMs"]
+    totals = defaultdict(float)
+    for span in spans:
+        label = f"{span['service']}: {span['name']}"
+        # Children running concurrently can add up to more than the parent
+        totals[label] += max(0.0, span["durationMs"] - children[span["spanId"]])
+    return totals
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("path", nargs="?", default="traces.jsonl")
+    parser.add_argument(
+        "--tail", type=float, default=95, help="Percentile where the tail starts"
+    )
+    args = parser.parse_args()
+
+    traces = load_traces(args.path)
+    durations = defaultdict(list)
+    for spans in traces.values():
+        for span in spans:
+            durations[f"{span['service']}: {span['name']}"].append(span["durationMs"])
+
+    print(f"{'span':52} {'count':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for label, values in sorted(durations.items()):
+        print(
+            f"{label:52} {len(values):6} {percentile(values, 0.5):9.1f} "
+            f"{percentile(values, 0.95):9.1f} {percentile(values, 0.99):9.1f}"
+        )
+
+    roots = {trace_id: root_span(spans) for trace_id, spans in traces.items()}
+    threshold = percentile(
+        [root["durationMs"] for root in roots.values()], args.tail / 100
+    )
+    tail = [
+        trace_id for trace_id, root in roots.items() if root["durationMs"] >= threshold
+    ]
+    totals = defaultdict(float)
+    for trace_id in tail:
+        for label, milliseconds in self_times(traces[trace_id]).items():
+            totals[label] += milliseconds
+    overall = sum(totals.values()) or 1
+
+    print(
+        f"\n{len(tail)} of {len(roots)} traces at or above p{args.tail:g} "
+        f"({threshold:.1f} ms), self time by hop:"
+    )
+    for label, milliseconds in sorted(totals.items(), key=lambda item: -item[1]):
+        print(
+            f"{label:52} {milliseconds / len(tail):9.1f} ms "
+            f"{milliseconds / overall:6.1%}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,304 @@
+"""Rebuild every resume in a directory for every job in a file, offline.
+
+Runs the same pipeline as /api/rebuild-resume in-process: each resume is
+extracted once, then tailored to each job with at most --concurrency
+generations in flight. Results are appended to the output JSONL as they
+finish, one line per resume/job pair.
+
+The output doubles as the checkpoint. Pairs already written with status
+"ok" are skipped when the command runs again, so an interrupted run picks
+up where it stopped, and failed pairs are retried. Pairs are identified by
+the resume's SHA-256 and the job's id, so renaming a resume doesn't redo
+it but editing one does.
+
+Jobs are JSONL objects or CSV rows with a job_description, an optional id
+(the row number otherwise) and the companies as a JSON list of
+{"name", "background", "size"} objects, or, in CSV, the company_name,
+company_background and company_size columns of a single company.
+
+    python bulk_rebuild.py resumes/ jobs.csv results.jsonl --concurrency 8
+    python bulk_rebuild.py resumes/ jobs.jsonl results.jsonl --render pdf docx
+
+Configuration comes from the same environment variables as the server; set
+RESULT_CACHE_DB to keep generated resumes across runs.
+"""
+
+import argparse
+import asyncio
+import csv
+import hashlib
+import json
+import os
+import re
+import sys
+import time
+
+from fastapi import HTTPException
+
+# The bulk run has no use for the server's job queue: no workers polling it,
+# and an in-memory database instead of a jobs.db in the working directory
+os.environ["JOB_WORKERS"] = "0"
+os.environ["JOB_DB"] = ":memory:"
+
+from main import (  # noqa: E402
+    BATCH_CONCURRENCY,
+    MAX_UPLOAD_MB,
+    RENDER_FORMATS,
+    app,
+    extract_resume,
+    generate_resume,
+)
+from template_registry import DEFAULT_TEMPLATE  # noqa: E402
+from uploads import Upload  # noqa: E402
+
+RESUME_EXTENSIONS = (".pdf", ".docx", ".doc", ".txt")
+
+
+def load_jobs(path: str) -> list[dict]:
+    """Read the jobs, each with an id, job_description and companies"""
+    with open(path, encoding="utf-8", newline="") as file:
+        if path.lower().endswith(".csv"):
+            rows = list(csv.DictReader(file))
+        else:
+            rows = [json.loads(line) for line in file if line.strip()]
+
+    jobs = []
+    ids = set()
+    for number, row in enumerate(rows, start=1):
+        job_id = str(row.get("id") or number)
+        if job_id in ids:
+            raise ValueError(f"Duplicate job id {job_id} in {path}")
+        ids.add(job_id)
+
+        companies = row.get("companies") or []
+        if isinstance(companies, str):
+            companies = json.loads(companies)
+        if not companies and row.get("company_name"):
+            companies = [
+                {
+                    "name": row["company_name"],
+                    "background": row.get("company_background", ""),
+                    "size": row.get("company_size", ""),
+                }
+            ]
+        jobs.append(
+            {
+                "id": job_id,
+                "job_description": row.get("job_description") or "",
+                "companies": companies,
+            }
+        )
+    return jobs
+
+
+def resume_upload(path: str, chunk_bytes: int = 64 * 1024) -> Upload:
+    # Hashed in chunks like an upload; the extraction workers read the file
+    # from its path. Never closed, closing would delete the user's file.
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        while chunk := file.read(chunk_bytes):
+            digest.update(chunk)
+    return Upload(
+        os.path.basename(path), os.path.getsize(path), digest.hexdigest(), None, path
+    )
+
+
+def load_resumes(directory: str) -> list[Upload]:
+    uploads = []
+    for name in sorted(os.listdir(directory)):
+        path = os.path.join(directory, name)
+        if name.lower().endswith(RESUME_EXTENSIONS) and os.path.isfile(path):
+            uploads.append(resume_upload(path))
+    return uploads
+
+
+def completed_pairs(output_path: str) -> set[tuple[str, str]]:
+    """The resume hash and job id of every pair the output already holds"""
+    done = set()
+    if not os.path.exists(output_path):
+        return done
+    with open(output_path, encoding="utf-8") as file:
+        for line in file:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # The last line of an interrupted run may be cut short
+                continue
+            if record.get("status") == "ok":
+                done.add((record["resumeHash"], record["jobId"]))
+    return done
+
+
+def end_last_line(path: str):
+    # Keep the next record off a line an interrupted run left unfinished
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        return
+    with open(path, "rb+") as file:
+        file.seek(-1, os.SEEK_END)
+        if file.read(1) != b"\n":
+            file.write(b"\n")
+
+
+def document_name(upload: Upload, job_id: str) -> str:
+    stem = os.path.splitext(upload.filename)[0]
+    return re.sub(r"[^\w.-]+", "_", f"{stem}__{job_id}")
+
+
+class BulkRun:
+    def __init__(self, args, output):
+        self.args = args
+        self.output = output
+        self.texts = {}
+        self.counts = {"ok": 0, "error": 0}
+
+    def extract(self, upload: Upload) -> asyncio.Task:
+        # Every job of a resume waits on the same extraction
+        task = self.texts.get(upload.sha256)
+        if task is None:
+            task = self.texts[upload.sha256] = asyncio.create_task(
+                extract_resume(upload)
+            )
+        return task
+
+    async def render(self, result: dict, upload: Upload, job_id: str) -> dict:
+        template, resume_data = app.state.templates.prepare(
+            self.args.template, result["resumeJson"]
+        )
+        documents = await app.state.render_pool.render_bundle(
+            template.path,
+            resume_data,
+            self.args.render,
+        )
+        paths = {}
+        for extension, document in documents.items():
+            path = os.path.join(
+                self.args.documents, f"{document_name(upload, job_id)}.{extension}"
+            )
+            with open(path, "wb") as file:
+                file.write(document)
+            paths[extension] = path
+        return paths
+
+    async def run_pair(self, upload: Upload, job: dict) -> dict:
+        record = {
+            "resume": upload.filename,
+            "resumeHash": upload.sha256,
+            "jobId": job["id"],
+        }
+        start = time.perf_counter()
+        try:
+            if upload.size > MAX_UPLOAD_MB * 1024 * 1024:
+                raise ValueError(f"Resume is larger than {MAX_UPLOAD_MB} MB")
+            _, text, _ = await self.extract(upload)
+
+            result, cached = await generate_resume(
+                text,
+                job["job_description"],
+                job["companies"],
+                use_cache=not self.args.no_cache,
+            )
+            # Worth another try on the next run, like the result cache does
+            if not result["resumeJson"]:
+                raise ValueError("The response had no resume JSON")
+            record.update(status="ok", cached=cached, **result)
+
+            if self.args.render:
+                record["documents"] = await self.render(result, upload, job["id"])
+        except HTTPException as e:
+            record.update(status="error", error=e.detail)
+        except Exception as e:
+            record.update(status="error", error=str(e) or type(e).__name__)
+        record["seconds"] = round(time.perf_counter() - start, 3)
+        return record
+
+    def write(self, record: dict):
+        # One flushed line per pair, the checkpoint of the next run
+        self.output.write(json.dumps(record, separators=(",", ":")) + "\n")
+        self.output.flush()
+        self.counts[record["status"]] += 1
+        if record["status"] == "error":
+            print(
+                f"{record['resume']} x {record['jobId']}: {record['error']}",
+                file=sys.stderr,
+            )
+
+    async def run(self, pairs: list[tuple[Upload, dict]]):
+        queue = iter(pairs)
+
+        async def worker():
+            # Workers take the next pair when they finish one, so only
+            # --concurrency pairs are ever in memory
+            for upload, job in queue:
+                self.write(await self.run_pair(upload, job))
+                done = self.counts["ok"] + self.counts["error"]
+                if done % 25 == 0:
+                    print(f"{done}/{len(pairs)} pairs done", file=sys.stderr)
+
+        await asyncio.gather(*(worker() for _ in range(self.args.concurrency)))
+
+
+async def run(args):
+    jobs = load_jobs(args.jobs)
+    resumes = load_resumes(args.resumes)
+    done = completed_pairs(args.output)
+    pairs = [
+        (upload, job)
+        for upload in resumes
+        for job in jobs
+        if (upload.sha256, job["id"]) not in done
+    ]
+    print(
+        f"{len(resumes)} resumes x {len(jobs)} jobs: {len(pairs)} to run, "
+        f"{len(resumes) * len(jobs) - len(pairs)} already done",
+        file=sys.stderr,
+    )
+    if args.render:
+        os.makedirs(args.documents, exist_ok=True)
+
+    async with app.router.lifespan_context(app):
+        if args.render and app.state.templates.get(args.template) is None:
+            raise SystemExit(f"Unknown template: {args.template}")
+        end_last_line(args.output)
+        with open(args.output, "a", encoding="utf-8") as output:
+            bulk = BulkRun(args, output)
+            await bulk.run(pairs)
+
+    print(
+        f"{bulk.counts['ok']} succeeded, {bulk.counts['error']} failed",
+        file=sys.stderr,
+    )
+    return bulk.counts["error"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("resumes", help="Directory of PDF, DOCX, DOC or TXT resumes")
+    parser.add_argument("jobs", help="CSV or JSONL file of jobs")
+    parser.add_argument("output", help="JSONL results, appended to when resuming")
+    parser.add_argument("--concurrency", type=int, default=BATCH_CONCURRENCY)
+    parser.add_argument(
+        "--no-cache", action="store_true", help="Generate even when a result is cached"
+    )
+    parser.add_argument(
+        "--render",
+        nargs="+",
+        choices=list(RENDER_FORMATS),
+        help="Also render each resume in these formats",
+    )
+    parser.add_argument("--template", default=DEFAULT_TEMPLATE)
+    parser.add_argument(
+        "--documents", default="documents", help="Directory for rendered documents"
+    )
+    args = parser.parse_args()
+
+    try:
+        failures = asyncio.run(run(args))
+    except KeyboardInterrupt:
+        # Every finished pair is already in the output
+        print("Interrupted, run the same command again to resume", file=sys.stderr)
+        sys.exit(130)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
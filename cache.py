@@ -0,0 +1,208 @@
+import asyncio
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+def json_encode(value) -> bytes:
+    return json.dumps(value, separators=(",", ":")).encode("utf-8")
+
+
+def json_decode(data: bytes):
+    return json.loads(data)
+
+
+def hash_key(*parts) -> str:
+    """Build a stable SHA-256 cache key from JSON-serializable parts"""
+    canonical = json.dumps(parts, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class TieredCache:
+    """LRU cache with a TTL, optionally backed by SQLite.
+
+    The in-memory tier is private to the process and is bounded by entry count
+    and, when sizeof is given, by the total size of the cached values. When
+    db_path is set, entries are also written to a SQLite table so they survive
+    restarts and are shared by every uvicorn worker on the host. Memory misses
+    fall through to SQLite and promote the entry back into memory.
+
+    The SQLite tier is best-effort and stays off the event loop. Lookups run
+    in a thread and writes are made in the background. When another worker
+    holds the database, or it fails in any other way, the error is logged and
+    the lookup counts as a miss or the write is skipped.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_entries: int = 256,
+        ttl: float = 86400,
+        db_path: str | None = None,
+        encode=json_encode,
+        decode=json_decode,
+        max_bytes: int | None = None,
+        sizeof=None,
+    ):
+        self.name = name
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.encode = encode
+        self.decode = decode
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+        self.disk_errors = 0
+
+        # Separate connections with their own locks: memory hits never wait
+        # on SQLite, and with WAL, lookups don't queue behind a write that is
+        # waiting for another worker's lock
+        self._db_lock = threading.Lock()
+        self._reader_lock = threading.Lock()
+        self._writes = set()
+        self._db = None
+        self._reader = None
+        if db_path:
+            self._db = sqlite3.connect(db_path, check_same_thread=False, timeout=5)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                f"CREATE TABLE IF NOT EXISTS cache_{name} "
+                "(key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self._db.commit()
+            self._reader = sqlite3.connect(db_path, check_same_thread=False, timeout=5)
+
+    async def get(self, key: str):
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, expires_at, _ = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                self._evict(key)
+
+        if self._reader is not None:
+            row = await asyncio.to_thread(self._read, key, now)
+            if row is not None:
+                value, expires_at = row
+                with self._lock:
+                    self._store(key, value, expires_at)
+                    self.hits += 1
+                    self.disk_hits += 1
+                return value
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def set(self, key: str, value):
+        expires_at = time.time() + self.ttl
+        with self._lock:
+            self._store(key, value, expires_at)
+
+        if self._db is not None:
+            # Nobody waits for the write, the value is already served from memory
+            task = asyncio.create_task(
+                asyncio.to_thread(self._write, key, value, expires_at)
+            )
+            self._writes.add(task)
+            task.add_done_callback(self._writes.discard)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "diskHits": self.disk_hits,
+            "diskErrors": self.disk_errors,
+            "hitRatio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+    def close(self):
+        # Waits for a write in progress; writes that haven't started are dropped
+        with self._reader_lock:
+            if self._reader is not None:
+                self._reader.close()
+                self._reader = None
+        with self._db_lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    def _read(self, key, now):
+        with self._reader_lock:
+            if self._reader is None:
+                return None
+            try:
+                row = self._reader.execute(
+                    f"SELECT value, expires_at FROM cache_{self.name} "
+                    "WHERE key = ? AND expires_at > ?",
+                    (key, now),
+                ).fetchone()
+            except sqlite3.Error as e:
+                with self._lock:
+                    self.disk_errors += 1
+                print(f"Could not read the {self.name} cache, treating as a miss: {e}")
+                return None
+        if row is None:
+            return None
+        return self.decode(row[0]), row[1]
+
+    def _write(self, key, value, expires_at):
+        data = self.encode(value)
+        with self._db_lock:
+            if self._db is None:
+                return
+            try:
+                self._db.execute(
+                    f"INSERT OR REPLACE INTO cache_{self.name} "
+                    "(key, value, expires_at) VALUES (?, ?, ?)",
+                    (key, data, expires_at),
+                )
+                self._db.execute(
+                    f"DELETE FROM cache_{self.name} WHERE expires_at <= ?",
+                    (time.time(),),
+                )
+                self._db.commit()
+            except sqlite3.Error as e:
+                with self._lock:
+                    self.disk_errors += 1
+                print(f"Could not write to the {self.name} cache, skipping: {e}")
+                try:
+                    self._db.rollback()
+                except sqlite3.Error:
+                    pass
+
+    def _store(self, key, value, expires_at):
+        if key in self._entries:
+            self._evict(key)
+
+        size = self.sizeof(value) if self.sizeof else 0
+        # A value larger than the whole budget would just flush everything else
+        if self.max_bytes is not None and size > self.max_bytes:
+            return
+
+        self._entries[key] = (value, expires_at, size)
+        self._bytes += size
+        while len(self._entries) > self.max_entries or (
+            self.max_bytes is not None and self._bytes > self.max_bytes
+        ):
+            self._evict(next(iter(self._entries)))
+
+    def _evict(self, key):
+        _, _, size = self._entries.pop(key)
+        self._bytes -= size
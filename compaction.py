@@ -0,0 +1,176 @@
+import math
+import re
+from collections import Counter
+
+# Pre-tokenizer in the style of BPE tokenizers: letter runs, digit runs and
+# single symbols. Each piece costs at least one token; long words and numbers
+# are split the way subword vocabularies tend to split them.
+TOKEN_PIECE = re.compile(r"[A-Za-z]+|[0-9]+|[^\sA-Za-z0-9]")
+
+# Terms used for relevance scoring, keeping names like "c++", "c#" and "node.js"
+TERM = re.compile(r"[a-z0-9](?:[a-z0-9+#]|\.(?=[a-z0-9]))*")
+
+STOPWORDS = frozenset(
+    """a about an and are as at be by can for from has have in into is it its
+    of on or our that the their this to we will with you your they them who
+    what which while work working team teams role company""".split()
+)
+
+# Wording that marks the parts of a posting worth keeping
+REQUIREMENT_TERMS = frozenset(
+    """requirements required require qualifications qualified responsibilities
+    responsible must experience years skills proficiency proficient knowledge
+    preferred plus degree bachelor master build design develop lead own
+    implement""".split()
+)
+
+# Wording typical of boilerplate that rarely helps tailor a resume
+BOILERPLATE_TERMS = frozenset(
+    """equal opportunity employer eeo race religion gender orientation
+    disability veteran accommodation accommodations privacy policy benefits
+    perks insurance dental vision 401k pto holidays mission founded
+    headquartered applicants apply cookies""".split()
+)
+
+HEADING_MAX_CHARS = 60
+
+
+def piece_tokens(piece: str) -> int:
+    first = piece[0]
+    if first.isalpha() and first.isascii():
+        return (len(piece) + 5) // 6
+    if first.isdigit():
+        return (len(piece) + 2) // 3
+    return 1
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimate how many tokens Claude's tokenizer will use for text"""
+    return sum(piece_tokens(piece) for piece in TOKEN_PIECE.findall(text))
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Cut text after the last piece that fits within max_tokens"""
+    tokens = 0
+    end = 0
+    for match in TOKEN_PIECE.finditer(text):
+        tokens += piece_tokens(match.group())
+        if tokens > max_tokens:
+            break
+        end = match.end()
+    return text[:end].rstrip()
+
+
+def is_heading(paragraph: str) -> bool:
+    return len(paragraph) <= HEADING_MAX_CHARS and (
+        paragraph.endswith(":") or paragraph.isupper()
+    )
+
+
+def score_paragraphs(
+    paragraph_terms: list[list[str]], reference_terms: set[str]
+) -> list[float]:
+    """Score paragraphs by TF-IDF weight, boosted by overlap with the resume"""
+    document_frequency = Counter()
+    for terms in paragraph_terms:
+        document_frequency.update(set(terms))
+    paragraph_count = len(paragraph_terms)
+
+    scores = []
+    for terms in paragraph_terms:
+        if not terms:
+            scores.append(0.0)
+            continue
+
+        score = 0.0
+        for term, count in Counter(terms).items():
+            idf = math.log(1 + paragraph_count / document_frequency[term])
+            weight = (1 + math.log(count)) * idf
+            if term in reference_terms:
+                weight *= 2.0
+            if term in REQUIREMENT_TERMS:
+                weight *= 1.5
+            if term in BOILERPLATE_TERMS:
+                weight *= 0.1
+            score += weight
+
+        # Normalize by length so long paragraphs don't win on size alone
+        scores.append(score / math.sqrt(len(terms)))
+    return scores
+
+
+def compact_job_description(
+    text: str, max_tokens: int = 2000, reference: str = ""
+) -> str:
+    """Keep the most relevant paragraphs of a job description within a token budget.
+
+    Paragraphs are scored locally against the reference text (the candidate's
+    resume) and the highest scoring ones are kept, in their original order,
+    until the budget is spent. Section headings are kept along with the first
+    paragraph selected beneath them, and repeated paragraphs are dropped. The
+    best paragraph too long for the whole budget on its own is cut short to
+    fit rather than dropped, so a posting written as one long paragraph still
+    keeps its start.
+    """
+    if not text:
+        return ""
+
+    paragraphs = []
+    seen = set()
+    for line in text.split("\n"):
+        paragraph = line.strip()
+        if paragraph and paragraph not in seen:
+            seen.add(paragraph)
+            paragraphs.append(paragraph)
+
+    if not paragraphs:
+        return ""
+
+    token_counts = [estimate_tokens(paragraph) for paragraph in paragraphs]
+    if sum(token_counts) <= max_tokens:
+        return "\n".join(paragraphs)
+
+    # Map every paragraph to the heading it sits under
+    headings = []
+    body = []
+    current_heading = None
+    for index, paragraph in enumerate(paragraphs):
+        if is_heading(paragraph):
+            current_heading = index
+        else:
+            body.append(index)
+        headings.append(current_heading if index != current_heading else None)
+
+    paragraph_terms = [
+        [term for term in TERM.findall(paragraph.lower()) if term not in STOPWORDS]
+        for paragraph in paragraphs
+    ]
+    reference_terms = set(TERM.findall(reference.lower())) - STOPWORDS
+    scores = score_paragraphs(paragraph_terms, reference_terms)
+
+    selected = set()
+    remaining = max_tokens
+    truncated = False
+    for index in sorted(body, key=lambda index: scores[index], reverse=True):
+        cost = token_counts[index]
+        heading = headings[index]
+        if heading is not None and heading not in selected:
+            cost += token_counts[heading]
+        if cost > remaining:
+            if truncated or token_counts[index] <= max_tokens:
+                continue
+            paragraph = truncate_to_tokens(
+                paragraphs[index], remaining - (cost - token_counts[index])
+            )
+            if not paragraph:
+                continue
+            paragraphs[index] = paragraph
+            cost -= token_counts[index] - estimate_tokens(paragraph)
+            truncated = True
+
+        selected.add(index)
+        if heading is not None:
+            selected.add(heading)
+        remaining -= cost
+
+    return "\n".join(paragraphs[index] for index in sorted(selected))
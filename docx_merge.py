@@ -0,0 +1,563 @@
+import copy
+import html
+import io
+import os
+import re
+import subprocess
+import tempfile
+import zipfile
+
+from lxml import etree
+
+W = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+XML_SPACE = "{http://www.w3.org/XML/1998/namespace}space"
+
+P = f"{{{W}}}p"
+R = f"{{{W}}}r"
+T = f"{{{W}}}t"
+BR = f"{{{W}}}br"
+RPR = f"{{{W}}}rPr"
+TBL = f"{{{W}}}tbl"
+TR = f"{{{W}}}tr"
+TC = f"{{{W}}}tc"
+TXBX = f"{{{W}}}txbxContent"
+
+# Adobe Document Generation tags, matched after runs are joined
+TAG = re.compile(r"\{\{.*?\}\}|\{%.*?%\}")
+FIELD = re.compile(r"\{\{\s*([\w.]+)\s*\}\}")
+SECTION_START = re.compile(r"^\{%\s*repeating-section\s+([\w.]+)\s*%\}$")
+SECTION_END = re.compile(r"^\{%\s*end-section\s*%\}$")
+
+# The small HTML subset the resume formatters put into field values
+HTML_TOKEN = re.compile(r"<(/?)([a-zA-Z]+)([^>]*?)/?>|([^<]+)")
+HTML_VALUE = re.compile(r"<(?:br|span|div|p|b|i|strong|em|ul|ol|li)\b", re.IGNORECASE)
+BLOCK_TAGS = {"div", "p", "li"}
+
+# Parts of the document that can hold template tags
+TEMPLATE_PARTS = re.compile(r"^word/(document|header\d*|footer\d*)\.xml$")
+
+LIBREOFFICE_PATH = os.environ.get("LIBREOFFICE_PATH", "soffice")
+PDF_CONVERT_TIMEOUT = float(os.environ.get("PDF_CONVERT_TIMEOUT", "60"))
+
+
+def own_texts(paragraph) -> list:
+    """The w:t elements of a paragraph, skipping paragraphs nested in text boxes"""
+    return [
+        text
+        for text in paragraph.iter(T)
+        if next(text.iterancestors(P), None) is paragraph
+    ]
+
+
+def paragraph_text(paragraph) -> str:
+    return "".join(text.text or "" for text in own_texts(paragraph))
+
+
+def join_split_tags(paragraph):
+    """Move every tag into a single w:t, Word often splits them across runs"""
+    texts = own_texts(paragraph)
+    bounds = []
+    position = 0
+    for text in texts:
+        bounds.append(position)
+        position += len(text.text or "")
+    full = "".join(text.text or "" for text in texts)
+
+    def locate(offset):
+        index = 0
+        while index + 1 < len(bounds) and bounds[index + 1] <= offset:
+            index += 1
+        return index
+
+    # Back to front, so earlier offsets stay valid
+    for match in reversed(list(TAG.finditer(full))):
+        first = locate(match.start())
+        last = locate(match.end() - 1)
+        if first == last:
+            continue
+        head = texts[first].text[: match.start() - bounds[first]]
+        texts[first].text = head + match.group()
+        texts[first].set(XML_SPACE, "preserve")
+        for text in texts[first + 1 : last]:
+            text.text = ""
+        texts[last].text = texts[last].text[match.end() - bounds[last] :]
+        texts[last].set(XML_SPACE, "preserve")
+
+
+def section_tag(paragraph):
+    """Return ("start", path) or ("end", None) for a section tag paragraph"""
+    text = paragraph_text(paragraph).strip()
+    if not text.startswith("{%"):
+        return None
+    match = SECTION_START.match(text)
+    if match:
+        return "start", match.group(1)
+    if SECTION_END.match(text):
+        return "end", None
+    return None
+
+
+def resolve(path: str, contexts: list):
+    """Look a dotted path up in the innermost context that has its first key"""
+    keys = path.split(".")
+    for context in reversed(contexts):
+        if isinstance(context, dict) and keys[0] in context:
+            value = context
+            for key in keys:
+                value = value.get(key) if isinstance(value, dict) else None
+            return value
+    return None
+
+
+def section_items(value) -> list:
+    if isinstance(value, list):
+        return value
+    return [value] if value else []
+
+
+def html_pieces(value: str) -> list[tuple]:
+    """Turn an HTML field value into (text, bold, italic) pieces and None line breaks"""
+    pieces = []
+    styles = []
+    for match in HTML_TOKEN.finditer(value):
+        closing, tag, attributes, text = match.groups()
+        if text is not None:
+            text = re.sub(r"\s+", " ", html.unescape(text))
+            # Whitespace between blocks is layout, not content
+            if not text.strip() and (not pieces or pieces[-1] is None):
+                continue
+            bold = any(style == "bold" for style in styles)
+            italic = any(style == "italic" for style in styles)
+            pieces.append((text, bold, italic))
+            continue
+
+        tag = tag.lower()
+        if tag == "br":
+            pieces.append(None)
+        elif closing:
+            if tag in BLOCK_TAGS and pieces and pieces[-1] is not None:
+                pieces.append(None)
+            if tag in ("b", "strong", "i", "em", "span") and styles:
+                styles.pop()
+        elif tag in ("b", "strong"):
+            styles.append("bold")
+        elif tag in ("i", "em"):
+            styles.append("italic")
+        elif tag == "span":
+            style = attributes.replace(" ", "").lower()
+            if "font-weight:bold" in style:
+                styles.append("bold")
+            elif "font-style:italic" in style:
+                styles.append("italic")
+            else:
+                styles.append(None)
+        elif tag == "li":
+            pieces.append(("• ", False, False))
+
+    while pieces and pieces[-1] is None:
+        pieces.pop()
+    return pieces
+
+
+def value_pieces(value) -> list[tuple]:
+    if value is None:
+        return []
+    if not isinstance(value, str):
+        value = str(value)
+    if HTML_VALUE.search(value):
+        return html_pieces(value)
+
+    pieces = []
+    for index, line in enumerate(value.split("\n")):
+        if index:
+            pieces.append(None)
+        if line:
+            pieces.append((line, False, False))
+    return pieces
+
+
+# The schema fixes the order of rPr children, these are the first few
+RUN_PROPERTY_ORDER = ["rStyle", "rFonts", "b", "bCs", "i", "iCs"]
+
+
+def set_run_flag(properties, name: str):
+    if properties.find(f"{{{W}}}{name}") is not None:
+        return
+    rank = RUN_PROPERTY_ORDER.index(name)
+    position = 0
+    for index, child in enumerate(properties):
+        local = etree.QName(child).localname
+        if local in RUN_PROPERTY_ORDER and RUN_PROPERTY_ORDER.index(local) < rank:
+            position = index + 1
+    properties.insert(position, etree.Element(f"{{{W}}}{name}"))
+
+
+def make_run(run_properties, piece):
+    run = etree.Element(R)
+    if run_properties is not None:
+        properties = copy.deepcopy(run_properties)
+        run.append(properties)
+    else:
+        properties = None
+
+    if piece is None:
+        etree.SubElement(run, BR)
+        return run
+
+    text, bold, italic = piece
+    if bold or italic:
+        if properties is None:
+            properties = etree.SubElement(run, RPR)
+        if bold:
+            set_run_flag(properties, "b")
+        if italic:
+            set_run_flag(properties, "i")
+    element = etree.SubElement(run, T)
+    element.text = text
+    element.set(XML_SPACE, "preserve")
+    return run
+
+
+def fill_text(text_element, contexts: list):
+    """Replace the fields in one w:t, splitting its run for rich values"""
+    source = text_element.text or ""
+    pieces = []
+    rich = False
+    position = 0
+    for match in FIELD.finditer(source):
+        if match.start() > position:
+            pieces.append((source[position : match.start()], False, False))
+        value = value_pieces(resolve(match.group(1), contexts))
+        rich = rich or any(piece is None or piece[1] or piece[2] for piece in value)
+        pieces.extend(value)
+        position = match.end()
+    if source[position:]:
+        pieces.append((source[position:], False, False))
+
+    text_element.set(XML_SPACE, "preserve")
+    if not rich:
+        text_element.text = "".join(piece[0] for piece in pieces)
+        return
+
+    # Rich values need their own runs: split the run around this w:t
+    run = text_element.getparent()
+    if run.tag != R:
+        text_element.text = "".join(piece[0] for piece in pieces if piece)
+        return
+    run_properties = run.find(RPR)
+    parent = run.getparent()
+    index = parent.index(run)
+
+    after = [child for child in run[run.index(text_element) + 1 :]]
+    run.remove(text_element)
+    new_runs = [make_run(run_properties, piece) for piece in pieces]
+    if after:
+        tail = etree.Element(R)
+        if run_properties is not None:
+            tail.append(copy.deepcopy(run_properties))
+        tail.extend(after)
+        new_runs.append(tail)
+    for offset, new_run in enumerate(new_runs, start=1):
+        parent.insert(index + offset, new_run)
+    if all(child.tag == RPR for child in run):
+        parent.remove(run)
+
+
+def fill_paragraph(paragraph, contexts: list):
+    join_split_tags(paragraph)
+    for text in own_texts(paragraph):
+        if text.text and "{{" in text.text:
+            fill_text(text, contexts)
+    for text_box in paragraph.iter(TXBX):
+        if next(text_box.iterancestors(P), None) is paragraph:
+            render(text_box, contexts)
+
+
+def matching_end(elements: list, start: int, tags) -> int | None:
+    """Index of the element holding the end tag that closes the section at start"""
+    depth = 0
+    for index in range(start, len(elements)):
+        for kind, _ in tags(elements[index]):
+            depth += 1 if kind == "start" else -1
+            if depth == 0:
+                return index
+    return None
+
+
+def paragraph_tags(element) -> list:
+    if element.tag != P:
+        return []
+    join_split_tags(element)
+    tag = section_tag(element)
+    return [tag] if tag else []
+
+
+def row_tags(row) -> list:
+    tags = []
+    for paragraph in row.iter(P):
+        join_split_tags(paragraph)
+        tag = section_tag(paragraph)
+        if tag:
+            tags.append(tag)
+    return tags
+
+
+def remove_outer_tags(rows: list):
+    """Drop the start and end tag paragraphs of a section that spans table rows"""
+    paragraphs = [paragraph for row in rows for paragraph in row.iter(P)]
+    start = next(i for i, p in enumerate(paragraphs) if section_tag(p))
+    end = matching_end(paragraphs, start, paragraph_tags)
+    for paragraph in (paragraphs[start], paragraphs[end]):
+        cell = paragraph.getparent()
+        cell.remove(paragraph)
+        # A table cell must keep at least one paragraph
+        if cell.tag == TC and cell.find(P) is None:
+            etree.SubElement(cell, P)
+
+
+def render_table(table, contexts: list):
+    rows = [row for row in table if row.tag == TR]
+    index = 0
+    while index < len(rows):
+        row = rows[index]
+        tags = row_tags(row)
+        if not tags or tags[0][0] != "start":
+            render(row, contexts)
+            index += 1
+            continue
+
+        end = matching_end(rows, index, row_tags)
+        cells = [cell for cell in row if cell.tag == TC]
+        # A section inside a single cell repeats paragraphs, otherwise whole rows
+        if end is None or (end == index and len(cells) == 1):
+            render(row, contexts)
+            index += 1
+            continue
+
+        block = rows[index : end + 1]
+        for item in section_items(resolve(tags[0][1], contexts)):
+            copies = [copy.deepcopy(original) for original in block]
+            remove_outer_tags(copies)
+            for new_row in copies:
+                block[0].addprevious(new_row)
+                render(new_row, contexts + [item])
+        for original in block:
+            table.remove(original)
+        index = end + 1
+
+
+def render(container, contexts: list):
+    """Fill fields and expand repeating sections under container, in place"""
+    children = list(container)
+    index = 0
+    while index < len(children):
+        child = children[index]
+        if child.tag == TBL:
+            render_table(child, contexts)
+        elif child.tag != P:
+            render(child, contexts)
+        else:
+            tags = paragraph_tags(child)
+            if not tags:
+                fill_paragraph(child, contexts)
+            elif tags[0][0] == "end":
+                # An end tag without a start, drop it like Adobe does
+                container.remove(child)
+            else:
+                end = matching_end(children, index, paragraph_tags)
+                if end is None:
+                    container.remove(child)
+                    index += 1
+                    continue
+
+                block = children[index + 1 : end]
+                for item in section_items(resolve(tags[0][1], contexts)):
+                    wrapper = etree.Element("section")
+                    wrapper.extend(copy.deepcopy(element) for element in block)
+                    render(wrapper, contexts + [item])
+                    for element in list(wrapper):
+                        child.addprevious(element)
+                for element in children[index : end + 1]:
+                    container.remove(element)
+                index = end
+        index += 1
+
+
+def shape_node(shape: dict, keys: list) -> dict:
+    for key in keys:
+        if not isinstance(shape.get(key), dict):
+            shape[key] = {}
+        shape = shape[key]
+    return shape
+
+
+def add_field(shape: dict, path: str):
+    *parents, key = path.split(".")
+    node = shape_node(shape, parents)
+    # A path used both as a field and as a parent keeps the richer shape
+    node.setdefault(key, None)
+
+
+def add_section(shape: dict, path: str) -> dict:
+    """Mark path as a repeating section and return the shape of its items"""
+    *parents, key = path.split(".")
+    node = shape_node(shape, parents)
+    if not isinstance(node.get(key), list):
+        node[key] = [{}]
+    return node[key][0]
+
+
+def table_fields(table, shape: dict):
+    rows = [row for row in table if row.tag == TR]
+    index = 0
+    while index < len(rows):
+        row = rows[index]
+        tags = row_tags(row)
+        end = matching_end(rows, index, row_tags) if tags else None
+        cells = [cell for cell in row if cell.tag == TC]
+        if (
+            not tags
+            or tags[0][0] != "start"
+            or end is None
+            or (end == index and len(cells) == 1)
+        ):
+            collect_fields(row, shape)
+            index += 1
+            continue
+
+        item_shape = add_section(shape, tags[0][1])
+        copies = [copy.deepcopy(original) for original in rows[index : end + 1]]
+        remove_outer_tags(copies)
+        for new_row in copies:
+            collect_fields(new_row, item_shape)
+        index = end + 1
+
+
+def collect_fields(container, shape: dict):
+    """Record the fields and sections used under container, like render walks it.
+
+    Fields become shape[key] = None and sections shape[key] = [item_shape],
+    along their dotted paths. Fields inside a section are recorded on the
+    section's items, where render looks them up first.
+    """
+    children = list(container)
+    index = 0
+    while index < len(children):
+        child = children[index]
+        if child.tag == TBL:
+            table_fields(child, shape)
+        elif child.tag != P:
+            collect_fields(child, shape)
+        else:
+            tags = paragraph_tags(child)
+            if not tags:
+                for match in FIELD.finditer(paragraph_text(child)):
+                    add_field(shape, match.group(1))
+                for text_box in child.iter(TXBX):
+                    if next(text_box.iterancestors(P), None) is child:
+                        collect_fields(text_box, shape)
+            elif tags[0][0] == "start":
+                end = matching_end(children, index, paragraph_tags)
+                if end is not None:
+                    wrapper = etree.Element("section")
+                    wrapper.extend(
+                        copy.deepcopy(element) for element in children[index + 1 : end]
+                    )
+                    collect_fields(wrapper, add_section(shape, tags[0][1]))
+                    index = end
+        index += 1
+
+
+def template_fields(template) -> dict:
+    """The shape of the merge data a template uses, from its tags.
+
+    template is a path or the template bytes. Returns a nested dict where a
+    field is None, an object a dict and a repeating section a one-item list
+    holding the shape of its items, e.g. {"user": {"Name": None,
+    "experience": [{"company": None}]}}.
+    """
+    if isinstance(template, str):
+        with open(template, "rb") as file:
+            template = file.read()
+
+    shape = {}
+    with zipfile.ZipFile(io.BytesIO(template)) as source:
+        for name in source.namelist():
+            if TEMPLATE_PARTS.match(name):
+                collect_fields(etree.fromstring(source.read(name)), shape)
+    return shape
+
+
+def merge_template(template, data: dict) -> bytes:
+    """Merge data into a DOCX template with Adobe Document Generation tags.
+
+    template is a path or the template bytes. Supports {{path}} fields,
+    with the HTML subset the resume formatters emit, and repeating sections
+    over paragraphs or table rows. Returns the merged DOCX bytes.
+    """
+    if isinstance(template, str):
+        with open(template, "rb") as file:
+            template = file.read()
+
+    output = io.BytesIO()
+    with zipfile.ZipFile(io.BytesIO(template)) as source, zipfile.ZipFile(
+        output, "w", zipfile.ZIP_DEFLATED
+    ) as target:
+        for info in source.infolist():
+            content = source.read(info.filename)
+            if TEMPLATE_PARTS.match(info.filename):
+                root = etree.fromstring(content)
+                render(root, [data])
+                content = etree.tostring(
+                    root, xml_declaration=True, encoding="UTF-8", standalone=True
+                )
+            target.writestr(info, content)
+    return output.getvalue()
+
+
+def conversion_error(message: str, error: subprocess.SubprocessError) -> str:
+    stderr = (error.stderr or b"").decode(errors="replace").strip()
+    return f"{message}: {stderr}" if stderr else message
+
+
+def docx_to_pdf(document: bytes, timeout: float = PDF_CONVERT_TIMEOUT) -> bytes:
+    """Convert DOCX bytes to PDF with headless LibreOffice"""
+    with tempfile.TemporaryDirectory() as directory:
+        source = os.path.join(directory, "resume.docx")
+        with open(source, "wb") as file:
+            file.write(document)
+
+        # A private profile lets several conversions run at the same time
+        command = [
+            LIBREOFFICE_PATH,
+            "--headless",
+            f"-env:UserInstallation=file://{directory}/profile",
+            "--convert-to",
+            "pdf",
+            "--outdir",
+            directory,
+            source,
+        ]
+        try:
+            subprocess.run(command, check=True, capture_output=True, timeout=timeout)
+        except FileNotFoundError:
+            raise RuntimeError(
+                "PDF output needs LibreOffice, install it or set LIBREOFFICE_PATH"
+            )
+        except OSError as e:
+            raise RuntimeError(f"Could not run LibreOffice: {e}") from e
+        except subprocess.CalledProcessError as e:
+            raise RuntimeError(
+                conversion_error(f"LibreOffice exited with status {e.returncode}", e)
+            ) from e
+        except subprocess.TimeoutExpired as e:
+            raise RuntimeError(
+                conversion_error(f"LibreOffice took longer than {timeout:g}s", e)
+            ) from e
+
+        try:
+            with open(os.path.join(directory, "resume.pdf"), "rb") as file:
+                return file.read()
+        except FileNotFoundError:
+            # LibreOffice can exit cleanly without converting anything
+            raise RuntimeError("LibreOffice did not produce a PDF") from None
@@ -0,0 +1,326 @@
+import asyncio
+import codecs
+import io
+import multiprocessing
+import subprocess
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import docx2txt
+import pymupdf
+
+
+def file_extension(filename: str | None) -> str:
+    return filename.split(".")[-1].lower() if filename else ""
+
+
+def _latin1_fallback(error: UnicodeDecodeError) -> tuple[str, int]:
+    # The five bytes Windows-1252 leaves undefined decode as in Latin-1
+    return error.object[error.start : error.end].decode("latin-1"), error.end
+
+
+codecs.register_error("latin-1-fallback", _latin1_fallback)
+
+
+def read_source(source: bytes | str) -> bytes:
+    # Small uploads arrive as bytes, spooled ones as the path of a temp file
+    if isinstance(source, str):
+        with open(source, "rb") as file:
+            return file.read()
+    return source
+
+
+def open_pdf(source: bytes | str) -> pymupdf.Document:
+    # Open the PDF straight from memory or from the spooled upload, never
+    # through another copy
+    if isinstance(source, str):
+        return pymupdf.open(source, filetype="pdf")
+    return pymupdf.open(stream=source, filetype="pdf")
+
+
+def extract_pdf_text(source: bytes | str) -> str:
+    with open_pdf(source) as doc:
+        return "".join([page.get_text() for page in doc])
+
+
+def extract_pdf_pages(source: bytes | str, start: int, stop: int) -> str:
+    with open_pdf(source) as doc:
+        return "".join([doc[i].get_text() for i in range(start, min(stop, len(doc)))])
+
+
+def extract_pdf_head(source: bytes | str, pages: int) -> tuple[str, int]:
+    """Extract the first pages of a PDF and report its total page count"""
+    with open_pdf(source) as doc:
+        page_count = len(doc)
+        text = "".join([doc[i].get_text() for i in range(min(pages, page_count))])
+    return text, page_count
+
+
+def extract_docx_text(source: bytes | str) -> str:
+    # docx2txt accepts a path or any file-like object that zipfile can read
+    return docx2txt.process(source if isinstance(source, str) else io.BytesIO(source))
+
+
+def convert_doc(path: str, timeout: float | None = None) -> str:
+    try:
+        # Try antiword first (needs to be installed on the system)
+        return subprocess.check_output(
+            ["antiword", path], stderr=subprocess.STDOUT, timeout=timeout
+        ).decode("utf-8", errors="replace")
+    except (subprocess.SubprocessError, FileNotFoundError):
+        try:
+            # Fallback to textract if available
+            import textract
+
+            return textract.process(path).decode("utf-8", errors="replace")
+        except ImportError:
+            return "Error: Could not process DOC file. Please install antiword or textract."
+
+
+def extract_doc_text(source: bytes | str, timeout: float | None = None) -> str:
+    if isinstance(source, str):
+        return convert_doc(source, timeout)
+
+    # antiword and textract only read from disk; the temp file is removed on close
+    with tempfile.NamedTemporaryFile(suffix=".doc") as temp_file:
+        temp_file.write(source)
+        temp_file.flush()
+        return convert_doc(temp_file.name, timeout)
+
+
+def decode_text(content: bytes) -> str:
+    """Decode a plain-text resume as UTF-8, or else as Windows-1252.
+
+    A UTF-8 decode stops at the first invalid byte, so a file that isn't
+    UTF-8 costs one full decode. Windows-1252 and Latin-1 are handled by
+    the same pass: the few bytes Windows-1252 leaves undefined are decoded
+    as Latin-1 where they occur instead of decoding the whole file again.
+    """
+    try:
+        return content.decode("utf-8")
+    except UnicodeDecodeError:
+        return content.decode("cp1252", errors="latin-1-fallback")
+
+
+def extract_text(
+    source: bytes | str, filename: str | None, timeout: float | None = None
+) -> str:
+    """Extract the plain text of an uploaded resume from its bytes or path"""
+    extension = file_extension(filename)
+
+    if extension == "pdf":
+        try:
+            return extract_pdf_text(source)
+        except Exception as e:
+            print(f"Error reading PDF file: {e}")
+            return "Error: Could not read PDF file."
+
+    if extension in ["doc", "docx"]:
+        try:
+            if extension == "docx":
+                return extract_docx_text(source)
+            return extract_doc_text(source, timeout)
+        except Exception as e:
+            print(f"Error handling DOC/DOCX file: {e}")
+            return f"Error: Could not process DOC/DOCX file: {str(e)}"
+
+    return decode_text(read_source(source))
+
+
+def _limit_worker_memory(memory_limit: int):
+    # Runs in each worker process; a parse that exceeds the limit fails with
+    # MemoryError instead of taking the host down
+    try:
+        import resource
+
+        resource.setrlimit(resource.RLIMIT_AS, (memory_limit, memory_limit))
+    except (ImportError, ValueError, OSError) as e:
+        print(f"Could not limit extraction worker memory: {e}")
+
+
+def _terminate(executor: ProcessPoolExecutor):
+    for process in list((executor._processes or {}).values()):
+        process.terminate()
+    executor.shutdown(wait=False, cancel_futures=True)
+
+
+class ExtractionPool:
+    """Run resume extraction in a bounded pool of worker processes.
+
+    At most one task per worker is submitted at a time, the rest wait their
+    turn here, so every submitted task is running. Each task gets a hard
+    deadline from the moment it is submitted; time spent waiting for a
+    worker doesn't count. When a deadline is exceeded, or a worker dies
+    (e.g. after hitting the memory limit), the workers are terminated and the
+    pool is recreated, so a pathological upload cannot stall the server.
+    The other extractions that were running on the old pool are retried
+    once on the new one. Large PDFs are split into page ranges extracted
+    in parallel.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = 2,
+        timeout: float = 30,
+        memory_limit_mb: int = 1024,
+        pages_per_task: int = 10,
+    ):
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.memory_limit = memory_limit_mb * 1024 * 1024
+        self.pages_per_task = pages_per_task
+
+        self.pending = 0
+        self.timeouts = 0
+        self.restarts = 0
+        self.retries = 0
+        self.timings = {}
+        self._slots = asyncio.Semaphore(max_workers)
+        self._executor = self._create_executor()
+
+    def _create_executor(self) -> ProcessPoolExecutor:
+        # spawn avoids forking the server's event loop and client threads
+        return ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_limit_worker_memory,
+            initargs=(self.memory_limit,),
+        )
+
+    def _restart(self, executor: ProcessPoolExecutor):
+        # Several requests can fail on the same broken pool, restart it once
+        if executor is not self._executor:
+            return
+        self.restarts += 1
+        self._executor = self._create_executor()
+        _terminate(executor)
+
+    async def _run(self, executor: ProcessPoolExecutor, func, *args):
+        self.pending += 1
+        try:
+            async with self._slots:
+                if executor is not self._executor:
+                    raise BrokenProcessPool("The extraction pool was restarted")
+                try:
+                    return await asyncio.wait_for(
+                        asyncio.wrap_future(executor.submit(func, *args)),
+                        self.timeout,
+                    )
+                except asyncio.TimeoutError:
+                    # The task had a worker to itself, so it is the culprit
+                    self.timeouts += 1
+                    self._restart(executor)
+                    raise
+        except (asyncio.CancelledError, RuntimeError):
+            # Another request's restart cancels the tasks it catches on the
+            # old pool and refuses new ones; report that like a broken pool
+            restarted = executor is not self._executor
+            if restarted and not asyncio.current_task().cancelling():
+                raise BrokenProcessPool("The extraction pool was restarted")
+            raise
+        finally:
+            self.pending -= 1
+
+    async def _extract(
+        self, executor, source: bytes | str, filename: str | None
+    ) -> str:
+        # Spooled uploads are passed by path, each task opens the file itself
+        # instead of receiving a pickled copy of it
+        if file_extension(filename) != "pdf":
+            return await self._run(
+                executor, extract_text, source, filename, self.timeout
+            )
+
+        try:
+            text, page_count = await self._run(
+                executor, extract_pdf_head, source, self.pages_per_task
+            )
+            if page_count <= self.pages_per_task:
+                return text
+
+            rest = await asyncio.gather(
+                *(
+                    self._run(
+                        executor,
+                        extract_pdf_pages,
+                        source,
+                        start,
+                        start + self.pages_per_task,
+                    )
+                    for start in range(
+                        self.pages_per_task, page_count, self.pages_per_task
+                    )
+                )
+            )
+            return text + "".join(rest)
+        except (BrokenProcessPool, asyncio.TimeoutError):
+            raise
+        except Exception as e:
+            print(f"Error reading PDF file: {e}")
+            return "Error: Could not read PDF file."
+
+    async def extract(self, source: bytes | str, filename: str | None) -> str:
+        """Extract the plain text of an upload without blocking the event loop.
+
+        source is the upload's bytes or the path of the file it was spooled
+        to, which must exist until this returns.
+        """
+        extension = file_extension(filename) or "txt"
+        start = time.perf_counter()
+        error = False
+        try:
+            for attempt in range(2):
+                executor = self._executor
+                try:
+                    return await self._extract(executor, source, filename)
+                except asyncio.TimeoutError:
+                    error = True
+                    print(
+                        f"Timed out extracting {extension} file after {self.timeout}s"
+                    )
+                    return "Error: Timed out reading resume file."
+                except BrokenProcessPool as e:
+                    # Still the current pool: this request is the first to
+                    # see it broken, possibly because its own file crashed it
+                    if executor is not self._executor and attempt == 0:
+                        self.retries += 1
+                        continue
+                    error = True
+                    self._restart(executor)
+                    print(f"Extraction worker crashed: {e}")
+                    return "Error: Could not read resume file."
+        finally:
+            self._record(extension, time.perf_counter() - start, error)
+
+    def _record(self, extension: str, seconds: float, error: bool):
+        timing = self.timings.setdefault(
+            extension, {"count": 0, "errors": 0, "totalSeconds": 0.0, "maxSeconds": 0.0}
+        )
+        timing["count"] += 1
+        timing["errors"] += int(error)
+        timing["totalSeconds"] += seconds
+        timing["maxSeconds"] = max(timing["maxSeconds"], seconds)
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.max_workers,
+            "pending": self.pending,
+            "queueDepth": max(0, self.pending - self.max_workers),
+            "timeouts": self.timeouts,
+            "restarts": self.restarts,
+            "retries": self.retries,
+            "byFormat": {
+                extension: {
+                    **timing,
+                    "totalSeconds": round(timing["totalSeconds"], 4),
+                    "maxSeconds": round(timing["maxSeconds"], 4),
+                }
+                for extension, timing in self.timings.items()
+            },
+        }
+
+    def shutdown(self):
+        # Uvicorn's worker processes exit without joining the pool's children
+        _terminate(self._executor)
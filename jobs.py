@@ -0,0 +1,358 @@
+import asyncio
+import json
+import random
+import sqlite3
+import threading
+import time
+import uuid
+
+STATUSES = ("queued", "running", "succeeded", "failed")
+
+
+class JobQueue:
+    """Persistent job queue stored in SQLite.
+
+    A worker claims a job by taking a lease on it, which it renews while the
+    job runs. If the process dies, the lease runs out and another worker (or
+    the restarted process) picks the job up again, so queued and running jobs
+    survive restarts. Claims happen inside an immediate transaction, which
+    makes it safe for several uvicorn workers to share one database file.
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        lease_seconds: float = 60,
+        max_attempts: int = 5,
+        backoff_base: float = 2.0,
+        backoff_max: float = 300,
+        retention: float = 7 * 86400,
+    ):
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.retention = retention
+
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(
+            db_path, check_same_thread=False, timeout=5, isolation_level=None
+        )
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "id TEXT PRIMARY KEY, status TEXT NOT NULL, payload TEXT NOT NULL, "
+            "progress TEXT NOT NULL, result TEXT, error TEXT, "
+            "attempts INTEGER NOT NULL DEFAULT 0, run_at REAL NOT NULL, "
+            "lease_expires_at REAL, created_at REAL NOT NULL, "
+            "updated_at REAL NOT NULL)"
+        )
+        self._db.execute(
+            "CREATE INDEX IF NOT EXISTS jobs_status_run_at ON jobs (status, run_at)"
+        )
+
+    def enqueue(self, payload: dict) -> str:
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT INTO jobs (id, status, payload, progress, run_at, "
+                "created_at, updated_at) VALUES (?, 'queued', ?, 'queued', ?, ?, ?)",
+                (job_id, json.dumps(payload, separators=(",", ":")), now, now, now),
+            )
+            # Finished jobs are only kept long enough for clients to collect them
+            self._db.execute(
+                "DELETE FROM jobs WHERE status IN ('succeeded', 'failed') "
+                "AND updated_at < ?",
+                (now - self.retention,),
+            )
+        return job_id
+
+    def claim(self) -> tuple[str, dict, int] | None:
+        """Lease the next runnable job, returning its id, payload and attempt"""
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                claimed = self._claim_next(time.time())
+                # A COMMIT that fails on a busy database leaves the
+                # transaction open, roll it back like any other error
+                self._db.execute("COMMIT")
+            except Exception:
+                self._db.execute("ROLLBACK")
+                raise
+            return claimed
+
+    def heartbeat(self, job_id: str):
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "UPDATE jobs SET lease_expires_at = ? "
+                "WHERE id = ? AND status = 'running'",
+                (now + self.lease_seconds, job_id),
+            )
+
+    def set_progress(self, job_id: str, progress: str):
+        with self._lock:
+            self._db.execute(
+                "UPDATE jobs SET progress = ?, updated_at = ? WHERE id = ?",
+                (progress, time.time(), job_id),
+            )
+
+    def complete(self, job_id: str, result: dict):
+        with self._lock:
+            self._finish(job_id, "succeeded", result=result)
+
+    def fail(self, job_id: str, error: str):
+        with self._lock:
+            self._finish(job_id, "failed", error=error)
+
+    def retry(self, job_id: str, attempt: int, error: str) -> float | None:
+        """Schedule another attempt with exponential backoff and jitter.
+
+        Returns the delay in seconds, or None when the job ran out of
+        attempts and was marked as failed.
+        """
+        if attempt >= self.max_attempts:
+            self.fail(job_id, f"{error} (gave up after {attempt} attempts)")
+            return None
+
+        delay = min(self.backoff_max, self.backoff_base * 2 ** (attempt - 1))
+        delay *= random.uniform(0.5, 1.0)
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "UPDATE jobs SET status = 'queued', progress = ?, error = ?, "
+                "run_at = ?, lease_expires_at = NULL, updated_at = ? WHERE id = ?",
+                (f"retrying in {delay:.0f}s", error, now + delay, now, job_id),
+            )
+        return delay
+
+    def release(self, job_id: str):
+        """Put an interrupted job back on the queue without using up an attempt"""
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "UPDATE jobs SET status = 'queued', progress = 'queued', "
+                "attempts = MAX(attempts - 1, 0), run_at = ?, "
+                "lease_expires_at = NULL, updated_at = ? WHERE id = ?",
+                (now, now, job_id),
+            )
+
+    def get(self, job_id: str) -> dict | None:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT status, progress, result, error, attempts, run_at, "
+                "created_at, updated_at FROM jobs WHERE id = ?",
+                (job_id,),
+            ).fetchone()
+        if row is None:
+            return None
+
+        status, progress, result, error, attempts, run_at, created_at, updated_at = row
+        job = {
+            "id": job_id,
+            "status": status,
+            "progress": progress,
+            "attempts": attempts,
+            "createdAt": created_at,
+            "updatedAt": updated_at,
+            "result": json.loads(result) if result else None,
+            "error": error,
+        }
+        if status == "queued":
+            job["runAt"] = run_at
+        return job
+
+    def stats(self) -> dict:
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT status, COUNT(*) FROM jobs GROUP BY status"
+            ).fetchall()
+        counts = dict.fromkeys(STATUSES, 0)
+        counts.update(rows)
+        return counts
+
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    def _claim_next(self, now):
+        while True:
+            row = self._db.execute(
+                "SELECT id, payload, attempts FROM jobs "
+                "WHERE (status = 'queued' AND run_at <= ?) "
+                "OR (status = 'running' AND lease_expires_at <= ?) "
+                "ORDER BY run_at LIMIT 1",
+                (now, now),
+            ).fetchone()
+            if row is None:
+                return None
+
+            job_id, payload, attempts = row
+            # A job whose worker kept dying mid-run is not retried forever
+            if attempts >= self.max_attempts:
+                self._finish(
+                    job_id, "failed", error=f"Gave up after {attempts} attempts"
+                )
+                continue
+
+            self._db.execute(
+                "UPDATE jobs SET status = 'running', progress = 'starting', "
+                "attempts = attempts + 1, lease_expires_at = ?, "
+                "updated_at = ? WHERE id = ?",
+                (now + self.lease_seconds, now, job_id),
+            )
+            return job_id, json.loads(payload), attempts + 1
+
+    def _finish(self, job_id, status, result=None, error=None):
+        self._db.execute(
+            "UPDATE jobs SET status = ?, progress = ?, result = ?, error = ?, "
+            "lease_expires_at = NULL, updated_at = ? WHERE id = ?",
+            (
+                status,
+                "done" if status == "succeeded" else "failed",
+                (
+                    json.dumps(result, separators=(",", ":"))
+                    if result is not None
+                    else None
+                ),
+                error,
+                time.time(),
+                job_id,
+            ),
+        )
+
+
+class JobWorkers:
+    """A pool of asyncio workers that process a JobQueue.
+
+    handler(payload, set_progress) runs one job and returns its result,
+    awaiting set_progress(progress) to report how far it got. Exceptions
+    for which is_transient returns True are retried with backoff, anything
+    else fails the job. Idle workers poll the queue, and wake() lets a new
+    job start without waiting for the next poll.
+
+    Queue calls run in threads, so a database busy with other processes
+    holds up the workers but not the event loop. A worker that can't reach
+    the database backs off and tries again.
+    """
+
+    def __init__(
+        self,
+        queue: JobQueue,
+        handler,
+        workers: int = 4,
+        poll_interval: float = 1.0,
+        is_transient=None,
+        error_backoff_max: float = 30,
+    ):
+        self.queue = queue
+        self.handler = handler
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.is_transient = is_transient or (lambda error: False)
+        self.error_backoff_max = error_backoff_max
+
+        self._wakeup = asyncio.Event()
+        self._tasks = []
+        self.active = 0
+        self.retries = 0
+        self.queue_errors = 0
+
+    def start(self):
+        self._tasks = [asyncio.create_task(self._work()) for _ in range(self.workers)]
+
+    def wake(self):
+        self._wakeup.set()
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "active": self.active,
+            "retries": self.retries,
+            "queueErrors": self.queue_errors,
+            "jobs": self.queue.stats(),
+        }
+
+    async def _work(self):
+        failures = 0
+        while True:
+            try:
+                claimed = await asyncio.to_thread(self.queue.claim)
+            except sqlite3.Error as e:
+                # e.g. "database is locked" while other processes hold it
+                self.queue_errors += 1
+                failures += 1
+                delay = min(
+                    self.error_backoff_max, self.poll_interval * 2 ** (failures - 1)
+                )
+                print(f"Could not claim a job, retrying in {delay:.1f}s: {e}")
+                await asyncio.sleep(delay)
+                continue
+            failures = 0
+
+            if claimed is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            job_id, payload, attempt = claimed
+            self.active += 1
+            try:
+                await self._run(job_id, payload, attempt)
+            except sqlite3.Error as e:
+                # The lease runs out and the job is picked up again
+                self.queue_errors += 1
+                print(f"Could not record the outcome of job {job_id}: {e}")
+            finally:
+                self.active -= 1
+
+    async def _run(self, job_id: str, payload: dict, attempt: int):
+        heartbeat = asyncio.create_task(self._heartbeat(job_id))
+
+        async def set_progress(progress: str):
+            await asyncio.to_thread(self.queue.set_progress, job_id, progress)
+
+        try:
+            result = await self.handler(payload, set_progress)
+        except asyncio.CancelledError:
+            await asyncio.to_thread(self.queue.release, job_id)
+            raise
+        except Exception as e:
+            if self.is_transient(e):
+                delay = await asyncio.to_thread(
+                    self.queue.retry, job_id, attempt, str(e)
+                )
+                if delay is not None:
+                    self.retries += 1
+                    print(
+                        f"Job {job_id} attempt {attempt} failed, retrying in {delay:.1f}s: {e}"
+                    )
+                    return
+            else:
+                await asyncio.to_thread(self.queue.fail, job_id, str(e))
+            print(f"Job {job_id} failed: {e}")
+        else:
+            await asyncio.to_thread(self.queue.complete, job_id, result)
+        finally:
+            heartbeat.cancel()
+
+    async def _heartbeat(self, job_id: str):
+        while True:
+            await asyncio.sleep(self.queue.lease_seconds / 3)
+            try:
+                await asyncio.to_thread(self.queue.heartbeat, job_id)
+            except sqlite3.Error as e:
+                # The next beat may get through before the lease runs out
+                self.queue_errors += 1
+                print(f"Could not renew the lease of job {job_id}: {e}")
@@ -0,0 +1,197 @@
+import json
+import re
+
+# Only these characters can change the scanner state, everything else is skipped
+STRUCTURAL = re.compile(r'[{}\[\]",\\]')
+
+CODE_FENCE = re.compile(r"```[a-zA-Z]*")
+
+
+class JSONScanner:
+    """Track JSON nesting over a stream of text in a single forward pass.
+
+    Strings are only tracked inside brackets, so quotes and apostrophes in the
+    surrounding prose don't confuse the scanner. Positions are absolute
+    offsets into everything fed so far.
+    """
+
+    def __init__(self):
+        self.offset = 0
+        self.stack = []
+        self.in_string = False
+        self.escape_pending = False
+
+    def scan(self, chunk: str):
+        """Yield (position, character) for each structural character outside strings"""
+        if not chunk:
+            return
+
+        # A backslash ending the previous chunk escapes this chunk's first character
+        start = 1 if self.escape_pending else 0
+        self.escape_pending = False
+        escaped_position = -1
+
+        for match in STRUCTURAL.finditer(chunk, start):
+            char = match.group()
+            position = match.start()
+            if self.in_string:
+                # Escaped quotes and backslashes don't end the string
+                if position == escaped_position:
+                    continue
+                if char == "\\":
+                    escaped_position = position + 1
+                    self.escape_pending = escaped_position == len(chunk)
+                elif char == '"':
+                    self.in_string = False
+                continue
+
+            if char == '"':
+                if self.stack:
+                    self.in_string = True
+                continue
+            if char == "\\":
+                continue
+
+            yield self.offset + position, char
+
+        self.offset += len(chunk)
+
+
+def find_json_objects(text: str) -> tuple[list[tuple[int, int]], int | None]:
+    """Find every balanced {...} in the text and where a truncated object starts.
+
+    Returns the (start, end) spans and the start of the outermost object
+    still open at the end of the text, if any. Nested spans are kept: an
+    unbalanced brace in the prose can wrap the real object in a larger span
+    that is not valid JSON.
+    """
+    scanner = JSONScanner()
+    spans = []
+    for position, char in scanner.scan(text):
+        if char in "{[":
+            scanner.stack.append((char, position))
+        elif char in "}]":
+            if not scanner.stack:
+                continue
+            opener, start = scanner.stack.pop()
+            if (opener, char) != ("{", "}") and (opener, char) != ("[", "]"):
+                # Mismatched bracket, the text here is not JSON
+                scanner.stack.clear()
+                continue
+            if opener == "{":
+                spans.append((start, position + 1))
+
+    unclosed = next((start for char, start in scanner.stack if char == "{"), None)
+    return spans, unclosed
+
+
+def extract_json(text: str) -> tuple[str, dict]:
+    """Split a model response into its prose and the largest valid JSON object.
+
+    When the response was cut off inside an object, its completed top-level
+    members are recovered instead of returning one of its nested objects.
+    """
+    spans, unclosed = find_json_objects(text)
+    if unclosed is not None:
+        spans.append((unclosed, len(text)))
+
+    for start, end in sorted(spans, key=lambda span: span[0] - span[1]):
+        candidate = text[start:end]
+        if start == unclosed and end == len(text):
+            stream = ObjectMemberStream()
+            stream.feed(candidate)
+            data = stream.members
+            # Any malformed member means the brace was not the start of JSON
+            if not data or stream.skipped:
+                continue
+        else:
+            try:
+                data = json.loads(candidate)
+            except json.JSONDecodeError:
+                # Raw newlines and tabs inside strings are a common model mistake
+                try:
+                    data = json.loads(candidate, strict=False)
+                except json.JSONDecodeError:
+                    continue
+            if not isinstance(data, dict):
+                continue
+
+        prose = text[:start] + text[end:]
+        return strip_code_fences(prose), data
+
+    return strip_code_fences(text), {}
+
+
+def strip_code_fences(text: str) -> str:
+    """Remove leftover markdown code fences and surrounding whitespace"""
+    return CODE_FENCE.sub("", text).strip()
+
+
+class ObjectMemberStream:
+    """Incrementally parse the top-level members of a streamed JSON object.
+
+    feed() accepts arbitrary chunks of the object's text and returns the
+    (key, value) pairs completed by that chunk. Only the text of the member
+    currently being generated is buffered, so the whole stream is processed
+    in linear time. Members that are not valid JSON are counted in skipped.
+    """
+
+    def __init__(self):
+        self.scanner = JSONScanner()
+        self.chunks = []
+        self.chunks_offset = 0
+        self.member_start = None
+        self.closed = False
+        self.members = {}
+        self.skipped = 0
+
+    def feed(self, chunk: str) -> list[tuple[str, object]]:
+        if self.closed:
+            return []
+
+        self.chunks.append(chunk)
+        completed = []
+        text = None
+        for position, char in self.scanner.scan(chunk):
+            stack = self.scanner.stack
+            if char in "{[":
+                stack.append(char)
+                if len(stack) == 1 and char == "{":
+                    self.member_start = position + 1
+            elif char in "}]" or (char == "," and len(stack) == 1):
+                if char != ",":
+                    if stack:
+                        stack.pop()
+                    if stack:
+                        continue
+
+                # Join the pending chunks at most once per feed
+                if text is None:
+                    text = "".join(self.chunks)
+                self._complete(text, position, completed)
+                self.member_start = position + 1
+                if not stack:
+                    self.closed = True
+                    break
+
+        # Drop the text of members that are already parsed
+        if text is not None:
+            self.chunks = [text[self.member_start - self.chunks_offset :]]
+            self.chunks_offset = self.member_start
+        return completed
+
+    def _complete(self, text: str, position: int, completed: list):
+        if self.member_start is None:
+            return
+        member = text[
+            self.member_start - self.chunks_offset : position - self.chunks_offset
+        ]
+        if not member.strip():
+            return
+        try:
+            ((key, value),) = json.loads("{" + member + "}", strict=False).items()
+        except (json.JSONDecodeError, ValueError):
+            self.skipped += 1
+            return
+        self.members[key] = value
+        completed.append((key, value))
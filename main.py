@@ -1,16 +1,269 @@
-from fastapi import FastAPI, UploadFile, Form, File
+from fastapi import FastAPI, UploadFile, Form, File, Header, HTTPException, Response
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from typing import List
+from contextlib import asynccontextmanager, contextmanager
+import asyncio
 import json
 import os
-from anthropic import Anthropic
-import pymupdf  # Changed from fitz to pymupdf
-import tempfile  # Add this import
-import tempfile  # Add this import
-import docx2txt  # Add this import for DOCX support
-import subprocess
-
-app = FastAPI()
+import sys
+import time
+import httpx
+from anthropic import (
+    APIConnectionError,
+    APIStatusError,
+    AsyncAnthropic,
+    DefaultAsyncHttpxClient,
+)
+from cache import TieredCache, hash_key
+from compaction import compact_job_description
+from extraction import ExtractionPool, file_extension
+from jobs import JobQueue, JobWorkers
+from json_extractor import ObjectMemberStream, extract_json
+from metrics import CONTENT_TYPE, MetricsMiddleware, Registry
+from render_client import RenderPool, render_cache, zip_bundle
+from resume_format import (
+    FIELD_SECTIONS,
+    RESUME_TOOL,
+    RESUME_TOOL_NAME,
+    SECTION_FIELDS,
+    SECTION_NAMES,
+    render_resume_text,
+    render_section,
+)
+from resume_model import Resume
+from streaming import sse_event
+from tracing import (
+    TracingMiddleware,
+    configure as configure_tracing,
+    current_traceparent,
+    http_event_hooks,
+    span,
+)
+from template_registry import DEFAULT_TEMPLATE, TemplateDataError, TemplateRegistry
+from uploads import BodyLimitMiddleware, Upload, read_upload
+
+ANTHROPIC_MODEL = "claude-3-5-sonnet-20241022"
+
+# Connection pool and concurrency limits for the shared Anthropic client
+ANTHROPIC_MAX_CONNECTIONS = int(os.environ.get("ANTHROPIC_MAX_CONNECTIONS", "100"))
+ANTHROPIC_MAX_KEEPALIVE = int(os.environ.get("ANTHROPIC_MAX_KEEPALIVE", "20"))
+ANTHROPIC_MAX_CONCURRENCY = int(os.environ.get("ANTHROPIC_MAX_CONCURRENCY", "64"))
+ANTHROPIC_TIMEOUT = float(os.environ.get("ANTHROPIC_TIMEOUT", "120"))
+
+# Output budget of a generation; the whole resume tool call has to fit, a
+# call cut off at the limit is an error rather than a shorter resume
+GENERATION_MAX_TOKENS = int(os.environ.get("GENERATION_MAX_TOKENS", "8192"))
+
+# Token budget for the job description after compaction
+JOB_DESCRIPTION_TOKENS = int(os.environ.get("JOB_DESCRIPTION_TOKENS", "2000"))
+
+# Bump whenever the prompt or response parsing changes so stale results are not served
+PROMPT_VERSION = "4"
+
+# Generated resume cache; set RESULT_CACHE_DB to share it between workers and restarts
+RESULT_CACHE_SIZE = int(os.environ.get("RESULT_CACHE_SIZE", "256"))
+RESULT_CACHE_TTL = float(os.environ.get("RESULT_CACHE_TTL", "86400"))
+RESULT_CACHE_DB = os.environ.get("RESULT_CACHE_DB")
+
+# One resume tailored to many jobs: generations in flight per batch request
+BATCH_CONCURRENCY = int(os.environ.get("BATCH_CONCURRENCY", "8"))
+BATCH_MAX_JOBS = int(os.environ.get("BATCH_MAX_JOBS", "50"))
+
+# Extracted resume text keyed by SHA-256 of the uploaded bytes
+TEXT_CACHE_MB = int(os.environ.get("TEXT_CACHE_MB", "64"))
+TEXT_CACHE_TTL = float(os.environ.get("TEXT_CACHE_TTL", str(7 * 86400)))
+TEXT_CACHE_DB = os.environ.get("TEXT_CACHE_DB")
+
+# Uploads are read in chunks and hashed as they stream; larger ones are
+# rejected with 413. The request body may exceed the file by the form's
+# other fields (a batch's job descriptions), up to MAX_FORM_FIELDS_MB.
+MAX_UPLOAD_MB = int(os.environ.get("MAX_UPLOAD_MB", "10"))
+MAX_FORM_FIELDS_MB = int(os.environ.get("MAX_FORM_FIELDS_MB", "2"))
+UPLOAD_CHUNK_KB = int(os.environ.get("UPLOAD_CHUNK_KB", "64"))
+
+# Upload text extraction runs in worker processes with hard per-file limits
+EXTRACTION_WORKERS = int(os.environ.get("EXTRACTION_WORKERS", "2"))
+EXTRACTION_TIMEOUT = float(os.environ.get("EXTRACTION_TIMEOUT", "30"))
+EXTRACTION_MEMORY_MB = int(os.environ.get("EXTRACTION_MEMORY_MB", "1024"))
+PDF_PAGES_PER_TASK = int(os.environ.get("PDF_PAGES_PER_TASK", "10"))
+
+# Background jobs are persisted in SQLite so they survive restarts
+JOB_DB = os.environ.get("JOB_DB", "jobs.db")
+JOB_WORKERS = int(os.environ.get("JOB_WORKERS", "4"))
+JOB_MAX_ATTEMPTS = int(os.environ.get("JOB_MAX_ATTEMPTS", "5"))
+JOB_LEASE_SECONDS = float(os.environ.get("JOB_LEASE_SECONDS", "60"))
+JOB_BACKOFF_BASE = float(os.environ.get("JOB_BACKOFF_BASE", "2"))
+JOB_BACKOFF_MAX = float(os.environ.get("JOB_BACKOFF_MAX", "300"))
+
+# Document rendering: threads for the blocking SDK calls, and the backoff used
+# while polling Adobe for a merge job's status
+RENDER_POOL_WORKERS = int(os.environ.get("RENDER_POOL_WORKERS", "8"))
+RENDER_POLL_INITIAL = float(os.environ.get("RENDER_POLL_INITIAL", "0.5"))
+RENDER_POLL_MAX = float(os.environ.get("RENDER_POLL_MAX", "5"))
+RENDER_POLL_FACTOR = float(os.environ.get("RENDER_POLL_FACTOR", "2"))
+RENDER_TIMEOUT = float(os.environ.get("RENDER_TIMEOUT", "120"))
+
+# Prometheus metrics served at /metrics, one registry per worker process
+registry = Registry()
+STAGE_SECONDS = registry.histogram(
+    "resume_stage_seconds", "Time spent in each pipeline stage", ["stage"]
+)
+STAGE_IN_FLIGHT = registry.gauge(
+    "resume_stage_in_flight", "Pipeline stages currently running", ["stage"]
+)
+# Waiting for a free generation slot
+QUEUE_SECONDS = STAGE_SECONDS.labels("generation_queue")
+TIME_TO_FIRST_TOKEN = registry.histogram(
+    "anthropic_time_to_first_token_seconds",
+    "Time from sending a streamed generation to its first content delta",
+).labels()
+ANTHROPIC_TOKENS = registry.counter(
+    "anthropic_tokens_total", "Tokens reported in message.usage", ["type"]
+)
+UPLOAD_BYTES = registry.histogram(
+    "resume_upload_bytes",
+    "Size of uploaded resume files",
+    ["format"],
+    buckets=[2**n * 1024 for n in range(0, 15, 2)],
+)
+EXTRACTED_CHARS = registry.histogram(
+    "resume_extracted_chars",
+    "Characters of text extracted from uploaded resumes",
+    ["format"],
+    buckets=[1000, 2500, 5000, 10_000, 25_000, 50_000, 100_000, 250_000],
+)
+HTTP_IN_FLIGHT = registry.gauge(
+    "http_requests_in_flight", "HTTP requests currently being served"
+).labels()
+HTTP_DURATION = registry.histogram(
+    "http_request_duration_seconds",
+    "Time to serve each HTTP request, including streamed bodies",
+    ["method", "route", "status"],
+)
+# Values the components already count, copied into the registry on scrape
+CACHE_HITS = registry.counter("cache_hits_total", "Cache hits", ["cache"])
+CACHE_MISSES = registry.counter("cache_misses_total", "Cache misses", ["cache"])
+CACHE_HIT_RATIO = registry.gauge(
+    "cache_hit_ratio", "Share of cache lookups that hit", ["cache"]
+)
+CACHE_ENTRIES = registry.gauge("cache_entries", "Entries held in memory", ["cache"])
+POOL_PENDING = registry.gauge(
+    "pool_pending", "Tasks submitted to a worker pool and not finished", ["pool"]
+)
+GENERATIONS_IN_FLIGHT = registry.gauge(
+    "anthropic_generations_in_flight", "Generation slots in use"
+).labels()
+UPLOAD_FORMATS = ("pdf", "docx", "doc", "txt")
+
+
+@contextmanager
+def stage(name: str):
+    """Run a pipeline stage as a span, timing it into resume_stage_seconds"""
+    with span(name), STAGE_SECONDS.labels(name).time(STAGE_IN_FLIGHT.labels(name)):
+        yield
+
+
+def upload_format(filename: str | None) -> str:
+    # Bounded label values, whatever the uploaded file is called
+    extension = file_extension(filename)
+    return extension if extension in UPLOAD_FORMATS else "other"
+
+
+def create_anthropic_client() -> AsyncAnthropic:
+    """Create an async Anthropic client backed by a keep-alive connection pool"""
+    http_client = DefaultAsyncHttpxClient(
+        limits=httpx.Limits(
+            max_connections=ANTHROPIC_MAX_CONNECTIONS,
+            max_keepalive_connections=ANTHROPIC_MAX_KEEPALIVE,
+            keepalive_expiry=30,
+        ),
+        # Every attempt, retries included, is a span carrying the trace context
+        event_hooks=http_event_hooks("anthropic"),
+    )
+    return AsyncAnthropic(
+        api_key=os.environ.get("ANTHROPIC_API_KEY"),
+        http_client=http_client,
+        timeout=ANTHROPIC_TIMEOUT,
+    )
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    configure_tracing("backend")
+    # One pooled client per worker process, shared by every request
+    app.state.anthropic = create_anthropic_client()
+    app.state.generation_slots = asyncio.Semaphore(ANTHROPIC_MAX_CONCURRENCY)
+    app.state.usage_stats = {
+        "requests": 0,
+        "inputTokens": 0,
+        "outputTokens": 0,
+        "cacheWriteTokens": 0,
+        "cacheReadTokens": 0,
+        "generationSeconds": 0.0,
+    }
+    app.state.result_cache = TieredCache(
+        "results",
+        max_entries=RESULT_CACHE_SIZE,
+        ttl=RESULT_CACHE_TTL,
+        db_path=RESULT_CACHE_DB,
+    )
+    app.state.text_cache = TieredCache(
+        "texts",
+        max_entries=100_000,
+        ttl=TEXT_CACHE_TTL,
+        db_path=TEXT_CACHE_DB,
+        max_bytes=TEXT_CACHE_MB * 1024 * 1024,
+        sizeof=sys.getsizeof,
+    )
+    app.state.extraction_pool = ExtractionPool(
+        max_workers=EXTRACTION_WORKERS,
+        timeout=EXTRACTION_TIMEOUT,
+        memory_limit_mb=EXTRACTION_MEMORY_MB,
+        pages_per_task=PDF_PAGES_PER_TASK,
+    )
+    app.state.job_queue = JobQueue(
+        JOB_DB,
+        lease_seconds=JOB_LEASE_SECONDS,
+        max_attempts=JOB_MAX_ATTEMPTS,
+        backoff_base=JOB_BACKOFF_BASE,
+        backoff_max=JOB_BACKOFF_MAX,
+    )
+    app.state.job_workers = JobWorkers(
+        app.state.job_queue,
+        run_rebuild_job,
+        workers=JOB_WORKERS,
+        is_transient=is_transient_error,
+    )
+    app.state.job_workers.start()
+    app.state.templates = TemplateRegistry()
+    app.state.render_pool = RenderPool(
+        max_workers=RENDER_POOL_WORKERS,
+        poll_initial=RENDER_POLL_INITIAL,
+        poll_max=RENDER_POLL_MAX,
+        poll_factor=RENDER_POLL_FACTOR,
+        timeout=RENDER_TIMEOUT,
+    )
+    try:
+        yield
+    finally:
+        # Stopped workers put their jobs back on the queue for the next start
+        await app.state.job_workers.stop()
+        app.state.job_queue.close()
+        await app.state.anthropic.close()
+        app.state.result_cache.close()
+        app.state.text_cache.close()
+        app.state.extraction_pool.shutdown()
+        app.state.render_pool.shutdown()
+        render_cache.close()
+
+
+app = FastAPI(lifespan=lifespan)
+app.add_middleware(TracingMiddleware)
+app.add_middleware(MetricsMiddleware, in_flight=HTTP_IN_FLIGHT, duration=HTTP_DURATION)
+app.add_middleware(
+    BodyLimitMiddleware, max_bytes=(MAX_UPLOAD_MB + MAX_FORM_FIELDS_MB) * 1024 * 1024
+)
 
 
 class CompanyBackground(BaseModel):
@@ -19,126 +272,107 @@ class CompanyBackground(BaseModel):
     size: str
 
 
-def summarize_text(text: str, max_length=8000) -> str:
-    if not text:
-        return ""
+class RenderRequest(BaseModel):
+    resumeJson: dict
+    template: str = DEFAULT_TEMPLATE
+    # "pdf", "docx", or "zip" for both in one archive
+    format: str = "pdf"
 
-    paragraphs = [p.strip() for p in text.split("\n") if p.strip()]
 
-    if not paragraphs:
-        return ""
+async def receive_upload(old_resume: UploadFile) -> Upload:
+    with stage("upload"):
+        return await read_upload(
+            old_resume,
+            max_bytes=MAX_UPLOAD_MB * 1024 * 1024,
+            chunk_bytes=UPLOAD_CHUNK_KB * 1024,
+        )
 
-    result = ""
-    current_length = 0
 
-    for paragraph in paragraphs:
-        # Estimate tokens (roughly 0.25 tokens per character)
-        estimated_tokens = len(paragraph) * 0.25
+async def extract_resume(upload: Upload) -> tuple[str, str, bool]:
+    """Return the hash, text and cache status of an uploaded resume"""
+    resume_hash = upload.sha256
+    text = await app.state.text_cache.get(resume_hash)
+    if text is not None:
+        return resume_hash, text, True
+
+    file_format = upload_format(upload.filename)
+    UPLOAD_BYTES.labels(file_format).observe(upload.size)
+    with stage("extraction"):
+        text = await app.state.extraction_pool.extract(upload.source, upload.filename)
+    EXTRACTED_CHARS.labels(file_format).observe(len(text))
+    # Failed extractions may succeed on a retry, don't keep them, and never
+    # pass the error text on to be tailored as if it were the resume
+    if text.startswith("Error:"):
+        raise HTTPException(status_code=422, detail=text.removeprefix("Error:").strip())
+    app.state.text_cache.set(resume_hash, text)
+    return resume_hash, text, False
+
+
+async def read_resume_upload(
+    old_resume: UploadFile | None, resume_hash: str | None = None
+) -> str:
+    # Reuse previously extracted text when the client references it by hash
+    if not old_resume and resume_hash:
+        text = await app.state.text_cache.get(resume_hash)
+        if text is None:
+            raise HTTPException(
+                status_code=404,
+                detail="Unknown resume hash, upload the resume file again",
+            )
+        return text
 
-        if current_length + estimated_tokens > max_length:
-            break
+    # Read the old resume content if provided
+    if not old_resume:
+        return ""
 
-        result += paragraph + "\n"
-        current_length += estimated_tokens
+    with await receive_upload(old_resume) as upload:
+        _, text, _ = await extract_resume(upload)
+    return text
 
-    return result.strip()
 
+# Static instructions and output schema. They come first and never change
+# between requests, so Anthropic can cache them as a shared prompt prefix.
+RESUME_INSTRUCTIONS = f"""Create a tailored resume based on the resume content, job description and company backgrounds provided after these instructions.
 
-@app.post("/api/rebuild-resume")
-async def rebuild_resume(
-    job_description: str = Form(...),
-    companies: str = Form(...),
-    old_resume: UploadFile | None = File(None),
-):
-    # Parse the companies JSON string
-    companies_data = json.loads(companies)
+First, extract the following personal information from the original resume:
+- Full Name
+- Role
+- Address
+- Email address
+- LinkedIn profile
+- Phone number
+- Current/previous companies worked at
+- Universities attended
+- Degrees earned
 
-    # Read the old resume content if provided
-    old_resume_content = ""
-    if old_resume:
-        content = await old_resume.read()
-        file_extension = (
-            old_resume.filename.split(".")[-1].lower() if old_resume.filename else ""
-        )
+Then, create a professional resume that STRONGLY MATCHES the job requirements and aligns with the Company Backgrounds. The primary focus should be on highlighting experiences, skills, and achievements that directly relate to the job description. Use the extracted personal information in the new resume.
 
-        # Handle different file types
-        if file_extension in ["pdf"]:
-            # Handle PDF files using PyMuPDF
-            try:
-                with tempfile.NamedTemporaryFile(delete=False) as temp_file:
-                    temp_file.write(content)
-                    temp_path = temp_file.name
-
-                doc = pymupdf.open(temp_path)  # Changed from fitz.open to pymupdf.open
-                old_resume_content = ""
-                for page in doc:
-                    old_resume_content += page.get_text()
-                doc.close()
-
-                # Clean up temp file
-                os.unlink(temp_path)
-            except Exception as e:
-                print(f"Error reading PDF file: {e}")
-                old_resume_content = "Error: Could not read PDF file."
+Save the resume by calling the {RESUME_TOOL_NAME} tool, filling its fields as follows:
+- name: The person's full name
+- role: The person's professional role/title (Sometimes you generate like that "Senior Software Engineer - Mapping & Localization", But this is not correct. you don't need to add any explanation after role)
+- email, phone, address, linkedin: Contact details from the extracted info. If the extracted info does not contain Linkedin or Phone, leave them empty. Just only use contact info from extracted info.
+- summary: A brief, tailored summary highlighting key qualifications for the job and how they fit with the companies' industries and sizes, but does not include 'Versatile'
+- skills: Main skill categories, each with a category name and a comma-separated string of specific skills, for example:
+  - category "Mobile Development", skills "React Native, iOS, Android"
+  - category "Frontend", skills "React.js, TypeScript, JavaScript"
+  Prioritize skills mentioned in the job description and valuable to the companies' industries and sizes.
+- experience: Relevant work experience, tailoring descriptions to match job requirements and company backgrounds. Each entry contains:
+  - company: Company name
+  - location: Location of the company
+  - role: Job title/role at the company (Should show career progression, starting from junior positions and advancing to more senior roles. For example: 1."Fullstack Engineer" → "Senior FullStack Engineer" → "Senior Fullstack Engineer" 2. "Frontend Engineer" → "FullStack Engineer" → "Senior Fullstack Engineer")
+  - period: Employment period (e.g., "2020 - Present")
+  - responsibilities: 9 or 10 bullet points per each company. Each bullet point should be detailed and substantial (30-35 words each), describing specific achievements with metrics where possible. For example: "Implemented a secure authentication system with Node.js and OAuth 2.0, achieving HIPAA compliance and reducing account-related support inquiries by 25%."
+- education: Education details including universities and degrees, each entry containing institution, degree, field, yearEnd and, when available, location, yearStart and gpa
 
-        elif file_extension in ["doc", "docx"]:
-            # Handle DOC/DOCX files
-            try:
-                with tempfile.NamedTemporaryFile(
-                    delete=False, suffix=f".{file_extension}"
-                ) as temp_file:
-                    temp_file.write(content)
-                    temp_path = temp_file.name
-
-                if file_extension == "docx":
-                    # Use docx2txt for DOCX files
-                    old_resume_content = docx2txt.process(temp_path)
-                else:  # DOC files
-                    # Use antiword for DOC files if available, otherwise try textract
-                    try:
-                        # Try antiword first (needs to be installed on the system)
-                        old_resume_content = subprocess.check_output(
-                            ["antiword", temp_path], stderr=subprocess.STDOUT
-                        ).decode("utf-8", errors="replace")
-                    except (subprocess.SubprocessError, FileNotFoundError):
-                        try:
-                            # Fallback to textract if available
-                            import textract
-
-                            old_resume_content = textract.process(temp_path).decode(
-                                "utf-8", errors="replace"
-                            )
-                        except ImportError:
-                            old_resume_content = "Error: Could not process DOC file. Please install antiword or textract."
-
-                # Clean up temp file
-                os.unlink(temp_path)
-            except Exception as e:
-                print(f"Error handling DOC/DOCX file: {e}")
-                old_resume_content = f"Error: Could not process DOC/DOCX file: {str(e)}"
+Focus HEAVILY on relevant experience and skills that match the job description and align with the backgrounds of all companies. For each bullet point in the experience section, ensure it demonstrates a skill or achievement that is valuable for the target position. Highlight versatility and adaptability to different company sizes and industries.
+When you generate experience, you need to update user's role at each company based on generated experience(user's role is limited to senior level, not lead level).
+"""
 
-        else:
-            # Handle text-based files with different encodings
-            try:
-                # Try UTF-8 first
-                old_resume_content = content.decode("utf-8")
-            except UnicodeDecodeError:
-                try:
-                    # Try Windows-1252 encoding (common in Windows documents)
-                    old_resume_content = content.decode("cp1252")
-                except UnicodeDecodeError:
-                    try:
-                        # Try Latin-1 (ISO-8859-1) as a fallback - it can decode any byte
-                        old_resume_content = content.decode("latin-1")
-                    except Exception as e:
-                        # If all else fails, log the error and use an empty string
-                        print(f"Error decoding resume file: {e}")
-                        old_resume_content = (
-                            "Error: Could not read resume file encoding."
-                        )
-    # Summarize text to avoid token limits
-    summarized_job_description = summarize_text(job_description, 2000)
 
+def build_prompt(
+    old_resume_content: str, summarized_job_description: str, companies_data: list
+) -> list[dict]:
+    """Build the user message as content blocks ordered from most to least reusable"""
     # Format companies information
     companies_info = ""
     for i, company in enumerate(companies_data):
@@ -149,164 +383,599 @@ Industry: {company.get('background', '')}
 Company_Size: {company.get('size', '')}
 """
 
-    # Create the prompt for Claude with updated instructions
-    prompt = f"""Create a tailored resume based on the following information:
-
-Resume Content:
-{old_resume_content}
-
-Job Description:
+    # Cache breakpoints after the instructions and after the resume, so tailoring
+    # the same resume to another job only pays for the job-specific block
+    return [
+        {
+            "type": "text",
+            "text": RESUME_INSTRUCTIONS,
+            "cache_control": {"type": "ephemeral"},
+        },
+        {
+            "type": "text",
+            "text": f"Resume Content:\n{old_resume_content}",
+            "cache_control": {"type": "ephemeral"},
+        },
+        {
+            "type": "text",
+            "text": f"""Job Description:
 {summarized_job_description}
 
 Company Backgrounds:
-{companies_info}
+{companies_info}""",
+        },
+    ]
 
-First, extract the following personal information from the original resume:
-- Full Name
-- Role
-- Address
-- Email address
-- LinkedIn profile
-- Phone number
-- Current/previous companies worked at
-- Universities attended
-- Degrees earned
 
-Then, create a professional resume that STRONGLY MATCHES the job requirements and aligns with the Company Backgrounds. The primary focus should be on highlighting experiences, skills, and achievements that directly relate to the job description. Use the extracted personal information in the new resume.
+def generation_params(prompt: list[dict]) -> dict:
+    """Request parameters for a resume generation, forcing the structured tool output"""
+    return {
+        "model": ANTHROPIC_MODEL,
+        "max_tokens": GENERATION_MAX_TOKENS,
+        "tools": [RESUME_TOOL],
+        "tool_choice": {"type": "tool", "name": RESUME_TOOL_NAME},
+        "messages": [{"role": "user", "content": prompt}],
+    }
 
-Format the resume as follows:
 
-[Full Name]
-[Role](Sometimes you generate like that "Senior Software Engineer - Mapping & Localization", But this is not correct. you don't need to add any explanation after role)
+class IncompleteGeneration(Exception):
+    """The model stopped at max_tokens, before the resume was complete"""
 
-[Address]
-[Email] | [Phone] | [LinkedIn]
+    def __init__(self):
+        super().__init__(
+            f"The generated resume was cut off at {GENERATION_MAX_TOKENS} tokens"
+        )
 
-Summary:
-[A brief, tailored summary highlighting key qualifications for the job and how they fit with the companies' industries and sizes, but does not include 'Versatile']
 
-Skills:
-[Format the skills section with main skill categories and specific skills under each category, like this:
-- Category Name: Skill 1, Skill 2, Skill 3
-- Another Category: Skill 4, Skill 5, Skill 6
-For example:
-- Mobile Development: React Native, iOS, Android
-- Frontend: React.js, TypeScript, JavaScript
-Prioritize skills mentioned in the job description and valuable to the companies' industries and sizes]
+def record_usage(usage, seconds: float):
+    """Accumulate token usage so prompt cache savings can be verified"""
+    cache_write = usage.cache_creation_input_tokens or 0
+    cache_read = usage.cache_read_input_tokens or 0
+
+    stats = app.state.usage_stats
+    stats["requests"] += 1
+    stats["inputTokens"] += usage.input_tokens
+    stats["outputTokens"] += usage.output_tokens
+    stats["cacheWriteTokens"] += cache_write
+    stats["cacheReadTokens"] += cache_read
+    stats["generationSeconds"] += seconds
+
+    ANTHROPIC_TOKENS.labels("input").inc(usage.input_tokens)
+    ANTHROPIC_TOKENS.labels("output").inc(usage.output_tokens)
+    ANTHROPIC_TOKENS.labels("cache_write").inc(cache_write)
+    ANTHROPIC_TOKENS.labels("cache_read").inc(cache_read)
+
+    print(
+        f"Claude usage: input={usage.input_tokens} cache_write={cache_write} "
+        f"cache_read={cache_read} output={usage.output_tokens} in {seconds:.1f}s"
+    )
+
+
+def normalize_resume(json_data: dict) -> dict:
+    """Resolve the shape variations of the model's resume JSON once.
+
+    Everything downstream (cache, clients, rendering) gets the Resume
+    model's compact layout, so nothing has to re-sniff the shapes.
+    """
+    return Resume.from_json(json_data).to_json() if json_data else {}
+
+
+def parse_resume_response(resume_content: str) -> tuple[str, dict]:
+    """Split the model response into the resume text and its JSON structure"""
+    resume_content, json_data = extract_json(resume_content)
+    if not json_data:
+        print("No JSON object found in the response")
+    return resume_content, normalize_resume(json_data)
+
+
+def parse_message(message) -> tuple[str, dict]:
+    """Read the resume JSON from the tool call and render its text locally"""
+    for block in message.content:
+        if block.type == "tool_use" and block.name == RESUME_TOOL_NAME:
+            json_data = normalize_resume(block.input)
+            return render_resume_text(json_data), json_data
+
+    # Fall back to a plain text response that embeds the JSON
+    text = "".join(block.text for block in message.content if block.type == "text")
+    return parse_resume_response(text)
+
+
+def result_cache_key(
+    old_resume_content: str, summarized_job_description: str, companies_data: list
+) -> str:
+    # Normalize companies so key order and stray whitespace don't cause misses
+    companies_normalized = [
+        {
+            field: str(company.get(field, "")).strip()
+            for field in ("name", "background", "size")
+        }
+        for company in companies_data
+    ]
+    return hash_key(
+        old_resume_content,
+        summarized_job_description,
+        companies_normalized,
+        ANTHROPIC_MODEL,
+        PROMPT_VERSION,
+    )
+
+
+def bypass_cache(cache_control: str | None) -> bool:
+    return bool(cache_control) and "no-cache" in cache_control.lower()
+
+
+@asynccontextmanager
+async def generation_slot():
+    """Wait for a free generation slot, counting it as in flight while held"""
+    queued = time.perf_counter()
+    async with app.state.generation_slots:
+        QUEUE_SECONDS.observe(time.perf_counter() - queued)
+        GENERATIONS_IN_FLIGHT.inc()
+        try:
+            yield
+        finally:
+            GENERATIONS_IN_FLIGHT.dec()
+
+
+async def generate_resume(
+    old_resume_content: str,
+    job_description: str,
+    companies_data: list,
+    use_cache: bool = True,
+) -> tuple[dict, bool]:
+    """Generate a tailored resume, returning the result and whether it was cached"""
+    # Keep the job description within its token budget, favouring the parts
+    # relevant to this resume
+    with stage("compaction"):
+        summarized_job_description = compact_job_description(
+            job_description, JOB_DESCRIPTION_TOKENS, reference=old_resume_content
+        )
 
-Experience:
-[List relevant work experience, tailoring descriptions to match job requirements and company backgrounds. When you generate experience, it needs to contain 9 or 10 bullets per each company. Each bullet point should be detailed and substantial (30-35 words each), describing specific achievements with metrics where possible. For example: "Implemented a secure authentication system with Node.js and OAuth 2.0, achieving HIPAA compliance and reducing account-related support inquiries by 25%."]
+    cache_key = result_cache_key(
+        old_resume_content, summarized_job_description, companies_data
+    )
+    if use_cache:
+        cached = await app.state.result_cache.get(cache_key)
+        if cached is not None:
+            return cached, True
+
+    prompt = build_prompt(
+        old_resume_content, summarized_job_description, companies_data
+    )
+
+    # Call Claude API on the shared client, waiting for a free slot first
+    async with generation_slot():
+        start = time.perf_counter()
+        with stage("generation"):
+            message = await app.state.anthropic.messages.create(
+                **generation_params(prompt)
+            )
+        record_usage(message.usage, time.perf_counter() - start)
 
-Education:
-[List education details including universities and degrees]
+    # A truncated tool call still parses, but misses its later sections
+    if message.stop_reason == "max_tokens":
+        raise IncompleteGeneration()
 
+    # Extract resume content from response
+    with stage("parse"):
+        resume_content, json_data = parse_message(message)
+    result = {"resumeContent": resume_content, "resumeJson": json_data}
 
-Focus HEAVILY on relevant experience and skills that match the job description and align with the backgrounds of all companies. For each bullet point in the experience section, ensure it demonstrates a skill or achievement that is valuable for the target position. Highlight versatility and adaptability to different company sizes and industries.
-When you generate experience, you need to update user's role at each company based on generated experience(user's role is limited to senior level, not lead level).
+    # Responses without the JSON structure are worth retrying, don't keep them
+    if json_data:
+        app.state.result_cache.set(cache_key, result)
+    return result, False
 
-If the extracted info does not contain Linkedin or Phone, then you don't need to generate them. Just only use contact info from extracted info.
-You have to generate only resume, not include explanation about extract information from old resume, not include explanation about your response and 
 
-Additionally, after creating the resume, please also provide the same information in a structured JSON format with the following fields:
-- name: The person's full name
-- role: The person's professional role/title
-- email: Email address
-- phone: Phone number (if available)
-- address: Physical address
-- linkedin: LinkedIn profile (if available)
-- summary: A brief professional summary
-- skills: A list of relevant skills as an array of objects, where each object contains:
-  - category: The skill category name
-  - skills: A comma-separated string of skills in that category
-  (This must match exactly with the skills listed in the resume text, in the format:
-   "- Category Name: Skill 1, Skill 2, Skill 3")
-- experience: An array of work experiences, where each experience contains:
-  - company: Company name
-  - location: Location of the company
-  - role: Job title/role at the company (Should show career progression, starting from junior positions and advancing to more senior roles. For example: 1."Fullstack Engineer" → "Senior FullStack Engineer" → "Senior Fullstack Engineer" 2. "Frontend Engineer" → "FullStack Engineer" → "Senior Fullstack Engineer")
-  - period: Employment period (e.g., "2020 - Present")
-  - responsibilities: An array of bullet points describing achievements and responsibilities
-    (These MUST be EXACTLY the same bullet points that appear in the resume text. Each bullet point should be detailed and substantial (30-35 words each), describing specific achievements with metrics where possible.)
-- education: An array of education details, where each entry contains:
-  - location: Location of the institution (optional)
-  - institution: Name of the educational institution
-  - degree: Degree obtained
-  - field: Field of study
-  - yearStart: Start year (optional)
-  - yearEnd: Graduation year
-  - gpa: GPA if available (optional)
-
-Please provide both the formatted resume text AND the JSON structure.
-"""
+@app.post("/api/rebuild-resume")
+async def rebuild_resume(
+    response: Response,
+    job_description: str = Form(...),
+    companies: str = Form(...),
+    old_resume: UploadFile | None = File(None),
+    resume_hash: str | None = Form(None),
+    cache_control: str | None = Header(None),
+):
+    # Parse the companies JSON string
+    companies_data = json.loads(companies)
+
+    old_resume_content = await read_resume_upload(old_resume, resume_hash)
 
     try:
-        # Initialize Anthropic client
-        anthropic = Anthropic(api_key=os.environ.get("ANTHROPIC_API_KEY"))
-
-        # Call Claude API
-        message = anthropic.messages.create(
-            model="claude-3-5-sonnet-20241022",
-            max_tokens=4096,
-            messages=[{"role": "user", "content": prompt}],
+        result, cached = await generate_resume(
+            old_resume_content,
+            job_description,
+            companies_data,
+            use_cache=not bypass_cache(cache_control),
         )
+        response.headers["X-Cache"] = "HIT" if cached else "MISS"
 
-        # Extract resume content from response
-        resume_content = message.content[0].text
+        # Return both the cleaned resume content and JSON data
+        return result
 
-        # Try to extract JSON from the response
-        json_data = {}
-        try:
-            # Look for JSON block in the response
-            import re
+    except IncompleteGeneration as e:
+        raise HTTPException(status_code=502, detail=str(e))
+    except Exception as e:
+        return {"error": f"An error occurred during resume rebuilding: {str(e)}"}, 500
 
-            # First try to find JSON in a code block
-            json_match = re.search(
-                r"```(?:json)?\s*(\{[\s\S]*?\})\s*```", resume_content, re.DOTALL
-            )
-            if json_match:
-                json_text = json_match.group(1)
-                json_data = json.loads(json_text)
-                # Remove the JSON block from the resume content
-                resume_content = re.sub(
-                    r"```(?:json)?\s*\{[\s\S]*?\}\s*```",
-                    "",
-                    resume_content,
-                    flags=re.DOTALL,
-                ).strip()
-            else:
-                # Try to find a standalone JSON object (looking for a complete JSON structure with education field)
-                json_match = re.search(
-                    r'(\{[\s\S]*?"education"\s*:\s*\[[\s\S]*?\]\s*\})',
-                    resume_content,
-                    re.DOTALL,
+
+def section_event(section: str, resume_json: dict) -> str:
+    return sse_event(
+        "section",
+        {"section": section, "content": render_section(section, resume_json)},
+    )
+
+
+async def cached_resume_events(result: dict):
+    """Replay a cached result as the same events a live generation produces"""
+    for section in SECTION_NAMES:
+        yield section_event(section, result["resumeJson"])
+    yield sse_event("done", result)
+
+
+def completed_sections(members: dict) -> int:
+    """Count the leading sections whose fields are all generated.
+
+    A section is also complete once a field of any later section shows up,
+    which covers optional fields the model leaves out.
+    """
+    latest = max(
+        (
+            SECTION_NAMES.index(FIELD_SECTIONS[field])
+            for field in members
+            if field in FIELD_SECTIONS
+        ),
+        default=0,
+    )
+    if all(field in members for field in SECTION_FIELDS[SECTION_NAMES[latest]]):
+        return latest + 1
+    return latest
+
+
+async def stream_resume_events(prompt: list[dict], cache_key: str):
+    """Generate server-sent events for a streamed resume generation"""
+    sections_sent = 0
+    members = ObjectMemberStream()
+    text_parts = []
+    try:
+        async with generation_slot():
+            start = time.perf_counter()
+            usage = None
+            stop_reason = None
+            first_token = True
+            with stage("generation"):
+                stream = await app.state.anthropic.messages.create(
+                    **generation_params(prompt), stream=True
                 )
-                if json_match:
-                    json_text = json_match.group(1)
-                    try:
-                        json_data = json.loads(json_text)
-                        # Remove the JSON object from the resume content
-                        resume_content = resume_content.replace(json_text, "").strip()
-                    except json.JSONDecodeError:
-                        # If direct parsing fails, try to clean the text
-                        cleaned_json = re.sub(r"[\n\r\t]+", " ", json_text)
-                        json_data = json.loads(cleaned_json)
-                        resume_content = resume_content.replace(json_text, "").strip()
-        except Exception as json_error:
-            print(f"Error parsing JSON from response: {json_error}")
-
-        # Clean up any remaining JSON-like content or markdown artifacts
-        resume_content = re.sub(
-            r"^\s*\{[\s\S]*\}\s*$", "", resume_content, flags=re.MULTILINE
-        ).strip()
-        resume_content = re.sub(
-            r"^\s*```.*?```\s*$", "", resume_content, flags=re.MULTILINE | re.DOTALL
-        ).strip()
+                async for event in stream:
+                    if event.type == "message_start":
+                        usage = event.message.usage
+                    elif event.type == "message_delta":
+                        stop_reason = event.delta.stop_reason
+                        if usage is not None:
+                            usage.output_tokens = event.usage.output_tokens
+                    elif event.type == "content_block_delta":
+                        if first_token:
+                            first_token = False
+                            TIME_TO_FIRST_TOKEN.observe(time.perf_counter() - start)
+                        if event.delta.type == "text_delta":
+                            text_parts.append(event.delta.text)
+                            continue
+                        if event.delta.type != "input_json_delta":
+                            continue
+
+                        # Each tool input chunk is scanned once; sections are
+                        # rendered as soon as their members are complete
+                        if members.feed(event.delta.partial_json):
+                            complete = completed_sections(members.members)
+                            while sections_sent < complete:
+                                yield section_event(
+                                    SECTION_NAMES[sections_sent], members.members
+                                )
+                                sections_sent += 1
+            if usage is not None:
+                record_usage(usage, time.perf_counter() - start)
+        if members.skipped:
+            print(f"Skipped {members.skipped} malformed members in the tool input")
+        if stop_reason == "max_tokens":
+            raise IncompleteGeneration()
+
+        with stage("parse"):
+            if members.members:
+                json_data = normalize_resume(members.members)
+                resume_content = render_resume_text(json_data)
+            else:
+                # Fall back to a plain text response that embeds the JSON
+                resume_content, json_data = parse_resume_response("".join(text_parts))
 
-        # Return both the cleaned resume content and JSON data
-        return {"resumeContent": resume_content, "resumeJson": json_data}
+        for section in SECTION_NAMES[sections_sent:]:
+            yield section_event(section, json_data)
+
+        result = {"resumeContent": resume_content, "resumeJson": json_data}
+        if json_data:
+            app.state.result_cache.set(cache_key, result)
+        yield sse_event("done", result)
 
     except Exception as e:
-        return {"error": f"An error occurred during resume rebuilding: {str(e)}"}, 500
+        yield sse_event(
+            "error", {"error": f"An error occurred during resume rebuilding: {str(e)}"}
+        )
+
+
+@app.post("/api/rebuild-resume/stream")
+async def rebuild_resume_stream(
+    job_description: str = Form(...),
+    companies: str = Form(...),
+    old_resume: UploadFile | None = File(None),
+    resume_hash: str | None = Form(None),
+    cache_control: str | None = Header(None),
+):
+    companies_data = json.loads(companies)
+
+    old_resume_content = await read_resume_upload(old_resume, resume_hash)
+    with stage("compaction"):
+        summarized_job_description = compact_job_description(
+            job_description, JOB_DESCRIPTION_TOKENS, reference=old_resume_content
+        )
+
+    # Keep proxies from buffering the event stream
+    headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+    cache_key = result_cache_key(
+        old_resume_content, summarized_job_description, companies_data
+    )
+    if not bypass_cache(cache_control):
+        cached = await app.state.result_cache.get(cache_key)
+        if cached is not None:
+            return StreamingResponse(
+                cached_resume_events(cached),
+                media_type="text/event-stream",
+                headers={**headers, "X-Cache": "HIT"},
+            )
+
+    prompt = build_prompt(
+        old_resume_content, summarized_job_description, companies_data
+    )
+    return StreamingResponse(
+        stream_resume_events(prompt, cache_key),
+        media_type="text/event-stream",
+        headers={**headers, "X-Cache": "MISS"},
+    )
+
+
+async def batch_result_lines(old_resume_content: str, jobs_data: list, use_cache: bool):
+    """Run one generation per job and yield NDJSON lines as each finishes"""
+    batch_slots = asyncio.Semaphore(BATCH_CONCURRENCY)
+
+    async def run_job(index: int, job: dict) -> dict:
+        async with batch_slots:
+            try:
+                result, cached = await generate_resume(
+                    old_resume_content,
+                    job.get("job_description", ""),
+                    job.get("companies", []),
+                    use_cache=use_cache,
+                )
+                return {"index": index, "status": "ok", "cached": cached, **result}
+            except Exception as e:
+                return {"index": index, "status": "error", "error": str(e)}
+
+    tasks = [
+        asyncio.create_task(run_job(index, job)) for index, job in enumerate(jobs_data)
+    ]
+    failures = []
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            line = await next_done
+            if line["status"] == "error":
+                failures.append({"index": line["index"], "error": line["error"]})
+            yield json.dumps(line, separators=(",", ":")) + "\n"
+
+        summary = {
+            "total": len(jobs_data),
+            "succeeded": len(jobs_data) - len(failures),
+            "failed": sorted(failures, key=lambda failure: failure["index"]),
+        }
+        yield json.dumps({"summary": summary}, separators=(",", ":")) + "\n"
+    finally:
+        # Stop outstanding generations if the client went away
+        for task in tasks:
+            task.cancel()
+
+
+@app.post("/api/rebuild-resume/batch")
+async def rebuild_resume_batch(
+    jobs: str = Form(...),
+    old_resume: UploadFile | None = File(None),
+    resume_hash: str | None = Form(None),
+    cache_control: str | None = Header(None),
+):
+    # jobs is a JSON list of {"job_description": ..., "companies": [...]}
+    try:
+        jobs_data = json.loads(jobs)
+    except json.JSONDecodeError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid jobs JSON: {e}")
+    if not isinstance(jobs_data, list) or not all(
+        isinstance(job, dict) for job in jobs_data
+    ):
+        raise HTTPException(status_code=400, detail="jobs must be a list of objects")
+    if len(jobs_data) > BATCH_MAX_JOBS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"A batch can contain at most {BATCH_MAX_JOBS} jobs",
+        )
+
+    # Extract the resume once and share it between every job
+    old_resume_content = await read_resume_upload(old_resume, resume_hash)
+
+    return StreamingResponse(
+        batch_result_lines(
+            old_resume_content, jobs_data, use_cache=not bypass_cache(cache_control)
+        ),
+        media_type="application/x-ndjson",
+    )
+
+
+def is_transient_error(error: Exception) -> bool:
+    """Whether an Anthropic error is worth retrying: rate limits, overload, outages"""
+    if isinstance(error, APIConnectionError):
+        return True
+    if isinstance(error, APIStatusError):
+        return error.status_code in (408, 409, 429) or error.status_code >= 500
+    return False
+
+
+async def run_rebuild_job(payload: dict, set_progress) -> dict:
+    await set_progress("generating")
+    # Continue the trace of the request that queued the job
+    with span("job", payload.get("traceparent")):
+        result, cached = await generate_resume(
+            payload["oldResumeContent"],
+            payload["jobDescription"],
+            payload["companies"],
+            use_cache=payload["useCache"],
+        )
+    return {**result, "cached": cached}
+
+
+@app.post("/api/jobs", status_code=202)
+async def create_job(
+    response: Response,
+    job_description: str = Form(...),
+    companies: str = Form(...),
+    old_resume: UploadFile | None = File(None),
+    resume_hash: str | None = Form(None),
+    cache_control: str | None = Header(None),
+):
+    try:
+        companies_data = json.loads(companies)
+    except json.JSONDecodeError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid companies JSON: {e}")
+
+    # The extracted text goes into the job so it doesn't depend on the text cache
+    old_resume_content = await read_resume_upload(old_resume, resume_hash)
+    job_id = await asyncio.to_thread(
+        app.state.job_queue.enqueue,
+        {
+            "oldResumeContent": old_resume_content,
+            "jobDescription": job_description,
+            "companies": companies_data,
+            "useCache": not bypass_cache(cache_control),
+            "traceparent": current_traceparent(),
+        },
+    )
+    app.state.job_workers.wake()
+
+    response.headers["Location"] = f"/api/jobs/{job_id}"
+    return {"id": job_id, "status": "queued"}
+
+
+@app.get("/api/jobs/{job_id}")
+async def get_job(job_id: str):
+    job = await asyncio.to_thread(app.state.job_queue.get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown job id")
+    return job
+
+
+@app.post("/api/extract")
+async def extract(old_resume: UploadFile = File(...)):
+    with await receive_upload(old_resume) as upload:
+        resume_hash, text, cached = await extract_resume(upload)
+    return {"resumeHash": resume_hash, "resumeText": text, "cached": cached}
+
+
+RENDER_FORMATS = {
+    "pdf": "application/pdf",
+    "docx": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+}
+
+
+@app.post("/api/render")
+async def render(request: RenderRequest):
+    if request.format not in RENDER_FORMATS and request.format != "zip":
+        raise HTTPException(
+            status_code=400, detail=f"Unsupported format: {request.format}"
+        )
+
+    # Format once, even when both documents are rendered, and send the
+    # template only the fields it uses
+    try:
+        with stage("template"):
+            template, resume_data = app.state.templates.prepare(
+                request.template, request.resumeJson
+            )
+    except KeyError:
+        raise HTTPException(
+            status_code=404, detail=f"Unknown template: {request.template}"
+        )
+    except TemplateDataError as e:
+        raise HTTPException(
+            status_code=422, detail=f"Resume data doesn't fit the template: {e}"
+        )
+
+    try:
+        with stage("render"):
+            if request.format == "zip":
+                documents = await app.state.render_pool.render_bundle(
+                    template.path,
+                    resume_data,
+                    list(RENDER_FORMATS),
+                )
+                content, media_type = zip_bundle(documents), "application/zip"
+            else:
+                media_type = RENDER_FORMATS[request.format]
+                content = await app.state.render_pool.render(
+                    template.path, resume_data, request.format
+                )
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=504, detail="Rendering timed out")
+    except RuntimeError as e:
+        print(f"Error rendering {request.format} document: {e}")
+        raise HTTPException(status_code=502, detail=f"Rendering failed: {e}")
+
+    return Response(
+        content=content,
+        media_type=media_type,
+        headers={
+            "Content-Disposition": f'attachment; filename="rebuilt_resume.{request.format}"'
+        },
+    )
+
+
+@app.get("/api/stats")
+async def stats():
+    return {
+        "resultCache": app.state.result_cache.stats(),
+        "textCache": app.state.text_cache.stats(),
+        "usage": app.state.usage_stats,
+        "extraction": app.state.extraction_pool.stats(),
+        "jobs": app.state.job_workers.stats(),
+        "render": app.state.render_pool.stats(),
+        "templates": app.state.templates.stats(),
+    }
+
+
+def collect_component_metrics():
+    """Copy the counters the caches and pools keep into the registry"""
+    for name, cache_stats in (
+        ("results", app.state.result_cache.stats()),
+        ("texts", app.state.text_cache.stats()),
+        ("renders", app.state.render_pool.stats()["cache"]),
+    ):
+        CACHE_HITS.labels(name).set(cache_stats["hits"])
+        CACHE_MISSES.labels(name).set(cache_stats["misses"])
+        CACHE_HIT_RATIO.labels(name).set(cache_stats["hitRatio"])
+        CACHE_ENTRIES.labels(name).set(cache_stats["entries"])
+    POOL_PENDING.labels("extraction").set(app.state.extraction_pool.pending)
+    POOL_PENDING.labels("render").set(app.state.render_pool.pending)
+    POOL_PENDING.labels("jobs").set(app.state.job_workers.active)
+
+
+@app.get("/metrics")
+async def metrics():
+    collect_component_metrics()
+    return Response(content=registry.render(), media_type=CONTENT_TYPE)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,245 @@
+import time
+from bisect import bisect_left
+
+# Latency buckets in seconds, from cache hits up to slow generations
+DEFAULT_BUCKETS = (
+    0.001,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1,
+    2.5,
+    5,
+    10,
+    20,
+    40,
+    80,
+)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def escape(value: str, quotes: bool = True) -> str:
+    value = value.replace("\\", "\\\\").replace("\n", "\\n")
+    return value.replace('"', '\\"') if quotes else value
+
+
+def format_labels(names: tuple, values: tuple) -> str:
+    pairs = [f'{name}="{escape(str(value))}"' for name, value in zip(names, values)]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Value:
+    """One labelled series of a counter or gauge"""
+
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0
+
+    def inc(self, amount: float = 1):
+        self.value += amount
+
+    def dec(self, amount: float = 1):
+        self.value -= amount
+
+    def set(self, value: float):
+        self.value = value
+
+
+class Buckets:
+    """One labelled series of a histogram.
+
+    Observations only bump a single bucket; the cumulative counts the text
+    format needs are added up when the metrics are scraped.
+    """
+
+    __slots__ = ("bounds", "counts", "sum")
+
+    def __init__(self, bounds: tuple):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+
+    def time(self, in_flight: Value | None = None) -> "Timer":
+        return Timer(self, in_flight)
+
+
+class Timer:
+    """Time a block into a histogram, counting it in a gauge while it runs"""
+
+    __slots__ = ("buckets", "in_flight", "start")
+
+    def __init__(self, buckets: Buckets, in_flight: Value | None):
+        self.buckets = buckets
+        self.in_flight = in_flight
+
+    def __enter__(self):
+        if self.in_flight is not None:
+            self.in_flight.value += 1
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.buckets.observe(time.perf_counter() - self.start)
+        if self.in_flight is not None:
+            self.in_flight.value -= 1
+
+
+class Metric:
+    """A metric family with a fixed set of label names.
+
+    Resolve the series once with labels() and keep it where it's used, the
+    hot path then costs an attribute update.
+    """
+
+    kind = "untyped"
+
+    def __init__(self, name: str, help_text: str, label_names=()):
+        self.name = name
+        self.help = help_text
+        self.label_names = tuple(label_names)
+        self._series = {}
+
+    def _new_series(self):
+        return Value()
+
+    def labels(self, *values):
+        series = self._series.get(values)
+        if series is None:
+            if len(values) != len(self.label_names):
+                raise ValueError(
+                    f"{self.name} takes labels {self.label_names}, got {values}"
+                )
+            series = self._series[values] = self._new_series()
+        return series
+
+    def samples(self):
+        for values, series in sorted(self._series.items()):
+            yield self.name, format_labels(self.label_names, values), series.value
+
+
+class Counter(Metric):
+    kind = "counter"
+
+
+class Gauge(Metric):
+    kind = "gauge"
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help_text, label_names=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help_text, label_names)
+        self.bounds = tuple(sorted(buckets))
+        self._le = [
+            f'le="{format_value(float(bound))}"}}'
+            for bound in self.bounds + (float("inf"),)
+        ]
+
+    def _new_series(self):
+        return Buckets(self.bounds)
+
+    def samples(self):
+        bucket_name = f"{self.name}_bucket"
+        for values, series in sorted(self._series.items()):
+            labels = format_labels(self.label_names, values)
+            # The le label goes last, inside the series' own braces
+            prefix = labels[:-1] + "," if labels else "{"
+            total = 0
+            for le, count in zip(self._le, series.counts):
+                total += count
+                yield bucket_name, prefix + le, total
+            yield f"{self.name}_sum", labels, series.sum
+            yield f"{self.name}_count", labels, total
+
+
+class Registry:
+    """The metrics of one process, rendered in the Prometheus text format.
+
+    Every uvicorn worker keeps its own registry, like the numbers behind
+    /api/stats, so each worker has to be scraped (or the workers reduced to
+    one per container) to see the whole deployment.
+    """
+
+    def __init__(self):
+        self._metrics = {}
+
+    def _register(self, metric: Metric) -> Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help_text: str, label_names=()) -> Counter:
+        return self._register(Counter(name, help_text, label_names))
+
+    def gauge(self, name: str, help_text: str, label_names=()) -> Gauge:
+        return self._register(Gauge(name, help_text, label_names))
+
+    def histogram(
+        self, name: str, help_text: str, label_names=(), buckets=DEFAULT_BUCKETS
+    ) -> Histogram:
+        return self._register(Histogram(name, help_text, label_names, buckets))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {escape(metric.help, quotes=False)}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, labels, value in metric.samples():
+                lines.append(f"{name}{labels} {format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+class MetricsMiddleware:
+    """ASGI middleware counting requests in flight and timing each route.
+
+    Requests are labelled with the route's path template, so ids in the URL
+    don't create a series per request.
+    """
+
+    def __init__(self, app, in_flight: Value, duration: Histogram):
+        self.app = app
+        self.in_flight = in_flight
+        self.duration = duration
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        self.in_flight.value += 1
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            self.in_flight.value -= 1
+            route = scope.get("route")
+            path = getattr(route, "path", None) or "unmatched"
+            self.duration.labels(scope["method"], path, str(status)).observe(
+                time.perf_counter() - start
+            )
@@ -0,0 +1,254 @@
+import asyncio
+import hashlib
+import io
+import logging
+import os
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+
+from cache import TieredCache, hash_key
+from docx_merge import docx_to_pdf, merge_template
+from tracing import span
+
+# "adobe" merges with Adobe Document Generation, "local" with docx_merge
+RENDER_BACKEND = os.environ.get("RENDER_BACKEND", "adobe")
+
+# Rendered documents, shared by every session in the process
+RENDER_CACHE_MB = int(os.environ.get("RENDER_CACHE_MB", "64"))
+RENDER_CACHE_TTL = float(os.environ.get("RENDER_CACHE_TTL", "86400"))
+RENDER_CACHE_DB = os.environ.get("RENDER_CACHE_DB")
+
+render_cache = TieredCache(
+    "renders",
+    max_entries=10_000,
+    ttl=RENDER_CACHE_TTL,
+    db_path=RENDER_CACHE_DB,
+    encode=bytes,
+    decode=bytes,
+    max_bytes=RENDER_CACHE_MB * 1024 * 1024,
+    sizeof=len,
+)
+
+# path -> (mtime_ns, size, sha256), so unchanged files aren't re-hashed
+_template_hashes = {}
+
+
+def template_hash(template_path: str) -> str:
+    """SHA-256 of a template file, recomputed only when the file changes"""
+    stat = os.stat(template_path)
+    cached = _template_hashes.get(template_path)
+    if cached and cached[:2] == (stat.st_mtime_ns, stat.st_size):
+        return cached[2]
+
+    with open(template_path, "rb") as file:
+        digest = hashlib.sha256(file.read()).hexdigest()
+    _template_hashes[template_path] = (stat.st_mtime_ns, stat.st_size, digest)
+    return digest
+
+
+def render_key(template_path: str, resume_data: dict, output_format: str) -> str:
+    return hash_key(
+        RENDER_BACKEND, template_hash(template_path), resume_data, output_format
+    )
+
+
+class RenderError(RuntimeError):
+    """A document the render backend failed to produce"""
+
+
+def zip_bundle(documents: dict[str, bytes], name: str = "rebuilt_resume") -> bytes:
+    """Pack the documents of a bundle into one zip archive"""
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+        for extension, document in documents.items():
+            archive.writestr(f"{name}.{extension}", document)
+    return buffer.getvalue()
+
+
+class RenderPool:
+    """Render documents for the API on a bounded pool of threads.
+
+    The blocking SDK calls (template upload, job submission, status checks
+    and download) and local merges run on the pool, but waiting for an Adobe
+    job happens on the event loop: its status is polled with exponential
+    backoff, so a slow job doesn't hold a thread while it runs.
+
+    Documents are cached by template content, resume data and format, and
+    concurrent requests for the same document share one render.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = 8,
+        poll_initial: float = 0.5,
+        poll_max: float = 5.0,
+        poll_factor: float = 2.0,
+        timeout: float = 120,
+    ):
+        self.max_workers = max_workers
+        self.poll_initial = poll_initial
+        self.poll_max = poll_max
+        self.poll_factor = poll_factor
+        self.timeout = timeout
+
+        self.pending = 0
+        self.in_flight = 0
+        self.rendered = 0
+        self.cache_hits = 0
+        self.polls = 0
+        self.timeouts = 0
+        self.errors = 0
+        # render key -> task rendering that document
+        self._renders = {}
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="render-api"
+        )
+
+    async def _run(self, func, *args):
+        # Open the span on the event loop, the pool's threads don't inherit it
+        self.pending += 1
+        try:
+            with span(func.__name__):
+                return await asyncio.wrap_future(self._executor.submit(func, *args))
+        finally:
+            self.pending -= 1
+
+    async def _wait_for_job(self, client, asset, resume_data, output_format: str):
+        with span("adobe merge", kind="client"):
+            location = await self._run(client.submit, asset, resume_data, output_format)
+            delay = self.poll_initial
+            while True:
+                await asyncio.sleep(delay)
+                self.polls += 1
+                if await self._run(client.is_done, location):
+                    return await self._run(client.download, location)
+                delay = min(self.poll_max, delay * self.poll_factor)
+
+    async def _merge(
+        self, template_path: str, resume_data: dict, output_format: str
+    ) -> bytes:
+        # The Adobe SDK is only needed, and imported, by the Adobe backend
+        from adobe_client import (
+            SdkException,
+            ServiceApiException,
+            ServiceUsageException,
+            get_render_client,
+        )
+
+        client = get_render_client()
+        try:
+            digest, asset, uploaded = await self._run(
+                client.template_asset, template_path
+            )
+            try:
+                return await self._wait_for_job(
+                    client, asset, resume_data, output_format
+                )
+            except ServiceApiException as e:
+                if uploaded:
+                    raise
+                # The cached asset may be gone before its TTL ran out
+                logging.warning(f"Merge failed, uploading the template again: {e}")
+                client.invalidate(digest)
+                _, asset, _ = await self._run(client.template_asset, template_path)
+                return await self._wait_for_job(
+                    client, asset, resume_data, output_format
+                )
+        except (ServiceApiException, ServiceUsageException, SdkException) as e:
+            raise RenderError(f"Adobe merge failed: {e}") from e
+
+    async def render(
+        self, template_path: str, resume_data: dict, output_format: str
+    ) -> bytes:
+        """Render one "pdf" or "docx" document without blocking the event loop"""
+        key = render_key(template_path, resume_data, output_format)
+        document = await render_cache.get(key)
+        if document is not None:
+            self.cache_hits += 1
+            return document
+
+        task = self._renders.get(key)
+        if task is None:
+            task = self._renders[key] = asyncio.create_task(
+                self._render(key, template_path, resume_data, output_format)
+            )
+            task.add_done_callback(lambda task: self._render_done(key, task))
+        # A caller that gives up doesn't cancel the render for the others
+        return await asyncio.shield(task)
+
+    def _render_done(self, key: str, task: asyncio.Task):
+        self._renders.pop(key, None)
+        # Retrieved here in case every caller gave up on the task
+        if not task.cancelled():
+            task.exception()
+
+    async def _local(self, template_path: str, resume_data: dict, output_format: str):
+        if output_format == "pdf":
+            # Convert the DOCX instead of merging again; in a bundle, this
+            # waits for the DOCX being rendered next to it. LibreOffice is only
+            # needed here, for PDF output of the local backend.
+            document = await self.render(template_path, resume_data, "docx")
+            return await self._run(docx_to_pdf, document)
+        return await self._run(merge_template, template_path, resume_data)
+
+    async def _render(
+        self, key: str, template_path: str, resume_data: dict, output_format: str
+    ) -> bytes:
+        with span(f"render {output_format}", backend=RENDER_BACKEND):
+            return await self._render_uncached(
+                key, template_path, resume_data, output_format
+            )
+
+    async def _render_uncached(
+        self, key: str, template_path: str, resume_data: dict, output_format: str
+    ) -> bytes:
+        self.in_flight += 1
+        try:
+            render = self._local if RENDER_BACKEND == "local" else self._merge
+            document = await asyncio.wait_for(
+                render(template_path, resume_data, output_format), self.timeout
+            )
+            render_cache.set(key, document)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            raise
+        except Exception:
+            self.errors += 1
+            raise
+        finally:
+            self.in_flight -= 1
+        self.rendered += 1
+        return document
+
+    async def render_bundle(
+        self,
+        template_path: str,
+        resume_data: dict,
+        output_formats=("pdf", "docx"),
+    ) -> dict[str, bytes]:
+        """Render several formats at the same time, by file extension"""
+        documents = await asyncio.gather(
+            *(
+                self.render(template_path, resume_data, output_format)
+                for output_format in output_formats
+            )
+        )
+        return dict(zip(output_formats, documents))
+
+    def stats(self) -> dict:
+        return {
+            "backend": RENDER_BACKEND,
+            "workers": self.max_workers,
+            "pending": self.pending,
+            "queueDepth": max(0, self.pending - self.max_workers),
+            "inFlight": self.in_flight,
+            "rendered": self.rendered,
+            "cacheHits": self.cache_hits,
+            "polls": self.polls,
+            "timeouts": self.timeouts,
+            "errors": self.errors,
+            "cache": render_cache.stats(),
+        }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
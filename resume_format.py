@@ -0,0 +1,203 @@
+RESUME_TOOL_NAME = "save_resume"
+
+# Claude is forced to call this tool, so the tool input is the whole response
+RESUME_TOOL = {
+    "name": RESUME_TOOL_NAME,
+    "description": "Save the tailored resume as structured data.",
+    "input_schema": {
+        "type": "object",
+        "properties": {
+            "name": {"type": "string", "description": "The person's full name"},
+            "role": {
+                "type": "string",
+                "description": "The person's professional role/title, without any explanation after it",
+            },
+            "email": {"type": "string", "description": "Email address"},
+            "phone": {
+                "type": "string",
+                "description": "Phone number, empty if not in the original resume",
+            },
+            "address": {"type": "string", "description": "Physical address"},
+            "linkedin": {
+                "type": "string",
+                "description": "LinkedIn profile, empty if not in the original resume",
+            },
+            "summary": {
+                "type": "string",
+                "description": "A brief professional summary",
+            },
+            "skills": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "category": {
+                            "type": "string",
+                            "description": "The skill category name",
+                        },
+                        "skills": {
+                            "type": "string",
+                            "description": "A comma-separated string of skills in that category",
+                        },
+                    },
+                    "required": ["category", "skills"],
+                },
+            },
+            "experience": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "company": {"type": "string"},
+                        "location": {"type": "string"},
+                        "role": {"type": "string"},
+                        "period": {
+                            "type": "string",
+                            "description": 'Employment period, e.g. "2020 - Present"',
+                        },
+                        "responsibilities": {
+                            "type": "array",
+                            "items": {"type": "string"},
+                        },
+                    },
+                    "required": ["company", "role", "period", "responsibilities"],
+                },
+            },
+            "education": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "location": {"type": "string"},
+                        "institution": {"type": "string"},
+                        "degree": {"type": "string"},
+                        "field": {"type": "string"},
+                        "yearStart": {"type": "string"},
+                        "yearEnd": {"type": "string"},
+                        "gpa": {"type": "string"},
+                    },
+                    "required": ["institution", "degree"],
+                },
+            },
+        },
+        "required": [
+            "name",
+            "role",
+            "email",
+            "summary",
+            "skills",
+            "experience",
+            "education",
+        ],
+    },
+}
+
+# Resume sections in the order they are generated and rendered
+SECTION_NAMES = ["header", "summary", "skills", "experience", "education"]
+
+# The section each top-level JSON field belongs to
+FIELD_SECTIONS = {
+    "name": "header",
+    "role": "header",
+    "email": "header",
+    "phone": "header",
+    "address": "header",
+    "linkedin": "header",
+    "summary": "summary",
+    "skills": "skills",
+    "experience": "experience",
+    "education": "education",
+}
+
+# The top-level JSON fields that make up each section
+SECTION_FIELDS = {
+    section: [field for field, owner in FIELD_SECTIONS.items() if owner == section]
+    for section in SECTION_NAMES
+}
+
+
+def render_header(resume_json: dict) -> str:
+    lines = [resume_json.get("name", ""), resume_json.get("role", ""), ""]
+    if resume_json.get("address"):
+        lines.append(resume_json["address"])
+
+    # Only include the contact fields that exist, without empty separators
+    contact = [
+        resume_json[field]
+        for field in ("email", "phone", "linkedin")
+        if resume_json.get(field)
+    ]
+    lines.append(" | ".join(contact))
+    return "\n".join(lines).strip()
+
+
+def render_skills(skills) -> str:
+    if isinstance(skills, str):
+        return skills
+    lines = []
+    for skill in skills or []:
+        if isinstance(skill, dict):
+            lines.append(f"- {skill.get('category', '')}: {skill.get('skills', '')}")
+        else:
+            lines.append(f"- {skill}")
+    return "\n".join(lines)
+
+
+def render_experience(experience) -> str:
+    if isinstance(experience, str):
+        return experience
+    blocks = []
+    for exp in experience or []:
+        if not isinstance(exp, dict):
+            continue
+        heading = " | ".join(
+            exp[field]
+            for field in ("company", "role", "location", "period")
+            if exp.get(field)
+        )
+        bullets = [f"- {item}" for item in exp.get("responsibilities", [])]
+        blocks.append("\n".join([heading] + bullets))
+    return "\n\n".join(blocks)
+
+
+def render_education(education) -> str:
+    if isinstance(education, str):
+        return education
+    lines = []
+    for edu in education or []:
+        if not isinstance(edu, dict):
+            continue
+        institution = ", ".join(
+            edu[field] for field in ("institution", "location") if edu.get(field)
+        )
+        degree = edu.get("degree", "")
+        if edu.get("field"):
+            degree = f"{degree} in {edu['field']}" if degree else edu["field"]
+        years = " - ".join(
+            str(edu[field]) for field in ("yearStart", "yearEnd") if edu.get(field)
+        )
+        line = " | ".join(part for part in (institution, degree, years) if part)
+        if edu.get("gpa"):
+            line += f" (GPA: {edu['gpa']})"
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def render_section(section: str, resume_json: dict) -> str:
+    """Render one resume section as text, including its heading"""
+    if section == "header":
+        return render_header(resume_json)
+    if section == "summary":
+        return f"Summary:\n{resume_json.get('summary', '')}"
+    if section == "skills":
+        return f"Skills:\n{render_skills(resume_json.get('skills'))}"
+    if section == "experience":
+        return f"Experience:\n{render_experience(resume_json.get('experience'))}"
+    return f"Education:\n{render_education(resume_json.get('education'))}"
+
+
+def render_resume_text(resume_json: dict) -> str:
+    """Render the resume JSON in the plain-text layout shown in the preview"""
+    return "\n\n".join(
+        render_section(section, resume_json) for section in SECTION_NAMES
+    )
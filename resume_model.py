@@ -0,0 +1,240 @@
+import dataclasses
+import logging
+from dataclasses import dataclass
+
+
+def text(value) -> str:
+    if value is None:
+        return ""
+    return value if isinstance(value, str) else str(value)
+
+
+def text_list(value) -> list[str]:
+    if not value:
+        return []
+    if isinstance(value, list):
+        return [text(item) for item in value if item is not None]
+    if isinstance(value, str):
+        # Split by newlines, dropping bullet points
+        lines = []
+        for line in value.split("\n"):
+            line = line.strip()
+            if line.startswith(("•", "-", "*")):
+                line = line[1:].strip()
+            if line:
+                lines.append(line)
+        return lines
+    return [text(value)]
+
+
+def joined(value) -> str:
+    return (
+        ", ".join(text(item) for item in value)
+        if isinstance(value, list)
+        else text(value)
+    )
+
+
+@dataclass(slots=True)
+class SkillGroup:
+    category: str
+    skills: str
+
+    @classmethod
+    def from_line(cls, line: str) -> "SkillGroup":
+        """Parse a "- Category: skill, skill" line, keeping other lines as they are"""
+        line = line.strip()
+        body = line[2:] if line.startswith("- ") else line
+        if ":" not in body:
+            return cls("", line)
+        category, _, skills = body.partition(":")
+        return cls(category.strip(), skills.strip())
+
+    def to_json(self) -> dict:
+        return {"category": self.category, "skills": self.skills}
+
+
+@dataclass(slots=True)
+class Experience:
+    company: str = ""
+    role: str = ""
+    location: str = ""
+    period: str = ""
+    responsibilities: list[str] = dataclasses.field(default_factory=list)
+
+    @classmethod
+    def from_json(cls, data: dict) -> "Experience":
+        return cls(
+            company=text(data.get("company")),
+            role=text(data.get("role")),
+            location=text(data.get("location")),
+            period=text(data.get("period")),
+            responsibilities=text_list(data.get("responsibilities")),
+        )
+
+    def to_json(self) -> dict:
+        return compact(
+            {
+                "company": self.company,
+                "role": self.role,
+                "location": self.location,
+                "period": self.period,
+                "responsibilities": self.responsibilities,
+            }
+        )
+
+
+@dataclass(slots=True)
+class Education:
+    institution: str = ""
+    degree: str = ""
+    field: str = ""
+    location: str = ""
+    gpa: str = ""
+    year_start: str = ""
+    year_end: str = ""
+    year: str = ""
+    details: list[str] = dataclasses.field(default_factory=list)
+
+    @classmethod
+    def from_json(cls, data: dict) -> "Education":
+        details = data.get("details")
+        return cls(
+            institution=text(data.get("institution")),
+            degree=text(data.get("degree")),
+            field=text(data.get("field")),
+            location=text(data.get("location")),
+            gpa=text(data.get("gpa")),
+            year_start=text(data.get("yearStart")),
+            year_end=text(data.get("yearEnd")),
+            year=text(data.get("year")),
+            details=(
+                [text(detail).strip() for detail in details]
+                if isinstance(details, list)
+                else ([text(details).strip()] if details else [])
+            ),
+        )
+
+    def to_json(self) -> dict:
+        return compact(
+            {
+                "institution": self.institution,
+                "degree": self.degree,
+                "field": self.field,
+                "location": self.location,
+                "gpa": self.gpa,
+                "yearStart": self.year_start,
+                "yearEnd": self.year_end,
+                "year": self.year,
+                "details": self.details,
+            }
+        )
+
+
+def parse_skills(skills) -> list[SkillGroup]:
+    """Normalize every skills shape the model produces into category groups"""
+    if not skills:
+        return []
+
+    if isinstance(skills, str):
+        if ("- " in skills and ":" in skills) or (":" in skills and "\n" in skills):
+            return [
+                SkillGroup.from_line(line)
+                for line in skills.split("\n")
+                if line.strip()
+            ]
+        if "," in skills:
+            # Group a plain comma-separated list under a generic category
+            items = [item.strip() for item in skills.split(",") if item.strip()]
+            return [SkillGroup("Skills", ", ".join(items))]
+        return [SkillGroup("", skills)]
+
+    if isinstance(skills, dict):
+        return [
+            SkillGroup(text(category), joined(skill_list))
+            for category, skill_list in skills.items()
+        ]
+
+    groups = []
+    for item in skills if isinstance(skills, list) else [skills]:
+        if isinstance(item, dict):
+            if "category" in item and "skills" in item:
+                groups.append(
+                    SkillGroup(text(item["category"]), joined(item["skills"]))
+                )
+            else:
+                # Each dict maps categories to their skills
+                groups.extend(
+                    SkillGroup(text(category), joined(skill_list))
+                    for category, skill_list in item.items()
+                )
+        elif item:
+            groups.append(SkillGroup("", text(item)))
+    return groups
+
+
+def parse_entries(value, entry_type, section: str) -> list:
+    if not value:
+        return []
+    if not isinstance(value, list):
+        logging.warning(f"Ignoring {section} that is not a list")
+        return []
+    return [entry_type.from_json(item) for item in value if isinstance(item, dict)]
+
+
+def compact(data: dict) -> dict:
+    """Drop empty fields, every reader treats a missing field as empty"""
+    return {key: value for key, value in data.items() if value}
+
+
+@dataclass(slots=True)
+class Resume:
+    """The structured resume, normalized once from the model's JSON.
+
+    Every shape variation the model produces (skills as text, a dict or a
+    list, responsibilities as one string, numeric years) is resolved here, so
+    the template formatters work on fixed types.
+    """
+
+    name: str = ""
+    role: str = ""
+    email: str = ""
+    phone: str = ""
+    address: str = ""
+    linkedin: str = ""
+    summary: str = ""
+    skills: list[SkillGroup] = dataclasses.field(default_factory=list)
+    experience: list[Experience] = dataclasses.field(default_factory=list)
+    education: list[Education] = dataclasses.field(default_factory=list)
+
+    @classmethod
+    def from_json(cls, data: dict) -> "Resume":
+        return cls(
+            name=text(data.get("name")),
+            role=text(data.get("role")),
+            email=text(data.get("email")),
+            phone=text(data.get("phone")),
+            address=text(data.get("address")),
+            linkedin=text(data.get("linkedin")),
+            summary=text(data.get("summary")),
+            skills=parse_skills(data.get("skills")),
+            experience=parse_entries(data.get("experience"), Experience, "experience"),
+            education=parse_entries(data.get("education"), Education, "education"),
+        )
+
+    def to_json(self) -> dict:
+        """The resume as JSON in the tool schema's layout, without empty fields"""
+        return compact(
+            {
+                "name": self.name,
+                "role": self.role,
+                "email": self.email,
+                "phone": self.phone,
+                "address": self.address,
+                "linkedin": self.linkedin,
+                "summary": self.summary,
+                "skills": [group.to_json() for group in self.skills],
+                "experience": [entry.to_json() for entry in self.experience],
+                "education": [entry.to_json() for entry in self.education],
+            }
+        )
@@ -0,0 +1,7 @@
+import json
+
+
+def sse_event(event: str, data) -> str:
+    """Encode one server-sent event with a JSON payload"""
+    payload = json.dumps(data, separators=(",", ":"))
+    return f"event: {event}\ndata: {payload}\n\n"
@@ -0,0 +1,285 @@
+import json
+import logging
+
+from resume_model import Resume
+
+logger = logging.getLogger(__name__)
+
+
+def format_contact_info(data):
+    """Format contact information to avoid empty separators"""
+    # Create a copy of the data to avoid modifying the original
+    formatted_data = data.copy()
+
+    # Create a combined contact field that only includes separators between non-empty fields
+    contact_fields = []
+
+    # Add non-empty fields to the list
+    if formatted_data.get("email"):
+        contact_fields.append(formatted_data["email"])
+
+    if formatted_data.get("phone"):
+        contact_fields.append(formatted_data["phone"])
+
+    if formatted_data.get("address"):
+        contact_fields.append(formatted_data["address"])
+
+    if formatted_data.get("linkedin"):
+        contact_fields.append(formatted_data["linkedin"])
+
+    # Join the non-empty fields with the separator
+    formatted_data["contact_info"] = (
+        " | ".join(contact_fields) if contact_fields else ""
+    )
+
+    return formatted_data
+
+
+def format_skills(skills):
+    """Format skill groups into a string with categories"""
+    return "<br/>".join(
+        f"- {group.category}: {group.skills}" if group.category else group.skills
+        for group in skills
+    )
+
+
+def format_experience(experience):
+    """Format experience entries to match the template structure"""
+    formatted_experience = [
+        {
+            "company": exp.company,
+            "role": exp.role,
+            "location": exp.location,
+            "period": exp.period,
+            # Each responsibility becomes an object with an "item" property
+            "responsibilities": [{"item": resp} for resp in exp.responsibilities],
+        }
+        for exp in experience
+    ]
+
+    # Only build the dump when debug logging is on
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(f"Formatted experience: {json.dumps(formatted_experience)}")
+
+    return formatted_experience
+
+
+def format_education(education, sections=False):
+    """Format education list into appropriate structure based on template.
+
+    sections is True for templates that repeat a section per degree (like
+    resumeTemplate1.docx) and False for those with a single education field.
+    """
+    if sections:
+        return format_education_template1(education)
+    else:
+        return format_education_classic(education)
+
+
+def education_years(edu) -> str:
+    if edu.year_start and edu.year_end:
+        return f"{edu.year_start} - {edu.year_end}"
+    return edu.year_end or edu.year_start or edu.year
+
+
+def format_education_template1(education):
+    """Format education for resumeTemplate1.docx structure"""
+    formatted_education = []
+
+    for edu in education:
+        formatted_edu = {
+            # Create dictionary without 'university' prefix to match template
+            "institution": edu.institution,
+            "field": edu.field,
+            "degree": edu.degree,
+            "location": edu.location,
+            "gpa": edu.gpa,
+            "period": (
+                f"{edu.year_start} - {edu.year_end}"
+                if edu.year_start and edu.year_end
+                else edu.year_end or edu.year
+            ),
+        }
+
+        # Add comma before degree if field exists
+        if formatted_edu["field"] and formatted_edu["degree"]:
+            formatted_edu["degree"] = f", {formatted_edu['degree']}"
+
+        formatted_education.append(formatted_edu)
+
+    return formatted_education
+
+
+def format_education_classic(education):
+    """Format education list into HTML string for classic template"""
+    formatted = []
+    for edu in education:
+        edu_line = []
+
+        # Add styling similar to experience section
+        institution_info = f'<div style="margin-left: 0 !important; padding: 0; text-indent: 0; display: block; width: 100%;"><span style="font-weight: bold">{edu.institution}</span>'
+
+        # Add location if present
+        if edu.location:
+            institution_info += f", {edu.location}"
+
+        # Build degree info
+        degree_info = edu.degree
+        if edu.field:
+            degree_info = f"{degree_info} in {edu.field}" if degree_info else edu.field
+
+        year_info = education_years(edu)
+
+        # Add degree and year info with proper separator
+        if degree_info or year_info:
+            institution_info += " | "
+
+            if degree_info:
+                institution_info += (
+                    f'<span style="font-style: italic">{degree_info}</span>'
+                )
+
+            if year_info:
+                if degree_info:
+                    institution_info += f", {year_info}"
+                else:
+                    institution_info += f"{year_info}"
+
+        institution_info += "</div>"  # Close the div tag
+        edu_line.append(institution_info)
+
+        # Add any additional details if present
+        for detail in edu.details:
+            edu_line.append(
+                f'<div style="margin-left: 0 !important; padding: 0; text-indent: 0; display: block; width: 100%;">• {detail}</div>'
+            )
+
+        formatted.append("<br/>".join(edu_line))
+
+    return "<br/><br/>\n\n".join(formatted)
+
+
+def parse_text_content(content):
+    """Parse text content into structured data"""
+    lines = content.strip().split("\n")
+
+    sections = {
+        "Name": "",
+        "role": "",
+        "email": "",
+        "phone": "",
+        "address": "",
+        "linkedin": "",
+        "summary": "",
+        "skills": "",
+        "experience": "",
+        "education": "",
+    }
+
+    # First line is name
+    if lines and lines[0].strip():
+        sections["Name"] = lines[0].strip()
+
+    # Second line is role
+    if len(lines) > 1 and lines[1].strip():
+        sections["role"] = lines[1].strip()
+
+    # Parse contact info (third line)
+    if len(lines) > 2 and lines[2].strip():
+        contact_line = lines[2].strip()
+        contact_parts = contact_line.split("|")
+        if len(contact_parts) >= 1:
+            sections["email"] = contact_parts[0].strip()
+        if len(contact_parts) >= 2:
+            sections["phone"] = contact_parts[1].strip()
+        if len(contact_parts) >= 3:
+            sections["address"] = contact_parts[2].strip()
+        if len(contact_parts) >= 4:
+            sections["linkedin"] = contact_parts[3].strip()
+
+    # Find section headers and extract content
+    current_section = None
+    section_content = []
+
+    # Start from line 4 (after name, role, and contact info)
+    for i in range(3, len(lines)):
+        line = lines[i].strip()
+
+        # Skip empty lines
+        if not line:
+            continue
+
+        # Check if this line is a section header
+        if (
+            line.upper() == "SUMMARY"
+            or line.upper() == "SKILLS"
+            or line.upper() == "EXPERIENCE"
+            or line.upper() == "EDUCATION"
+        ):
+            # Save previous section content if any
+            if current_section and section_content:
+                sections[current_section.lower()] = "\n".join(section_content).strip()
+                section_content = []
+
+            current_section = line.lower()
+        # Check if line starts with a section header
+        elif (
+            line.upper().startswith("SUMMARY ")
+            or line.upper().startswith("SKILLS ")
+            or line.upper().startswith("EXPERIENCE ")
+            or line.upper().startswith("EDUCATION ")
+        ):
+            # Save previous section content if any
+            if current_section and section_content:
+                sections[current_section.lower()] = "\n".join(section_content).strip()
+                section_content = []
+
+            # Extract the section name
+            if line.upper().startswith("SUMMARY"):
+                current_section = "summary"
+            elif line.upper().startswith("SKILLS"):
+                current_section = "skills"
+            elif line.upper().startswith("EXPERIENCE"):
+                current_section = "experience"
+            elif line.upper().startswith("EDUCATION"):
+                current_section = "education"
+        elif current_section and line:  # Add content to current section
+            section_content.append(line)
+
+    # Save the last section
+    if current_section and section_content:
+        sections[current_section.lower()] = "\n".join(section_content).strip()
+
+    return sections
+
+
+def build_resume_data(content, education_sections=False):
+    """Format the resume (a Resume, its JSON or plain text) into merge data"""
+    if isinstance(content, Resume):
+        resume = content
+    elif isinstance(content, dict):
+        resume = Resume.from_json(content)
+    else:
+        # If content is a string, try to parse it as JSON
+        try:
+            resume = Resume.from_json(json.loads(content))
+        except (json.JSONDecodeError, TypeError, AttributeError):
+            # Fall back to the original text parsing logic
+            logger.warning("Falling back to text parsing for resume content")
+            return {"user": parse_text_content(content)}
+
+    # Format the data to match the template structure
+    formatted_data = {
+        "Name": resume.name,
+        "role": resume.role,
+        "email": resume.email,
+        "phone": resume.phone,
+        "address": resume.address,
+        "linkedin": resume.linkedin,
+        "summary": resume.summary,
+        "skills": format_skills(resume.skills),
+        "experience": format_experience(resume.experience),
+        "education": format_education(resume.education, education_sections),
+    }
+    # Format contact info to avoid empty separators
+    return {"user": format_contact_info(formatted_data)}
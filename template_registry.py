@@ -0,0 +1,155 @@
+import glob
+import os
+
+from docx_merge import template_fields
+from render_client import template_hash
+from template_data import build_resume_data
+
+TEMPLATE_DIR = os.environ.get(
+    "TEMPLATE_DIR", os.path.dirname(os.path.abspath(__file__))
+)
+TEMPLATE_PATTERN = "resumeTemplate*.docx"
+
+# Ids of the bundled templates, any other template is known by its file name
+TEMPLATE_IDS = {
+    "resumeTemplate.docx": "classic",
+    "resumeTemplate1.docx": "professional",
+    "resumeTemplate2.docx": "creative",
+}
+DEFAULT_TEMPLATE = "classic"
+
+SCALAR_TYPES = (str, int, float, bool)
+
+
+class TemplateDataError(ValueError):
+    """Merge data that doesn't match the fields of its template"""
+
+    def __init__(self, problems: list[str]):
+        super().__init__("; ".join(problems))
+        self.problems = problems
+
+
+def shape_paths(shape: dict, prefix: str = "") -> list[str]:
+    """Dotted paths of the fields in a shape, with [] marking sections"""
+    paths = []
+    for key, value in shape.items():
+        path = f"{prefix}{key}"
+        if value is None:
+            paths.append(path)
+        elif isinstance(value, list):
+            paths.extend(shape_paths(value[0], f"{path}[]."))
+        else:
+            paths.extend(shape_paths(value, f"{path}."))
+    return paths
+
+
+def fit_to_shape(value, shape, path: str, problems: list):
+    """Keep only the parts of value the shape uses, noting type mismatches"""
+    if shape is None:
+        if value is not None and not isinstance(value, SCALAR_TYPES):
+            problems.append(f"{path}: expected text, got {type(value).__name__}")
+        return value
+
+    if isinstance(shape, list):
+        # An empty section just renders nothing
+        if not value:
+            return value
+        if not isinstance(value, list):
+            problems.append(f"{path}: expected a list, got {type(value).__name__}")
+            return value
+        return [
+            fit_to_shape(item, shape[0], f"{path}[{index}]", problems)
+            for index, item in enumerate(value)
+        ]
+
+    if not isinstance(value, dict):
+        problems.append(
+            f"{path or 'data'}: expected an object, got {type(value).__name__}"
+        )
+        return value
+    return {
+        key: fit_to_shape(value[key], field, f"{path}.{key}" if path else key, problems)
+        for key, field in shape.items()
+        if key in value
+    }
+
+
+class Template:
+    """A resume template and the merge fields its tags use"""
+
+    def __init__(self, template_id: str, path: str):
+        self.id = template_id
+        self.path = path
+        self.digest = template_hash(path)
+        self.shape = template_fields(path)
+        self.fields = shape_paths(self.shape)
+
+    @property
+    def education_sections(self) -> bool:
+        """Whether education repeats a section per degree instead of one field"""
+        user = self.shape.get("user") or {}
+        return isinstance(user.get("education"), list)
+
+    def prepare(self, content) -> dict:
+        """Format the resume for this template, validate it and drop unused fields"""
+        resume_data = build_resume_data(content, self.education_sections)
+        problems = []
+        resume_data = fit_to_shape(resume_data, self.shape, "", problems)
+        if problems:
+            raise TemplateDataError(problems)
+        return resume_data
+
+
+class TemplateRegistry:
+    """The resume templates by id, each analyzed once when it is loaded.
+
+    A template whose file changes on disk is analyzed again on its next use.
+    """
+
+    def __init__(self, template_dir: str = TEMPLATE_DIR):
+        self.template_dir = template_dir
+        self._templates = {}
+        self.reloads = 0
+        self.rejected = 0
+
+        for path in sorted(glob.glob(os.path.join(template_dir, TEMPLATE_PATTERN))):
+            filename = os.path.basename(path)
+            template_id = TEMPLATE_IDS.get(filename, os.path.splitext(filename)[0])
+            self._templates[template_id] = Template(template_id, path)
+
+    def get(self, template_id: str) -> Template | None:
+        template = self._templates.get(template_id)
+        if template is not None and template_hash(template.path) != template.digest:
+            template = Template(template_id, template.path)
+            self._templates[template_id] = template
+            self.reloads += 1
+        return template
+
+    def prepare(self, template_id: str, content) -> tuple[Template, dict]:
+        """Look a template up and prepare the resume for it.
+
+        Raises KeyError for an unknown template and TemplateDataError when
+        the resume doesn't fit the template's fields.
+        """
+        template = self.get(template_id)
+        if template is None:
+            raise KeyError(template_id)
+        try:
+            return template, template.prepare(content)
+        except TemplateDataError:
+            self.rejected += 1
+            raise
+
+    def stats(self) -> dict:
+        return {
+            "reloads": self.reloads,
+            "rejected": self.rejected,
+            "templates": {
+                template.id: {
+                    "file": os.path.basename(template.path),
+                    "fields": len(template.fields),
+                    "educationSections": template.education_sections,
+                }
+                for template in self._templates.values()
+            },
+        }
@@ -0,0 +1,271 @@
+import contextvars
+import json
+import os
+import re
+import secrets
+import threading
+import time
+from contextlib import contextmanager
+
+# Set TRACE_EXPORTER to "file" (JSON lines in TRACE_FILE) or "console" to
+# record spans; tracing is off otherwise
+TRACE_EXPORTER = os.environ.get("TRACE_EXPORTER", "")
+TRACE_FILE = os.environ.get("TRACE_FILE", "traces.jsonl")
+
+TRACEPARENT_RE = re.compile(r"^([0-9a-f]{2})-([0-9a-f]{32})-([0-9a-f]{16})-[0-9a-f]{2}")
+
+_current_span = contextvars.ContextVar("current_span", default=None)
+
+
+class Span:
+    """One timed operation of a trace, identified as in W3C Trace Context"""
+
+    __slots__ = (
+        "service",
+        "name",
+        "trace_id",
+        "span_id",
+        "parent_id",
+        "kind",
+        "attributes",
+        "start",
+        "duration",
+        "error",
+        "_started",
+    )
+
+    def __init__(self, service, name, trace_id, parent_id, kind, attributes):
+        self.service = service
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent_id
+        self.kind = kind
+        self.attributes = attributes
+        self.start = time.time()
+        self.duration = None
+        self.error = None
+        self._started = time.perf_counter()
+
+    def set(self, key: str, value):
+        self.attributes[key] = value
+
+    def finish(self):
+        self.duration = time.perf_counter() - self._started
+
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-01"
+
+    def to_json(self) -> dict:
+        return {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "parentId": self.parent_id,
+            "service": self.service,
+            "name": self.name,
+            "kind": self.kind,
+            "start": round(self.start, 6),
+            "durationMs": round(self.duration * 1000, 3),
+            "attributes": self.attributes,
+            "error": self.error,
+        }
+
+
+def parse_traceparent(header: str | None) -> tuple[str, str] | None:
+    """The trace and parent span ids of a traceparent header, if it's valid"""
+    match = TRACEPARENT_RE.match(header.strip().lower()) if header else None
+    if not match:
+        return None
+    version, trace_id, parent_id = match.groups()
+    if version == "ff" or trace_id == "0" * 32 or parent_id == "0" * 16:
+        return None
+    return trace_id, parent_id
+
+
+class FileExporter:
+    """Append finished spans to a JSON lines file.
+
+    Every process can append to the same file: each span is one short
+    write, so the lines of concurrent writers don't interleave.
+    """
+
+    def __init__(self, path: str):
+        self._file = open(path, "a", encoding="utf-8")
+        self._lock = threading.Lock()
+
+    def export(self, span: Span):
+        line = json.dumps(span.to_json(), separators=(",", ":")) + "\n"
+        with self._lock:
+            self._file.write(line)
+            self._file.flush()
+
+
+class ConsoleExporter:
+    """Print one line per finished span"""
+
+    def export(self, span: Span):
+        status = f" error={span.error}" if span.error else ""
+        print(
+            f"[trace {span.trace_id[:8]}] {span.service} {span.name} "
+            f"{span.duration * 1000:.1f}ms{status}"
+        )
+
+
+def exporter_from_env():
+    if TRACE_EXPORTER == "file":
+        return FileExporter(TRACE_FILE)
+    if TRACE_EXPORTER == "console":
+        return ConsoleExporter()
+    return None
+
+
+class Tracer:
+    def __init__(self, service: str, exporter=None):
+        self.service = service
+        self.exporter = exporter
+
+    @contextmanager
+    def span(
+        self,
+        name: str,
+        traceparent: str | None = None,
+        kind: str = "internal",
+        **attributes,
+    ):
+        """Run a block as a span, the child of traceparent when given and
+        otherwise of the current span. Yields None when tracing is off."""
+        if self.exporter is None:
+            yield None
+            return
+
+        remote = parse_traceparent(traceparent)
+        current = _current_span.get()
+        if remote:
+            trace_id, parent_id = remote
+        elif current is not None:
+            trace_id, parent_id = current.trace_id, current.span_id
+        else:
+            trace_id, parent_id = secrets.token_hex(16), None
+
+        span = Span(self.service, name, trace_id, parent_id, kind, attributes)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.error = f"{type(e).__name__}: {e}" if str(e) else type(e).__name__
+            raise
+        finally:
+            span.finish()
+            try:
+                _current_span.reset(token)
+            except ValueError:
+                # An abandoned streaming generator is closed from another task
+                pass
+            self.exporter.export(span)
+
+
+tracer = Tracer("resume-rebuilder")
+
+
+def configure(service: str, exporter=None):
+    """Name the spans of this process and start exporting them.
+
+    The exporter defaults to the one TRACE_EXPORTER selects.
+    """
+    tracer.service = service
+    tracer.exporter = exporter if exporter is not None else exporter_from_env()
+
+
+def span(name: str, traceparent: str | None = None, kind: str = "internal", **attrs):
+    return tracer.span(name, traceparent, kind, **attrs)
+
+
+def current_traceparent() -> str | None:
+    current = _current_span.get()
+    return current.traceparent() if current is not None else None
+
+
+def trace_headers() -> dict:
+    """Headers that make the current span the parent of an outgoing call"""
+    traceparent = current_traceparent()
+    return {"traceparent": traceparent} if traceparent else {}
+
+
+def start_span(name: str, kind: str = "internal", **attributes) -> Span | None:
+    """Start a child of the current span without making it current.
+
+    For spans that begin and end in different callbacks; pass the span to
+    end_span when it's done.
+    """
+    current = _current_span.get()
+    if tracer.exporter is None or current is None:
+        return None
+    return Span(
+        tracer.service, name, current.trace_id, current.span_id, kind, attributes
+    )
+
+
+def end_span(span: Span):
+    span.finish()
+    tracer.exporter.export(span)
+
+
+def http_event_hooks(peer: str) -> dict:
+    """httpx event hooks recording a client span for every request sent.
+
+    Each attempt of an SDK's retry loop is its own span, ending when the
+    response headers arrive, and carries the trace context downstream.
+    Requests that fail before a response don't get a span, the enclosing
+    span records the error.
+    """
+
+    async def on_request(request):
+        span = start_span(f"{peer} {request.method} {request.url.path}", kind="client")
+        if span is not None:
+            request.headers["traceparent"] = span.traceparent()
+            request.extensions["trace_span"] = span
+
+    async def on_response(response):
+        span = response.request.extensions.get("trace_span")
+        if span is not None:
+            span.set("status", response.status_code)
+            end_span(span)
+
+    return {"request": [on_request], "response": [on_response]}
+
+
+class TracingMiddleware:
+    """ASGI middleware running every HTTP request as a server span.
+
+    The span continues the caller's trace from its traceparent header and
+    is named after the matched route once routing is done.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or tracer.exporter is None:
+            await self.app(scope, receive, send)
+            return
+
+        traceparent = None
+        for name, value in scope["headers"]:
+            if name == b"traceparent":
+                traceparent = value.decode("latin-1")
+                break
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                current.set("status", message["status"])
+            await send(message)
+
+        with span(
+            f"{scope['method']} {scope['path']}", traceparent, kind="server"
+        ) as current:
+            try:
+                await self.app(scope, receive, send_with_status)
+            finally:
+                route = scope.get("route")
+                if route is not None:
+                    current.name = f"{scope['method']} {route.path}"
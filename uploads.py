@@ -0,0 +1,153 @@
+import hashlib
+import os
+import tempfile
+
+from fastapi import HTTPException, UploadFile
+from fastapi.responses import JSONResponse
+
+# Size of each read from an upload; bounds the bytes held per request above
+# the spool threshold
+UPLOAD_CHUNK_BYTES = 64 * 1024
+
+# Uploads up to this size stay in memory, larger ones are spooled to a temp
+# file that the extraction workers read themselves (Starlette's threshold)
+UPLOAD_SPOOL_BYTES = 1024 * 1024
+
+
+class Upload:
+    """An uploaded file read once, with its SHA-256 computed on the way.
+
+    Small files are kept as bytes. Larger ones are written chunk by chunk
+    to a temp file, so neither the server nor the extraction worker holds
+    the whole file in memory; close() removes it.
+    """
+
+    def __init__(self, filename: str | None, size: int, sha256: str, content, path):
+        self.filename = filename
+        self.size = size
+        self.sha256 = sha256
+        self.content = content
+        self.path = path
+
+    @property
+    def source(self) -> bytes | str:
+        """The bytes of a small upload, or the path of a spooled one"""
+        return self.content if self.content is not None else self.path
+
+    def close(self):
+        if self.path is not None:
+            try:
+                os.unlink(self.path)
+            except FileNotFoundError:
+                pass
+            self.path = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def too_large(max_bytes: int, what: str = "Upload") -> HTTPException:
+    return HTTPException(
+        status_code=413,
+        detail=f"{what} is larger than the {max_bytes // (1024 * 1024)} MB limit",
+    )
+
+
+async def read_upload(
+    upload: UploadFile,
+    max_bytes: int,
+    chunk_bytes: int = UPLOAD_CHUNK_BYTES,
+    spool_bytes: int = UPLOAD_SPOOL_BYTES,
+) -> Upload:
+    """Read an upload in chunks, hashing it as it streams.
+
+    Raises a 413 HTTPException as soon as the file exceeds max_bytes.
+    """
+    digest = hashlib.sha256()
+    chunks = []
+    size = 0
+    spool = None
+    try:
+        while chunk := await upload.read(chunk_bytes):
+            size += len(chunk)
+            if size > max_bytes:
+                raise too_large(max_bytes)
+            digest.update(chunk)
+            if spool is None and size > spool_bytes:
+                spool = tempfile.NamedTemporaryFile(
+                    prefix="upload-",
+                    suffix=os.path.splitext(upload.filename or "")[1],
+                    delete=False,
+                )
+                spool.writelines(chunks)
+                chunks = None
+            if spool is not None:
+                spool.write(chunk)
+            else:
+                chunks.append(chunk)
+    except BaseException:
+        if spool is not None:
+            spool.close()
+            os.unlink(spool.name)
+        raise
+
+    if spool is None:
+        return Upload(upload.filename, size, digest.hexdigest(), b"".join(chunks), None)
+    spool.close()
+    return Upload(upload.filename, size, digest.hexdigest(), None, spool.name)
+
+
+class BodyLimitMiddleware:
+    """ASGI middleware rejecting request bodies over max_bytes with a 413.
+
+    A declared Content-Length over the limit is refused before any of the
+    body is read, and one that isn't a number gets a 400. Chunked bodies are
+    counted as they arrive, and parsing stops once they pass the limit, so an
+    oversized upload is never spooled in full.
+    """
+
+    def __init__(self, app, max_bytes: int):
+        self.app = app
+        self.max_bytes = max_bytes
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        for name, value in scope["headers"]:
+            if name == b"content-length":
+                try:
+                    length = int(value)
+                except ValueError:
+                    length = None
+                if length is None or length < 0:
+                    error = HTTPException(
+                        status_code=400, detail="Invalid Content-Length header"
+                    )
+                elif length > self.max_bytes:
+                    error = too_large(self.max_bytes, "Request body")
+                else:
+                    break
+                response = JSONResponse(
+                    {"detail": error.detail}, status_code=error.status_code
+                )
+                await response(scope, receive, send)
+                return
+
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_bytes:
+                    # FastAPI re-raises HTTPExceptions from body parsing
+                    raise too_large(self.max_bytes, "Request body")
+            return message
+
+        await self.app(scope, limited_receive, send)